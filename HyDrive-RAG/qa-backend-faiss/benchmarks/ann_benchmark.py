@@ -0,0 +1,128 @@
+"""FAISS 인덱스 종류별 recall/지연 시간 벤치마크
+
+data/processed의 섹션 임베딩(*_embeddings.pkl)을 FAISSVectorStore에 넣고
+Flat(정확 검색) 결과를 기준으로 IVF-Flat / HNSW / IVF-PQ의 recall@k,
+질의 하나씩 검색(search)과 묶음 검색(search_batch)의 질의당 지연 시간을 비교한다.
+질의는 섹션 임베딩에 잡음을 섞어 만든다. 실제 임베딩은 수천 개뿐이므로
+--synthetic으로 같은 분포의 군집 벡터를 더해 규모를 키울 수 있다.
+저장소는 임시 디렉토리에 만들므로 data 디렉토리는 바뀌지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/ann_benchmark.py [--synthetic 50000] [--queries 200] [--k 5]
+"""
+import argparse
+import contextlib
+import io
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.vector_store import FAISSVectorStore
+
+
+def load_embeddings(data_dir):
+    matrices = []
+    for pickle_file in sorted(Path(data_dir).glob("*_embeddings.pkl")):
+        with open(pickle_file, "rb") as f:
+            matrices.append(np.asarray(pickle.load(f)["embeddings"], dtype="float32"))
+    return np.vstack(matrices)
+
+
+def normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype("float32")
+
+
+def synthetic_vectors(base, count, rng, noise=0.35):
+    """실제 임베딩을 중심으로 흩뿌린 군집 벡터 (문서 규모를 키우기 위한 가짜 섹션)"""
+    centers = base[rng.integers(0, len(base), count)]
+    return normalize(centers + noise * rng.standard_normal(centers.shape).astype("float32") / np.sqrt(base.shape[1]))
+
+
+def build_store(store_dir, vectors, index_factory, batch_size=1000):
+    store = FAISSVectorStore(vectors.shape[1], store_dir, background_compaction=False, fsync=False,
+                             index_factory=index_factory)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for start in range(0, len(vectors), batch_size):
+            batch = vectors[start:start + batch_size]
+            store.add_vectors(batch, [{"id": start + i} for i in range(len(batch))])
+    return store, time.perf_counter() - started
+
+
+def ids(results):
+    return [[metadata["id"] for _, metadata in row] for row in results]
+
+
+def recall(found, expected):
+    hits = sum(len(set(row) & set(truth)) for row, truth in zip(found, expected))
+    return hits / sum(len(truth) for truth in expected)
+
+
+def latency(store, queries, k, repeat):
+    """(질의 하나씩 검색한 질의당 ms, 묶음 검색 질의당 ms)"""
+    single, batch = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for query in queries:
+            store.search(query[None, :], k)
+        single.append((time.perf_counter() - started) / len(queries))
+
+        started = time.perf_counter()
+        store.search_batch(queries, k)
+        batch.append((time.perf_counter() - started) / len(queries))
+    return statistics.median(single) * 1e3, statistics.median(batch) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--synthetic", type=int, default=50000, help="추가할 합성 벡터 수")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=48, help="IVF-PQ 부분 벡터 수 (차원의 약수)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    real = normalize(load_embeddings(args.data_dir))
+    vectors = np.vstack([real, synthetic_vectors(real, args.synthetic, rng)]) if args.synthetic else real
+    queries = synthetic_vectors(real, args.queries, rng)
+    print(f"벡터 {len(vectors)}개 (실제 {len(real)}개), 차원 {vectors.shape[1]}, 질의 {len(queries)}개, k={args.k}")
+
+    # (인덱스, 파라미터 이름, 살펴볼 값)
+    configs = [
+        ("Flat", None, [None]),
+        (f"IVF{args.nlist},Flat", "nprobe", [1, 4, 16, 64]),
+        ("HNSW32", "ef_search", [16, 32, 64, 128]),
+        (f"IVF{args.nlist},PQ{args.pq_m}", "nprobe", [4, 16, 64]),
+    ]
+
+    expected = None
+    print(f"{'인덱스':<18} {'파라미터':<14} {'recall@k':>8} {'단건 ms':>9} {'묶음 ms':>9} {'구축 s':>8}")
+    for index_factory, param, values in configs:
+        with tempfile.TemporaryDirectory() as store_dir:
+            store, build_seconds = build_store(store_dir, vectors, index_factory)
+            for value in values:
+                if param:
+                    store.set_search_params(**{param: value})
+                found = ids(store.search_batch(queries, args.k))
+                if expected is None:
+                    expected = found
+                single_ms, batch_ms = latency(store, queries, args.k, args.repeat)
+                label = f"{param}={value}" if param else "-"
+                print(f"{index_factory:<18} {label:<14} {recall(found, expected):>8.3f} "
+                      f"{single_ms:>9.3f} {batch_ms:>9.3f} {build_seconds:>8.2f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""프롬프트 문맥 구성 벤치마크 (1위 섹션 앞 1200자 vs 상위 섹션 문단 토큰 예산 패킹)
+
+매뉴얼마다 search_benchmark의 질의로 상위 --k개 섹션을 검색한 뒤 두 방식의 문맥을 비교한다.
+- 기존: 1위 섹션 본문을 정리해 앞 1200자만 사용
+- 패킹: 상위 섹션들의 문단 중 질의 관련도가 높은 것부터 --budget 토큰 안에서 선택
+지표는 문맥 토큰 수(추정), 질의 단어 포함률(문맥에 든 질의 단어 비율),
+관련 문단 포함률(상위 섹션들의 가장 관련도 높은 문단이 문맥에 든 비율), 문맥 구성 시간이다.
+매뉴얼 JSON은 임시 디렉토리에 복사해 쓰므로 data 디렉토리는 바뀌지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/context_packing_benchmark.py [--k 3] [--budget 600]
+"""
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.answer_generator import AnswerGenerator
+from services.context_packer import estimate_tokens, pack_context
+from services.search_index import tokenize
+from services.vectorized_search import VectorizedSearchService
+from search_benchmark import QUERIES
+
+LEGACY_CONTEXT_CHARS = 1200
+
+
+def legacy_context(results, clean):
+    return clean(results[0]["content"])[:LEGACY_CONTEXT_CHARS]
+
+
+def term_coverage(query, context):
+    words = tokenize(query)
+    context = context.lower()
+    return sum(word in context for word in words) / len(words) if words else 1.0
+
+
+def best_passage_included(results, context, clean):
+    """상위 섹션들에서 점수가 가장 높은 문단이 문맥에 들었는지 (관련 문단이 없으면 None)"""
+    passages = [passage for result in results for passage in result.get("passages", [])]
+    best = max(passages, key=lambda passage: passage["score"], default=None)
+    if best is None or best["score"] <= 0:
+        return None
+    return clean(best["text"]) in context
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=600, help="패킹 문맥의 토큰 예산")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        clean = AnswerGenerator()._clean_content
+
+    print(f"{'매뉴얼':<32} {'토큰 기존/패킹':>14} {'단어 포함 기존/패킹':>20} {'관련 문단 기존/패킹':>20} {'패킹 ms':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for path in Path(args.data_dir).glob("*_structured.json"):
+            shutil.copy(path, work_dir)
+
+        for json_file in sorted(Path(work_dir).glob("*_structured.json")):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                json_data = json.load(f)
+            service = VectorizedSearchService(data_path=work_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                service.add_document(json_data)
+
+            tokens = {"legacy": [], "packed": []}
+            coverage = {"legacy": [], "packed": []}
+            included = {"legacy": [], "packed": []}
+            latencies = []
+            for query in QUERIES:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = service.search_sections(query, k=args.k)
+                if not results:
+                    continue
+
+                started = time.perf_counter()
+                packed, _ = pack_context(results, args.budget, clean=clean)
+                latencies.append(time.perf_counter() - started)
+
+                for name, context in (("legacy", legacy_context(results, clean)), ("packed", packed)):
+                    tokens[name].append(estimate_tokens(context))
+                    coverage[name].append(term_coverage(query, context))
+                    hit = best_passage_included(results, context, clean)
+                    if hit is not None:
+                        included[name].append(hit)
+
+            if not latencies:
+                continue
+            print(
+                f"{json_file.stem:<32} "
+                f"{statistics.mean(tokens['legacy']):>6.0f}/{statistics.mean(tokens['packed']):<7.0f} "
+                f"{statistics.mean(coverage['legacy']):>10.3f}/{statistics.mean(coverage['packed']):<9.3f} "
+                f"{statistics.mean(included['legacy'] or [0]):>10.3f}/{statistics.mean(included['packed'] or [0]):<9.3f} "
+                f"{statistics.median(latencies) * 1e3:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
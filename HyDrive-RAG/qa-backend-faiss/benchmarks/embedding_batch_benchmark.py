@@ -0,0 +1,78 @@
+"""질의 임베딩 마이크로 배칭 벤치마크 (sentence-transformers 필요)
+
+동시 요청 수별로 질의 임베딩 처리량(질의/초)과 지연 시간을 비교한다.
+- 기존: 요청마다 스레드풀에서 encode_query([질의]) 한 번씩 호출
+- 배칭: encode_query_async로 동시에 들어온 질의를 모아 한 번에 인코딩
+두 방식의 임베딩이 같은지(허용 오차 안)도 확인한다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/embedding_batch_benchmark.py [--concurrency 1 4 16 64] [--requests 256] [--max-wait-ms 5]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.embeddings import EmbeddingModel
+from search_benchmark import QUERIES
+
+
+async def run_load(encode, queries, concurrency):
+    """동시 요청 concurrency개로 queries를 모두 처리 (총 소요 시간, 요청별 지연 시간, 결과)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with semaphore:
+            started = time.perf_counter()
+            embedding = await encode(query)
+            latencies.append(time.perf_counter() - started)
+            return embedding
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(query) for query in queries))
+    return time.perf_counter() - started, latencies, results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-name", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = EmbeddingModel(args.model_name, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    queries = [QUERIES[i % len(QUERIES)] + f" {i}" for i in range(args.requests)]
+    loop = asyncio.get_running_loop()
+
+    async def unbatched(query):
+        return await loop.run_in_executor(None, model.encode_query, query)
+
+    # 모델 예열
+    model.encode_texts(QUERIES)
+
+    print(f"{'동시 요청':>8} {'기존 q/s':>9} {'배칭 q/s':>9} {'기존 p50 ms':>11} {'배칭 p50 ms':>11} {'평균 배치':>8} {'최대 오차':>10}")
+    for concurrency in args.concurrency:
+        model.query_batcher.batches = model.query_batcher.queries = 0
+        plain_seconds, plain_latencies, plain = await run_load(unbatched, queries, concurrency)
+        batch_seconds, batch_latencies, batched = await run_load(model.encode_query_async, queries, concurrency)
+        max_error = max(float(np.abs(a - b).max()) for a, b in zip(plain, batched))
+        print(
+            f"{concurrency:>8} {len(queries) / plain_seconds:>9.1f} {len(queries) / batch_seconds:>9.1f} "
+            f"{statistics.median(plain_latencies) * 1e3:>11.2f} {statistics.median(batch_latencies) * 1e3:>11.2f} "
+            f"{model.query_batcher.get_stats()['avg_batch_size']:>8} {max_error:>10.2e}"
+        )
+
+    await model.query_batcher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+"""하이브리드 검색 벤치마크 (어휘 후보 → 임베딩 재순위)
+
+세 백엔드의 질의 지연 시간을 매뉴얼별로, 그리고 모든 매뉴얼을 --scales배로 합친 가상 매뉴얼에서 비교한다.
+- JSONSearchService: 모든 섹션 내적 + 모든 섹션 파이썬 점수 계산
+- VectorizedSearchService: 어휘 점수만 (하이브리드 1단계)
+- HybridSearchService: 어휘 상위 --candidates개 + 임베딩 상위 --semantic-candidates개만 재순위
+  (섹션이 --ann-min-sections개 이상이면 임베딩 후보는 HNSW 인덱스로 찾음)
+매뉴얼별로는 의미 recall(전체 섹션 코사인 유사도 top-k 중 하이브리드 재순위 후보에 든 비율)과
+결과 일치(하이브리드 top-k와 JSONSearchService top-k가 겹치는 비율)도 잰다.
+합친 매뉴얼은 같은 섹션 사본이 후보를 나눠 가지므로 지연 시간만 비교한다.
+질의 임베딩은 --model이면 실제 모델, 아니면 질의 단어가 제목에 든 섹션들의 평균 임베딩에 잡음을 섞은 벡터를 쓴다.
+매뉴얼 JSON과 임베딩 캐시는 임시 디렉토리에 복사해 쓰므로 data 디렉토리는 바뀌지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/hybrid_benchmark.py [--scales 1 3 10] [--repeat 5] [--k 5] [--candidates 50] [--semantic-candidates 10] [--model]
+"""
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.embedding_cache import manual_cache_name, save_embedding_cache
+from services.hybrid_search import HybridSearchService
+from services.json_search_service import JSONSearchService
+from services.search_index import tokenize
+from services.vectorized_search import VectorizedSearchService
+from search_benchmark import QUERIES
+
+
+class TitleTopicEncoder:
+    """질의 단어가 제목에 든 섹션들의 평균 임베딩 + 잡음 벡터를 돌려주는 질의 인코더 (없으면 임의 섹션)"""
+
+    def __init__(self, sections, embeddings, noise=0.5, seed=0):
+        self.titles = [section["title"].lower() for section in sections]
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.noise = noise
+        self.seed = seed
+
+    def encode_query(self, query):
+        rng = np.random.default_rng(self.seed + zlib.crc32(query.encode("utf-8")))
+        words = tokenize(query)
+        rows = [row for row, title in enumerate(self.titles) if any(word in title for word in words)]
+        if not rows:
+            rows = [rng.integers(len(self.embeddings))]
+        vector = self.embeddings[rows].mean(axis=0)
+        vector = vector / np.linalg.norm(vector)
+        vector = vector + self.noise * rng.standard_normal(vector.shape).astype(np.float32) / np.sqrt(len(vector))
+        return vector[None, :]
+
+
+def load_manuals(work_dir):
+    """캐시가 있는 매뉴얼의 섹션과 임베딩을 모두 이어 붙임"""
+    sections, embeddings = [], []
+    for json_file in sorted(Path(work_dir).glob("*_structured.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = JSONSearchService(None, data_path=str(work_dir))
+            service.add_document(json_data)
+        if service.embeddings_cached:
+            sections.extend(json_data["sections"])
+            embeddings.append(np.asarray(service.section_embeddings, dtype=np.float32))
+    return sections, np.vstack(embeddings)
+
+
+def build(service, json_data):
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.add_document(json_data)
+    return service
+
+
+def measure(service, repeat, k):
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for query in QUERIES:
+                started = time.perf_counter()
+                service.search_sections(query, k=k)
+                latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+def ranking(service, query, k):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [result["section_number"] for result in service.search_sections(query, k=k)]
+
+
+def semantic_recall(hybrid, encoder, k):
+    """전체 섹션 코사인 top-k 중 하이브리드 재순위 후보에 든 비율"""
+    embeddings = np.asarray(hybrid.section_embeddings, dtype=np.float32)
+    hits = total = 0
+    for query in QUERIES:
+        query_vector = encoder.encode_query(query)[0]
+        query_vector = query_vector / np.linalg.norm(query_vector)
+        expected = set(np.argsort(-(embeddings @ query_vector))[:k])
+
+        lexical = hybrid._calculate_total_score(hybrid._calculate_field_vectors(query))
+        hits += len(expected & set(hybrid._select_candidates(lexical, query_vector, k)))
+        total += len(expected)
+    return hits / total
+
+
+def result_agreement(hybrid, full, k):
+    """질의마다 하이브리드 top-k가 JSONSearchService top-k와 겹치는 비율"""
+    hits = sum(len(set(ranking(hybrid, query, k)) & set(ranking(full, query, k))) for query in QUERIES)
+    return hits / (len(QUERIES) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=50, help="재순위할 어휘 상위 후보 수")
+    parser.add_argument("--semantic-candidates", type=int, default=10, help="재순위 후보에 합칠 임베딩 상위 후보 수")
+    parser.add_argument("--ann-min-sections", type=int, default=5000, help="임베딩 후보를 HNSW로 찾기 시작하는 섹션 수")
+    parser.add_argument("--model", action="store_true", help="실제 임베딩 모델로 질의 임베딩 (sentence-transformers 필요)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for path in Path(args.data_dir).glob("*_structured.json"):
+            shutil.copy(path, work_dir)
+        for path in Path(args.data_dir).glob("*_embeddings.pkl"):
+            shutil.copy(path, work_dir)
+
+        sections, embeddings = load_manuals(work_dir)
+        if args.model:
+            from models.embeddings import create_embedding_model
+            encoder = create_embedding_model()
+        else:
+            encoder = TitleTopicEncoder(sections, embeddings)
+
+        print(f"{'매뉴얼':<32} {'섹션':>6} {'JSON ms':>8} {'어휘 ms':>8} {'하이브리드 ms':>12} {'의미 recall':>11} {'결과 일치':>9}")
+        manuals = [path for path in sorted(Path(work_dir).glob("*_structured.json"))]
+        scaled = [{"file_name": f"merged_x{scale}.pdf", "sections": sections * scale} for scale in args.scales]
+        for json_data in scaled:
+            save_embedding_cache(Path(work_dir) / manual_cache_name(json_data["file_name"]),
+                                 np.tile(embeddings, (len(json_data["sections"]) // len(sections), 1)),
+                                 JSONSearchService(None)._build_sections_data(json_data))
+
+        for manual in manuals + scaled:
+            if isinstance(manual, Path):
+                with open(manual, 'r', encoding='utf-8') as f:
+                    json_data = json.load(f)
+                name = manual.stem
+            else:
+                json_data = manual
+                name = f"전체 x{len(manual['sections']) // len(sections)}"
+
+            full = build(JSONSearchService(encoder, data_path=work_dir), json_data)
+            if not full.embeddings_cached:
+                continue
+            lexical = build(VectorizedSearchService(data_path=work_dir), json_data)
+            hybrid = build(HybridSearchService(encoder, data_path=work_dir, candidate_count=args.candidates,
+                                              semantic_candidate_count=args.semantic_candidates,
+                                              ann_min_sections=args.ann_min_sections), json_data)
+
+            quality = f"{'-':>11} {'-':>9}"
+            if isinstance(manual, Path):
+                quality = f"{semantic_recall(hybrid, encoder, args.k):>11.3f} {result_agreement(hybrid, full, args.k):>9.3f}"
+            print(
+                f"{name:<32} {len(json_data['sections']):>6} {measure(full, args.repeat, args.k) * 1e3:>8.2f} "
+                f"{measure(lexical, args.repeat, args.k) * 1e3:>8.2f} {measure(hybrid, args.repeat, args.k) * 1e3:>12.2f} {quality}"
+            )
+
+
+if __name__ == "__main__":
+    main()
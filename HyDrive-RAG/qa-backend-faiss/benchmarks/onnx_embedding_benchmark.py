@@ -0,0 +1,134 @@
+"""임베딩 백엔드 비교 벤치마크 (PyTorch sentence-transformers vs ONNX Runtime fp32/int8)
+
+백엔드마다 새 프로세스에서 임포트 + 모델 로드 시간(콜드 스타트), 최대 RSS,
+질의 하나 인코딩 지연 시간(중앙값/p95), 섹션 제목 배치 인코딩 처리량을 잰다.
+PyTorch 임베딩을 기준으로 질의/섹션 임베딩의 코사인 유사도 최솟값과
+매뉴얼 섹션 검색 top-k 일치율(패리티)을 확인한다.
+
+먼저 ONNX 모델을 내보내야 한다:
+    python -m models.onnx_embeddings
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/onnx_embedding_benchmark.py [--repeat 50] [--k 5]
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search_benchmark import QUERIES
+
+# (이름, 백엔드, ONNX int8 모델 사용 여부)
+BACKENDS = [("torch", "torch", None), ("onnx-fp32", "onnx", False), ("onnx-int8", "onnx", True)]
+
+
+def section_titles(data_dir):
+    titles = []
+    for json_file in sorted(Path(data_dir).glob("*_structured.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            titles.extend(section.get("title", "") for section in json.load(f)["sections"])
+    return titles
+
+
+def child(args):
+    """자식 프로세스: 한 백엔드의 로드/인코딩 측정 결과와 임베딩을 저장"""
+    started = time.perf_counter()
+    from models.embeddings import create_embedding_model
+    kwargs = {} if args.quantized is None else {"quantized": args.quantized == "true"}
+    model = create_embedding_model(args.model_name, backend=args.backend, **kwargs)
+    load_seconds = time.perf_counter() - started
+
+    model.encode_query(QUERIES[0])  # 예열
+    latencies = []
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            model.encode_query(query)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+
+    titles = section_titles(args.data_dir)
+    started = time.perf_counter()
+    section_embeddings = model.encode_texts(titles)
+    batch_seconds = time.perf_counter() - started
+
+    np.savez(args.output, queries=model.encode_texts(QUERIES), sections=section_embeddings)
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "query_p50_ms": statistics.median(latencies) * 1e3,
+        "query_p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1e3,
+        "sections_per_second": len(titles) / batch_seconds
+    }))
+
+
+def cosine_min(reference, candidate):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return float((reference * candidate).sum(axis=1).min())
+
+
+def topk_agreement(reference, candidate, k):
+    """질의마다 섹션 top-k 집합이 기준과 겹치는 비율"""
+    hits = 0
+    for query_reference, query_candidate in zip(reference["queries"], candidate["queries"]):
+        expected = set(np.argsort(-(reference["sections"] @ query_reference))[:k])
+        found = set(np.argsort(-(candidate["sections"] @ query_candidate))[:k])
+        hits += len(expected & found)
+    return hits / (len(reference["queries"]) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-name", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--quantized", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, backend, quantized in BACKENDS:
+            output = Path(work_dir) / f"{name}.npz"
+            command = [sys.executable, __file__, "--child", "--backend", backend, "--output", str(output),
+                       "--model-name", args.model_name, "--data-dir", args.data_dir, "--repeat", str(args.repeat)]
+            if quantized is not None:
+                command += ["--quantized", "true" if quantized else "false"]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"⚠️ {name} 실행 실패: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+            stats = json.loads(completed.stdout.strip().splitlines()[-1])
+            with np.load(output) as embeddings:
+                stats["embeddings"] = {key: embeddings[key] for key in embeddings.files}
+            results[name] = stats
+
+    reference = results.get("torch", {}).get("embeddings")
+    print(f"{'백엔드':<10} {'로드 s':>7} {'RSS MB':>7} {'질의 p50 ms':>11} {'p95 ms':>7} {'섹션/s':>8} {'최소 cos':>9} {'top-k 일치':>10}")
+    for name, stats in results.items():
+        embeddings = stats["embeddings"]
+        parity = (f"{min(cosine_min(reference['queries'], embeddings['queries']), cosine_min(reference['sections'], embeddings['sections'])):>9.4f} "
+                  f"{topk_agreement(reference, embeddings, args.k):>10.3f}") if reference is not None else f"{'-':>9} {'-':>10}"
+        print(f"{name:<10} {stats['load_seconds']:>7.2f} {stats['max_rss_mb']:>7.0f} {stats['query_p50_ms']:>11.2f} "
+              f"{stats['query_p95_ms']:>7.2f} {stats['sections_per_second']:>8.0f} {parity}")
+
+
+if __name__ == "__main__":
+    main()
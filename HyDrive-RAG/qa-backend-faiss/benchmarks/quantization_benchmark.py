@@ -0,0 +1,136 @@
+"""섹션 임베딩 int8 양자화 벤치마크
+
+매뉴얼마다 JSONSearchService를 float32 임베딩(기존)과 int8 양자화 + 상위 후보 정확 재정렬로 각각 올려
+상주 임베딩 크기, 질의 지연 시간, 근사 유사도만으로 뽑은 top-k의 recall, 재정렬 후 검색 결과 일치율을 비교한다.
+질의 임베딩은 sentence-transformers가 있으면 --model로 실제 모델을 쓰고,
+없으면 질의마다 임의 섹션 임베딩에 잡음을 섞은 벡터를 쓴다 (제목/키워드 점수는 질의 문장으로 계산).
+매뉴얼 JSON과 임베딩 캐시는 임시 디렉토리에 복사해 쓰므로 data 디렉토리는 바뀌지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/quantization_benchmark.py [--repeat 20] [--k 5] [--rerank 50] [--model]
+"""
+import argparse
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.json_search_service import JSONSearchService
+from search_benchmark import QUERIES
+
+
+class SectionVectorEncoder:
+    """질의 문장마다 고정된 임의 섹션 임베딩 + 잡음 벡터를 돌려주는 질의 인코더"""
+
+    def __init__(self, embeddings, noise=0.5, seed=0):
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.noise = noise
+        self.seed = seed
+
+    def encode_query(self, query):
+        rng = np.random.default_rng(self.seed + zlib.crc32(query.encode("utf-8")))
+        vector = self.embeddings[rng.integers(len(self.embeddings))]
+        vector = vector + self.noise * rng.standard_normal(vector.shape).astype(np.float32) / np.sqrt(len(vector))
+        return vector[None, :]
+
+
+def load_service(data_dir, json_data, encoder, quantization, rerank):
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = JSONSearchService(encoder, data_path=str(data_dir), embedding_quantization=quantization,
+                                    rerank_candidates=rerank)
+        service.add_document(json_data)
+    return service
+
+
+def measure(service, repeat, k):
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for query in QUERIES:
+                started = time.perf_counter()
+                service.search_sections(query, k=k)
+                latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+def ranking(service, query, k):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [result["section_number"] for result in service.search_sections(query, k=k)]
+
+
+def similarity_recall(service, encoder, k):
+    """int8 근사 유사도 top-k가 정확한 유사도 top-k를 얼마나 포함하는지 (재정렬 전)"""
+    hits = total = 0
+    for query in QUERIES:
+        query_vector = encoder.encode_query(query)[0]
+        query_vector = query_vector / np.linalg.norm(query_vector)
+        exact = np.asarray(service.section_embeddings, dtype=np.float32) @ query_vector
+        approximate = service.quantized_embeddings.approximate_scores(query_vector)
+        expected = set(np.argsort(-exact)[:k])
+        hits += len(expected & set(np.argsort(-approximate)[:k]))
+        total += len(expected)
+    return hits / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank", type=int, default=50, help="원본 임베딩으로 다시 계산할 상위 후보 수")
+    parser.add_argument("--model", action="store_true", help="실제 임베딩 모델로 질의 임베딩 (sentence-transformers 필요)")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        from models.embeddings import EmbeddingModel
+        model = EmbeddingModel()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for path in Path(args.data_dir).glob("*_structured.json"):
+            shutil.copy(path, work_dir)
+        for path in Path(args.data_dir).glob("*_embeddings.pkl"):
+            shutil.copy(path, work_dir)
+
+        print(f"{'매뉴얼':<32} {'섹션':>5} {'임베딩 KB f32/int8':>18} {'질의 ms f32/int8':>17} {'유사도 recall':>12} {'결과 일치':>9}")
+        totals = {"float32": 0, "int8": 0}
+        for json_file in sorted(Path(work_dir).glob("*_structured.json")):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                json_data = json.load(f)
+
+            # 질의 인코더용 임베딩은 float32 서비스가 연 캐시 행렬을 사용
+            exact = load_service(work_dir, json_data, model, "none", args.rerank)
+            if not exact.embeddings_cached:
+                print(f"{json_file.stem:<32} 임베딩 캐시 없음")
+                continue
+            encoder = model or SectionVectorEncoder(exact.section_embeddings)
+            exact.embedding_model = encoder
+            quantized = load_service(work_dir, json_data, encoder, "int8", args.rerank)
+
+            float_bytes = len(exact.section_embeddings) * exact.section_embeddings.shape[1] * 4
+            totals["float32"] += float_bytes
+            totals["int8"] += quantized.quantized_embeddings.nbytes
+            same = sum(ranking(exact, query, args.k) == ranking(quantized, query, args.k) for query in QUERIES)
+            print(
+                f"{json_file.stem:<32} {len(exact.sections_data):>5} "
+                f"{float_bytes / 1024:>8.0f}/{quantized.quantized_embeddings.nbytes / 1024:<9.0f} "
+                f"{measure(exact, args.repeat, args.k) * 1e3:>8.3f}/{measure(quantized, args.repeat, args.k) * 1e3:<8.3f} "
+                f"{similarity_recall(quantized, encoder, args.k):>12.3f} {same:>4}/{len(QUERIES):<4}"
+            )
+
+        print(f"전체 상주 임베딩: float32 {totals['float32'] / 1024:.0f}KB -> int8 {totals['int8'] / 1024:.0f}KB "
+              f"({totals['float32'] / max(totals['int8'], 1):.1f}배 감소)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""키워드 검색 백엔드 벤치마크
+
+SimpleSearchService(역색인 + 파이썬 루프)와 VectorizedSearchService(희소 행렬 곱)의
+색인 생성 시간, 질의 지연 시간, 결과 일치 여부를 매뉴얼별로 비교한다.
+마지막 행은 모든 매뉴얼을 --scale배로 합친 가상 매뉴얼로, 매뉴얼이 커질 때의 추세를 보여준다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/search_benchmark.py [--repeat 20] [--k 3] [--scale 3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.simple_search import SimpleSearchService
+from services.vectorized_search import VectorizedSearchService
+
+QUERIES = [
+    "타이어 공기압", "엔진오일 교체", "엔진 오일 교체 방법", "브레이크패드", "와이퍼 교체는 어떻게 하나요",
+    "배터리 방전 문제", "에어컨 필터", "냉각수 점검", "경고등이 켜졌어요", "시동이 안됨 고장",
+    "스마트키 배터리", "안전벨트 착용", "차로 유지 보조", "후방 카메라 작동 안됨 오류", "퓨즈 교체 방법 절차"
+]
+
+
+def build(service_class, json_data):
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        service = service_class()
+        service.add_document(json_data)
+        return service, time.perf_counter() - started
+
+
+def measure(service, repeat, k):
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for query in QUERIES:
+                started = time.perf_counter()
+                service.search_sections(query, k=k)
+                latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def ranking(service, query, k):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [(r["section_number"], r["score"]) for r in service.search_sections(query, k=k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'매뉴얼':<32} {'색인(ms) S/V':>14} {'p50(ms) S/V':>14} {'p99(ms) S/V':>14} {'속도비':>6} {'일치':>4}")
+    merged_sections = []
+    for json_file in sorted(Path(args.data_dir).glob("*_structured.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        merged_sections.extend(json_data.get("sections", []))
+        report(json_file.stem, json_data, args)
+
+    if args.scale > 0 and merged_sections:
+        merged = {"file_name": "merged", "sections": merged_sections * args.scale}
+        report(f"전체 x{args.scale} ({len(merged['sections'])}개 섹션)", merged, args)
+
+
+def report(name, json_data, args):
+    simple, simple_build = build(SimpleSearchService, json_data)
+    vectorized, vectorized_build = build(VectorizedSearchService, json_data)
+
+    simple_p50, simple_p99 = measure(simple, args.repeat, args.k)
+    vectorized_p50, vectorized_p99 = measure(vectorized, args.repeat, args.k)
+    same = all(ranking(simple, q, args.k) == ranking(vectorized, q, args.k) for q in QUERIES)
+
+    print(
+        f"{name:<32} "
+        f"{simple_build * 1e3:>6.0f}/{vectorized_build * 1e3:<7.0f} "
+        f"{simple_p50 * 1e3:>6.2f}/{vectorized_p50 * 1e3:<7.2f} "
+        f"{simple_p99 * 1e3:>6.2f}/{vectorized_p99 * 1e3:<7.2f} "
+        f"{simple_p50 / vectorized_p50:>5.1f}x {'✅' if same else '❌':>4}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""섹션 표현 메모리/GC 부담 벤치마크
+
+매뉴얼마다 섹션 딕셔너리 목록(기존 sections_data)과 열 단위 SectionTable의
+할당 힙 크기(tracemalloc), GC가 추적하는 객체 수, 모든 매뉴얼을 올린 상태의 전체 GC(gc.collect) 시간을 비교한다.
+두 표현 모두 본문 문자열은 원본 JSON의 것을 공유하므로 본문 크기는 포함하지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/section_memory_benchmark.py [--repeat 5]
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.section_table import SectionTable
+
+
+def build_dicts(json_data, contents):
+    """기존 sections_data 형식 (섹션마다 7개 키 딕셔너리)"""
+    return [
+        {
+            "source": json_data.get("file_name", "unknown"),
+            "section_number": section.get("section_number", ""),
+            "title": section.get("title", ""),
+            "page_range": section.get("page_range", ""),
+            "content": content,
+            "keywords": section.get("keywords", []),
+            "subsections": section.get("subsections", [])
+        }
+        for section, content in zip(json_data["sections"], contents)
+    ]
+
+
+def build_table(json_data, contents):
+    return SectionTable(json_data.get("file_name", "unknown"), json_data["sections"], contents)
+
+
+def measure(build, manuals):
+    """(힙 바이트, GC 추적 객체 수, 결과 목록) - 원본 JSON은 측정 전에 만들어 두고 제외"""
+    gc.collect()
+    tracked_before = len(gc.get_objects())
+    tracemalloc.start()
+    built = [build(json_data, contents) for json_data, contents in manuals]
+    heap_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    gc.collect()
+    return heap_bytes, len(gc.get_objects()) - tracked_before, built
+
+
+def full_gc_seconds(repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        gc.collect()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def load_manuals(data_dir):
+    """(JSON, 본문 목록) 목록 - 본문 문자열은 두 표현이 똑같이 참조하므로 미리 꺼내 둠 (SectionStore의 공유 원문 역할)"""
+    manuals = []
+    for json_file in sorted(Path(data_dir).glob("*_structured.json")):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        manuals.append((json_data, [section.get("content", "") for section in json_data["sections"]]))
+    return manuals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'매뉴얼':<32} {'섹션':>5} {'힙(KB) dict/table':>18} {'GC 객체 dict/table':>19} {'일치':>4}")
+    for json_data, contents in load_manuals(args.data_dir):
+        dict_heap, dict_objects, (as_dicts,) = measure(build_dicts, [(json_data, contents)])
+        table_heap, table_objects, (as_table,) = measure(build_table, [(json_data, contents)])
+        same = len(as_dicts) == len(as_table) and all(dict(view) == section for view, section in zip(as_table, as_dicts))
+        print(
+            f"{Path(json_data.get('file_name', '?')).stem:<32} {len(as_dicts):>5} "
+            f"{dict_heap / 1024:>8.0f}/{table_heap / 1024:<9.0f} "
+            f"{dict_objects:>8}/{table_objects:<10} {'✅' if same else '❌':>4}"
+        )
+
+    # 모든 매뉴얼을 올리고 원본 JSON은 버린 상태에서 전체 GC 한 번에 걸리는 시간
+    for name, build in (("dict", build_dicts), ("table", build_table)):
+        heap_bytes, tracked, built = measure(build, load_manuals(args.data_dir))
+        print(f"전체 {name:<5}: 힙 {heap_bytes / 1024:>6.0f}KB, GC 추적 객체 {tracked:>6}개, gc.collect {full_gc_seconds(args.repeat) * 1e3:.2f}ms")
+        del built
+
+
+if __name__ == "__main__":
+    main()
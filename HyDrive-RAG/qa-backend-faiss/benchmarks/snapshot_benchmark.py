@@ -0,0 +1,95 @@
+"""매뉴얼 스냅샷 로드 벤치마크
+
+매뉴얼마다 JSON 파싱 + 색인 생성 경로와 컴파일된 스냅샷을 여는 경로의
+로드 시간, 로드 중 할당된 파이썬 힙 크기(tracemalloc), 검색 결과 일치 여부를 비교한다.
+스냅샷은 임시 디렉토리에 컴파일하므로 data 디렉토리는 바뀌지 않는다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python benchmarks/snapshot_benchmark.py [--backend simple|vectorized] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.simple_search import SimpleSearchService
+from services.vectorized_search import VectorizedSearchService
+from services.manual_snapshot import write_snapshot, open_snapshot, snapshot_path_for, source_checksum
+from search_benchmark import QUERIES
+
+
+def load_json(service_class, json_file):
+    service = service_class()
+    with open(json_file, 'r', encoding='utf-8') as f:
+        service.add_document(json.load(f))
+    return service
+
+
+def load_snapshot(service_class, snapshot_path, checksum):
+    service = service_class()
+    service.load_snapshot(open_snapshot(snapshot_path, checksum))
+    return service
+
+
+def measure(load, repeat):
+    """(로드 시간 중앙값, 로드된 서비스가 잡고 있는 힙 크기, 서비스)"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        service = load()
+        heap_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return statistics.median(timings), heap_bytes, service
+
+
+def ranking(service, query):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [(r["section_number"], r["score"], r["content"]) for r in service.search_sections(query, k=5)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--backend", choices=["simple", "vectorized"], default="simple")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service_class = VectorizedSearchService if args.backend == "vectorized" else SimpleSearchService
+
+    print(f"{'매뉴얼':<32} {'로드(ms) J/S':>14} {'힙(KB) J/S':>16} {'스냅샷(KB)':>10} {'일치':>4}")
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        for json_file in sorted(Path(args.data_dir).glob("*_structured.json")):
+            checksum = source_checksum(json_file)
+            snapshot_path = snapshot_path_for(json_file, snapshot_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_snapshot(snapshot_path, load_json(service_class, json_file), checksum)
+
+            json_time, json_heap, from_json = measure(lambda: load_json(service_class, json_file), args.repeat)
+            snap_time, snap_heap, from_snapshot = measure(
+                lambda: load_snapshot(service_class, snapshot_path, checksum), args.repeat
+            )
+            same = all(ranking(from_json, q) == ranking(from_snapshot, q) for q in QUERIES)
+
+            print(
+                f"{json_file.stem:<32} "
+                f"{json_time * 1e3:>6.1f}/{snap_time * 1e3:<7.1f} "
+                f"{json_heap / 1024:>7.0f}/{snap_heap / 1024:<8.0f} "
+                f"{snapshot_path.stat().st_size / 1024:>10.0f} {'✅' if same else '❌':>4}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""매뉴얼 섹션 임베딩 캐시 빌드 (증분)
+
+data/processed의 *_structured.json마다 섹션 텍스트(제목 + 본문) 해시를 계산해,
+같은 모델로 만든 기존 캐시에 같은 해시의 임베딩이 있으면 재사용하고 새로 생기거나 바뀐 섹션만 인코딩한다.
+재사용 후보는 디렉토리의 모든 캐시이므로, 새 연식 매뉴얼도 이전 연식과 같은 섹션은 다시 인코딩하지 않는다.
+인코딩은 배치로 나눠 프로세스 풀에서 병렬 실행하고, 결과는 JSONSearchService가 가장 먼저 찾는
+{매뉴얼}_embeddings.meta + embedding_blobs/{sha256}.npy로 저장한다.
+
+사용법 (qa-backend-faiss 디렉토리에서):
+    python create_embeddings.py [매뉴얼 JSON ...] [--workers 4] [--batch-size 64] [--backend torch|onnx] [--force]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.embeddings import DEFAULT_MODEL_NAME, create_embedding_model
+from services.embedding_cache import (
+    SUPPORTED_DTYPES, EmbeddingCacheError, load_embedding_cache, open_embedding_cache,
+    save_embedding_cache, section_text_hash
+)
+from services.json_search_service import JSONSearchService
+
+# 워커 프로세스의 임베딩 모델 (_init_worker에서 한 번 로드)
+_worker_model = None
+
+
+def section_text(section) -> str:
+    """임베딩할 섹션 텍스트 (제목 + 본문)"""
+    return f"{section['title']}\n{section['content']}"
+
+
+def _init_worker(model_name: str, backend: str, threads: int):
+    global _worker_model
+    # 프로세스마다 연산 스레드 수를 나눠 CPU를 과점유하지 않음 (모델 라이브러리를 임포트하기 전에 설정)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["EMBEDDING_ONNX_THREADS"] = str(threads)
+    _worker_model = create_embedding_model(model_name, backend=backend)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode_texts(texts), dtype=np.float32)
+
+
+class SectionVectorPool:
+    """기존 캐시들의 섹션 텍스트 해시 → (행렬, 행) 색인 (같은 모델로 만들고 섹션 해시가 있는 캐시만)"""
+
+    def __init__(self, data_dir: Path, model_name: str):
+        self.model_name = model_name
+        self.rows: Dict[str, Tuple[np.ndarray, int]] = {}
+        for sidecar_path in sorted(data_dir.glob("*.meta")):
+            try:
+                cache = open_embedding_cache(sidecar_path.with_name(sidecar_path.name[:-len(".meta")]))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ {sidecar_path.name} 캐시를 읽을 수 없습니다: {e}")
+                continue
+            if cache is not None:
+                self.add(*cache)
+
+    def add(self, sidecar: Dict, matrix: np.ndarray):
+        if sidecar.get("model_name") != self.model_name or "section_hashes" not in sidecar:
+            return
+        for row, text_hash in enumerate(sidecar["section_hashes"]):
+            self.rows.setdefault(text_hash, (matrix, row))
+
+    def get(self, text_hash: str) -> Optional[np.ndarray]:
+        entry = self.rows.get(text_hash)
+        return None if entry is None else np.asarray(entry[0][entry[1]], dtype=np.float32)
+
+
+class Encoder:
+    """섹션 텍스트 인코더 (workers > 1이면 프로세스 풀, 모델은 처음 필요할 때 로드)"""
+
+    def __init__(self, model_name: str, backend: str, workers: int, batch_size: int):
+        self.model_name = model_name
+        self.backend = backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # 배치 하나뿐이면 (바뀐 섹션이 적은 재빌드) 프로세스를 띄우지 않고 현재 프로세스에서 인코딩
+        if self.workers <= 1 or (len(batches) == 1 and self._executor is None):
+            if _worker_model is None:
+                _init_worker(self.model_name, self.backend, os.cpu_count() or 1)
+            return np.vstack([_encode_batch(batch) for batch in batches])
+
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.backend, threads)
+            )
+        return np.vstack(list(self._executor.map(_encode_batch, batches)))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def build_manual(json_file: Path, data_dir: Path, service: JSONSearchService, pool: SectionVectorPool,
+                 encoder: Encoder, args) -> Dict:
+    """매뉴얼 하나의 캐시 빌드 (바뀐 섹션만 인코딩)"""
+    started = time.perf_counter()
+    with open(json_file, 'r', encoding='utf-8') as f:
+        json_data = json.load(f)
+
+    vehicle_name = service._extract_vehicle_name_from_data(json_data)
+    sections_data = service._build_sections_data(json_data)
+    cache_name = service._cache_names(json_data, vehicle_name)[0]
+    cache_stem = data_dir / cache_name
+
+    # 섹션 지문과 모델이 같은 캐시가 이미 있으면 그대로 둠
+    if not args.force:
+        try:
+            cached = open_embedding_cache(cache_stem)
+            if cached is not None and cached[0].get("model_name") == args.model_name and \
+                    load_embedding_cache(cache_stem, sections_data) is not None:
+                return {"cache_name": cache_name, "sections": len(sections_data), "reused": len(sections_data),
+                        "encoded": 0, "seconds": time.perf_counter() - started, "skipped": True}
+        except (EmbeddingCacheError, OSError, ValueError, KeyError):
+            pass
+
+    texts = [section_text(section) for section in sections_data]
+    hashes = [section_text_hash(text) for text in texts]
+
+    vectors: Dict[str, np.ndarray] = {}
+    if not args.force:
+        for text_hash in hashes:
+            vector = pool.get(text_hash)
+            if vector is not None:
+                vectors[text_hash] = vector
+
+    # 재사용은 섹션 단위로 셈 (같은 텍스트의 섹션이 여러 개여도 각각 재사용한 섹션)
+    reused = sum(text_hash in vectors for text_hash in hashes)
+
+    # 새로 생기거나 바뀐 섹션만 (같은 텍스트는 한 번만) 인코딩
+    missing = {}
+    for text_hash, text in zip(hashes, texts):
+        if text_hash not in vectors:
+            missing.setdefault(text_hash, text)
+    if missing:
+        encoded = encoder.encode(list(missing.values()))
+        vectors.update(zip(missing.keys(), encoded))
+
+    # 검색은 내적을 코사인 유사도로 쓰므로 정규화해서 저장
+    matrix = np.vstack([vectors[text_hash] for text_hash in hashes]) if hashes else np.zeros((0, 0), dtype=np.float32)
+    if len(matrix):
+        matrix = matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+    save_embedding_cache(cache_stem, matrix, sections_data, dtype=args.dtype, model_name=args.model_name,
+                         section_hashes=hashes)
+    pool.add(*open_embedding_cache(cache_stem))
+    return {"cache_name": cache_name, "sections": len(sections_data), "reused": reused,
+            "encoded": len(missing), "seconds": time.perf_counter() - started, "skipped": False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manuals", nargs="*", help="빌드할 *_structured.json (없으면 --data-dir 전체)")
+    parser.add_argument("--data-dir", default="./data/processed")
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "torch"), choices=["torch", "onnx"])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="인코딩 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dtype", default=os.getenv("EMBEDDING_CACHE_DTYPE", "float32"), choices=SUPPORTED_DTYPES)
+    parser.add_argument("--force", action="store_true", help="기존 캐시를 무시하고 모든 섹션을 다시 인코딩")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    manuals = [Path(path) for path in args.manuals] or sorted(data_dir.glob("*_structured.json"))
+    if not manuals:
+        print(f"❌ 매뉴얼 JSON이 없습니다: {data_dir}")
+        return
+
+    service = JSONSearchService(None, data_path=str(data_dir))
+    pool = SectionVectorPool(data_dir, args.model_name)
+    encoder = Encoder(args.model_name, args.backend, args.workers, args.batch_size)
+    print(f"🚀 임베딩 캐시 빌드: 매뉴얼 {len(manuals)}개, 재사용 가능한 섹션 {len(pool.rows)}개 ({args.model_name}, {args.backend})")
+
+    started = time.perf_counter()
+    total_encoded = 0
+    try:
+        for json_file in manuals:
+            stats = build_manual(json_file, data_dir, service, pool, encoder, args)
+            total_encoded += stats["encoded"]
+            if stats["skipped"]:
+                print(f"✅ {json_file.name}: 최신 캐시 ({stats['cache_name']})")
+            else:
+                print(f"✅ {json_file.name}: {stats['sections']}개 섹션 (재사용 {stats['reused']}, 인코딩 {stats['encoded']}) "
+                      f"{stats['seconds']:.2f}초 → {stats['cache_name']}.meta")
+    finally:
+        encoder.close()
+
+    print(f"🎉 완료: 인코딩 {total_encoded}개 섹션, {time.perf_counter() - started:.2f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import os
+import time
 import json
+import shutil
+import uuid
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
@@ -15,7 +20,14 @@ logger = logging.getLogger(__name__)
 # 🚀 간단한 모듈 import (임베딩 모델 제거)
 try:
     from services.simple_search import SimpleSearchService
+    from services.vectorized_search import VectorizedSearchService
+    from services.hybrid_search import HybridSearchService
+    from models.embeddings import create_embedding_model
     from services.answer_generator import AnswerGenerator
+    from services.answer_cache import answer_context_key, create_answer_cache
+    from services.context_packer import load_token_encoding
+    from services.manual_registry import ManualRegistry, ManualKey, DEFAULT_POWERTRAIN, POWERTRAIN_ALIASES, normalize_powertrain
+    from utils.cache import TTLCache, normalize_query
     logger.info("✅ 모든 모듈 임포트 성공")
 except ImportError as e:
     logger.error(f"❌ 모듈 임포트 실패: {e}")
@@ -28,7 +40,12 @@ load_dotenv()
 PORT = int(os.getenv("PORT", "8080"))
 HOST = os.getenv("HOST", "0.0.0.0")
 
-logger.info(f"🚀 서버 설정: {HOST}:{PORT}")
+# 검색 백엔드 (simple: 역색인 + 파이썬 루프, vectorized: 필드별 희소 행렬 곱,
+# hybrid: vectorized 상위 후보를 캐시된 섹션 임베딩으로 재순위 - HYBRID_CANDIDATES/HYBRID_*_WEIGHT)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "simple")
+SEARCH_CONTENT_SCORING = os.getenv("SEARCH_CONTENT_SCORING", "legacy")
+
+logger.info(f"🚀 서버 설정: {HOST}:{PORT} (검색 백엔드: {SEARCH_BACKEND})")
 
 # FastAPI 앱 초기화
 app = FastAPI(
@@ -51,6 +68,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 매뉴얼 로드 방식 (background: 시작 후 스레드 풀에서 모두 로드, lazy: 차량의 첫 요청 때 로드)
+MANUAL_LOAD_MODE = os.getenv("MANUAL_LOAD_MODE", "background")
+MANUAL_LOAD_WORKERS = int(os.getenv("MANUAL_LOAD_WORKERS", "4"))
+
+# 컴파일된 매뉴얼 스냅샷 디렉토리 (비우면 스냅샷 없이 매번 JSON 파싱)
+MANUAL_SNAPSHOT_DIR = os.getenv("MANUAL_SNAPSHOT_DIR", "./data/snapshots")
+
+# 로드된 매뉴얼 검색 서비스의 힙 메모리 예산 (MB, 0이면 제한 없음). 넘으면 오래 쓰지 않은 매뉴얼부터 내림
+MANUAL_MEMORY_BUDGET_MB = float(os.getenv("MANUAL_MEMORY_BUDGET_MB", "0"))
+
+# 업로드 파일을 디스크로 복사할 때의 청크 크기
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# 질의 결과 캐시 (차량 + 정규화된 질의 -> 답변/출처)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "600"))
+
+# 워커 간 공유되는 디스크 답변 캐시 (sqlite | none)
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "sqlite")
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "./data/cache/answers.sqlite3")
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "0"))
+
 # 프론트엔드와 백엔드 차량명 매핑
 VEHICLE_MAPPING = {
     "GRANDEUR": "그랜저",
@@ -74,28 +113,37 @@ SUPPORTED_VEHICLES = [
 FRONTEND_VEHICLES = list(VEHICLE_MAPPING.keys())
 
 # 전역 변수 (임베딩 모델 제거)
-vehicle_search_services = {}  # 차량별 검색 서비스
+manual_registry = None  # 매뉴얼 변형(차종, 파워트레인, 연식)별 검색 서비스 (ManualRegistry)
 answer_generator = None
+answer_cache = None
+embedding_model = None  # hybrid 검색 백엔드의 질의 임베딩 모델 (매뉴얼 서비스들이 공유)
+query_cache = TTLCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL)
 
 # 요청/응답 모델
 class Question(BaseModel):
     q: str
-    vehicle: Optional[str] = None
+    vehicle: Optional[str] = None  # 차종(KONA) 또는 /vehicles의 변형 id
+    powertrain: Optional[str] = None  # standard | hybrid | electric (없으면 기본 모델 우선)
+    year: Optional[int] = None  # 없으면 최신 연식
 
 class QuestionResponse(BaseModel):
     answer: str
     vehicle: str
+    variant: Optional[str] = None
     sources: List[Dict[str, Any]] = []
 
 class UploadResponse(BaseModel):
     message: str
     filename: str
     vehicle: str
-    sections_count: int
+    variant: str
+    job_id: str
+    status: str
 
 class VehicleListResponse(BaseModel):
     vehicles: List[str]
     available_vehicles: List[str]
+    variants: List[Dict[str, Any]] = []
 
 def map_vehicle_to_backend(frontend_vehicle: str) -> str:
     """프론트엔드 차량명을 백엔드 차량명으로 매핑"""
@@ -105,9 +153,17 @@ def map_vehicle_to_frontend(backend_vehicle: str) -> str:
     """백엔드 차량명을 프론트엔드 차량명으로 매핑"""
     return REVERSE_VEHICLE_MAPPING.get(backend_vehicle, backend_vehicle)
 
+def create_search_service():
+    """설정된 백엔드로 검색 서비스 생성"""
+    if SEARCH_BACKEND == "vectorized":
+        return VectorizedSearchService(content_scoring=SEARCH_CONTENT_SCORING)
+    if SEARCH_BACKEND == "hybrid":
+        return HybridSearchService(embedding_model, content_scoring=SEARCH_CONTENT_SCORING)
+    return SimpleSearchService()
+
 # 초기화 함수 (매우 간단)
 async def initialize_services():
-    global answer_generator
+    global answer_generator, answer_cache, embedding_model
     
     try:
         # 데이터 디렉토리 생성
@@ -119,6 +175,27 @@ async def initialize_services():
         answer_generator = AnswerGenerator()
         logger.info("✅ 답변 생성기 초기화 완료")
         
+        # 프롬프트 문맥 토큰 추정용 토크나이저는 첫 요청 전에 스레드에서 로드 (인코딩 파일을 내려받을 수 있음)
+        if await run_in_threadpool(load_token_encoding):
+            logger.info("✅ 문맥 토크나이저 로드 완료")
+        else:
+            logger.warning("⚠️ tiktoken 토크나이저를 쓸 수 없어 문맥 토큰 수를 근사 추정")
+        
+        try:
+            answer_cache = create_answer_cache(ANSWER_CACHE_BACKEND, ANSWER_CACHE_PATH, ANSWER_CACHE_TTL)
+            logger.info(f"✅ 답변 캐시 초기화 완료 ({ANSWER_CACHE_BACKEND})")
+        except Exception as e:
+            answer_cache = create_answer_cache("none")
+            logger.warning(f"⚠️ 답변 캐시 초기화 실패, 캐시 없이 실행: {e}")
+        
+        # hybrid 검색은 매뉴얼 로드 전에 질의 임베딩 모델을 한 번 로드 (실패하면 어휘 점수만으로 검색)
+        if SEARCH_BACKEND == "hybrid":
+            try:
+                embedding_model = create_embedding_model()
+                logger.info(f"✅ 질의 임베딩 모델 로드 완료 ({embedding_model.model_name})")
+            except Exception as e:
+                logger.warning(f"⚠️ 임베딩 모델 로드 실패, 어휘 점수만으로 검색: {e}")
+        
         # 기존 JSON 파일들 로드
         await load_existing_manuals()
         
@@ -129,36 +206,27 @@ async def initialize_services():
         return False
 
 async def load_existing_manuals():
-    """기존에 업로드된 JSON 파일들을 간단하게 로드"""
-    global vehicle_search_services
+    """기존에 업로드된 JSON 파일 목록을 등록 (파싱/색인 생성은 백그라운드 또는 첫 요청 때)"""
+    global manual_registry
+    
+    manual_registry = ManualRegistry(
+        create_search_service,
+        extract_vehicle_name,
+        max_workers=MANUAL_LOAD_WORKERS,
+        snapshot_dir=MANUAL_SNAPSHOT_DIR or None,
+        memory_budget_bytes=int(MANUAL_MEMORY_BUDGET_MB * 1024 * 1024)
+    )
     
     data_dir = Path("./data/processed")
     if not data_dir.exists():
         logger.warning(f"⚠️ 데이터 디렉토리가 존재하지 않음: {data_dir}")
         return
     
-    # JSON 파일들 로드
-    for json_file in data_dir.glob("*.json"):
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
-            # 차량명 추출
-            vehicle_name = extract_vehicle_name(json_file.stem)
-            
-            if vehicle_name and vehicle_name in SUPPORTED_VEHICLES:
-                # 🚀 간단한 검색 서비스 생성
-                search_service = SimpleSearchService()
-                search_service.add_document(json_data)
-                vehicle_search_services[vehicle_name] = search_service
-                
-                sections_count = len(json_data.get("sections", []))
-                logger.info(f"✅ {vehicle_name} 매뉴얼 로드 완료: {json_file.name} ({sections_count}개 섹션)")
-            else:
-                logger.warning(f"⚠️ 인식되지 않은 차량: {json_file.name}")
-        
-        except Exception as e:
-            logger.error(f"❌ {json_file} 로드 실패: {e}")
+    manuals_count = manual_registry.scan(data_dir, SUPPORTED_VEHICLES)
+    logger.info(f"📚 매뉴얼 {manuals_count}개 등록 (로드 방식: {MANUAL_LOAD_MODE})")
+    
+    if MANUAL_LOAD_MODE != "lazy":
+        manual_registry.preload()
 
 def extract_vehicle_name(filename: str) -> str:
     """파일명에서 차량명 추출 (간단 버전)"""
@@ -176,7 +244,7 @@ def extract_vehicle_name(filename: str) -> str:
             "아반떼": ["avante", "elantra"],
             "코나": ["kona"],
             "투싼": ["tucson"],
-            "펠리세이드": ["palisade"]
+            "펠리세이드": ["palisade", "팰리세이드"]
         }
         
         for eng_name in english_names.get(vehicle, []):
@@ -185,9 +253,9 @@ def extract_vehicle_name(filename: str) -> str:
     
     return None
 
-def generate_vehicle_filename(vehicle_name: str) -> str:
-    """차량명을 파일명으로 변환"""
-    return f"{vehicle_name.replace(' ', '_')}_manual.json"
+def generate_vehicle_filename(key: ManualKey) -> str:
+    """매뉴얼 변형을 파일명으로 변환 (다음 시작 때 같은 변형으로 인식되도록)"""
+    return f"{key.model.replace(' ', '_')}_{key.powertrain}_{key.year}_manual.json"
 
 # 앱 시작 이벤트
 @app.on_event("startup")
@@ -199,12 +267,34 @@ async def startup_event():
     else:
         logger.info("✅ 서비스 초기화 완료")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if answer_generator:
+        await answer_generator.aclose()
+    if embedding_model:
+        await embedding_model.aclose()
+    if manual_registry:
+        manual_registry.shutdown()
+
+def available_backend_vehicles() -> List[str]:
+    """검색 서비스가 등록된 차량 목록 (백엔드 기준)"""
+    return manual_registry.vehicles() if manual_registry else []
+
+def available_variants() -> List[Dict[str, Any]]:
+    """선택 가능한 매뉴얼 변형 목록 (vehicle은 프론트엔드 차량명)"""
+    if not manual_registry:
+        return []
+    return [
+        {**variant, "vehicle": map_vehicle_to_frontend(variant["model"])}
+        for variant in manual_registry.variants()
+    ]
+
 # API 엔드포인트들
 @app.get("/")
 def root():
     available_vehicles_frontend = [
         map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
+        for vehicle in available_backend_vehicles()
     ]
     
     return {
@@ -217,11 +307,13 @@ def root():
         },
         "supported_vehicles": FRONTEND_VEHICLES,
         "available_vehicles": available_vehicles_frontend,
-        "backend_vehicles": list(vehicle_search_services.keys()),
+        "backend_vehicles": available_backend_vehicles(),
         "endpoints": {
             "차량 목록": "GET /vehicles",
             "JSON 업로드": "POST /upload_json/{vehicle}",
+            "업로드 상태": "GET /upload_jobs/{job_id}",
             "질문하기": "POST /ask", 
+            "질문하기 (스트리밍)": "POST /ask/stream",
             "건강상태": "GET /health"
         }
     }
@@ -231,29 +323,36 @@ def get_vehicles():
     """지원하는 차량 목록과 사용 가능한 차량 목록 반환"""
     available_vehicles_frontend = [
         map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
+        for vehicle in available_backend_vehicles()
     ]
     
     return VehicleListResponse(
         vehicles=FRONTEND_VEHICLES,
-        available_vehicles=available_vehicles_frontend
+        available_vehicles=available_vehicles_frontend,
+        variants=available_variants()
     )
 
 @app.get("/health")
 def health_check():
     available_vehicles_frontend = [
         map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
+        for vehicle in available_backend_vehicles()
     ]
     
     return {
         "status": "healthy",
         "search_method": "keyword_matching",
+        "search_backend": SEARCH_BACKEND,
         "answer_generator_ready": answer_generator is not None,
         "supported_vehicles": len(FRONTEND_VEHICLES),
         "available_vehicles": len(available_vehicles_frontend),
         "loaded_manuals": available_vehicles_frontend,
-        "backend_vehicles": list(vehicle_search_services.keys()),
+        "backend_vehicles": available_backend_vehicles(),
+        "manual_load_mode": MANUAL_LOAD_MODE,
+        "manuals": manual_registry.get_status() if manual_registry else {},
+        "manual_memory": manual_registry.get_memory_stats() if manual_registry else None,
+        "query_cache": query_cache.get_stats(),
+        "answer_cache": answer_cache.get_stats() if answer_cache else None,
         "server_info": {
             "host": HOST,
             "port": PORT
@@ -261,62 +360,85 @@ def health_check():
     }
 
 # JSON 업로드 엔드포인트
-@app.post("/upload_json/{vehicle}", response_model=UploadResponse)
-async def upload_json(vehicle: str, file: UploadFile = File(...)):
-    """특정 차량의 JSON 파일 업로드 (간단 버전)"""
+@app.post("/upload_json/{vehicle}", response_model=UploadResponse, status_code=202)
+async def upload_json(vehicle: str, file: UploadFile = File(...), powertrain: str = DEFAULT_POWERTRAIN, year: Optional[int] = None):
+    """특정 차량(변형)의 JSON 파일 업로드 (연식을 생략하면 같은 변형의 최신 연식, 없으면 올해)
+    
+    업로드 파일은 디스크로 바로 복사하고 작업 id를 돌려준다. JSON 검증과 색인 생성은 스레드 풀에서 하며,
+    끝나면 해당 변형의 검색 서비스를 한 번에 교체한다 (그 전까지 질의는 기존 색인 사용).
+    진행 상태는 GET /upload_jobs/{job_id}로 확인한다.
+    """
     
     backend_vehicle = map_vehicle_to_backend(vehicle)
     
     if backend_vehicle not in SUPPORTED_VEHICLES:
         raise HTTPException(status_code=400, detail=f"지원하지 않는 차량입니다. 지원 차량: {FRONTEND_VEHICLES}")
     
+    # 파일명으로 저장되는 값이므로 재시작 후 parse_manual_key가 같은 변형으로 읽을 수 있는 이름만 허용
+    manual_powertrain = normalize_powertrain(powertrain)
+    if manual_powertrain is None:
+        supported = sorted({DEFAULT_POWERTRAIN, *POWERTRAIN_ALIASES.values()})
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 파워트레인입니다: {powertrain} (지원: {supported})")
+    
     if not file.filename.endswith('.json'):
         raise HTTPException(status_code=400, detail="JSON 파일만 업로드 가능합니다.")
     
+    if not manual_registry:
+        raise HTTPException(status_code=503, detail="매뉴얼 레지스트리가 초기화되지 않았습니다.")
+    
+    existing = manual_registry.resolve(backend_vehicle, manual_powertrain, year)
+    manual_key = existing or ManualKey(backend_vehicle, manual_powertrain, year or time.localtime().tm_year)
+    
+    filename = generate_vehicle_filename(manual_key)
+    save_path = Path("./data/processed") / filename
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # 본문을 메모리에 올리거나 다시 직렬화하지 않고 임시 파일로 복사 (*.json 목록에 잡히지 않는 이름)
+    upload_path = save_path.with_name(f".{filename}.{uuid.uuid4().hex}.upload")
     try:
-        # JSON 파일 읽기
-        content = await file.read()
-        json_data = json.loads(content.decode('utf-8'))
-        
-        # JSON 구조 검증
-        if not isinstance(json_data, dict) or "sections" not in json_data:
-            raise HTTPException(status_code=400, detail="올바른 JSON 구조가 아닙니다. 'sections' 필드가 필요합니다.")
-        
-        # 파일 저장
-        filename = generate_vehicle_filename(backend_vehicle)
-        save_path = Path("./data/processed") / filename
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
-        
-        # 🚀 간단한 검색 서비스 생성
-        search_service = SimpleSearchService()
-        search_service.add_document(json_data)
-        vehicle_search_services[backend_vehicle] = search_service
-        
-        sections_count = len(json_data.get("sections", []))
-        
-        logger.info(f"✅ {backend_vehicle} 매뉴얼 업로드 완료: {filename}")
-        logger.info(f"   📊 섹션 수: {sections_count}")
-        
-        return UploadResponse(
-            message=f"'{vehicle}' 매뉴얼 업로드 완료! (키워드 검색 방식)",
-            filename=filename,
-            vehicle=vehicle,
-            sections_count=sections_count
-        )
-        
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="잘못된 JSON 형식입니다.")
+        with open(upload_path, 'wb') as f:
+            await run_in_threadpool(shutil.copyfileobj, file.file, f, UPLOAD_CHUNK_BYTES)
     except Exception as e:
-        logger.error(f"❌ JSON 파일 처리 중 오류: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"JSON 파일 처리 중 오류: {str(e)}")
+        upload_path.unlink(missing_ok=True)
+        logger.error(f"❌ JSON 파일 저장 중 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"JSON 파일 저장 중 오류: {str(e)}")
+    
+    job = manual_registry.submit_build(manual_key, upload_path, save_path, on_ready=invalidate_manual_caches)
+    logger.info(f"📥 {manual_key.id} 매뉴얼 업로드 접수: {filename} (작업 {job.id})")
+    
+    return UploadResponse(
+        message=f"'{vehicle}' 매뉴얼 업로드 접수! 색인 생성이 끝나면 새 매뉴얼로 교체됩니다.",
+        filename=filename,
+        vehicle=vehicle,
+        variant=manual_key.id,
+        job_id=job.id,
+        status=job.status
+    )
+
+def invalidate_manual_caches(manual_key: ManualKey):
+    """교체된 매뉴얼의 캐시된 답변 제거 (업로드 작업 스레드에서 호출)"""
+    invalidated = query_cache.invalidate(manual_key.id)
+    if answer_cache:
+        invalidated += answer_cache.invalidate(manual_key.id)
+    logger.info(f"✅ {manual_key.id} 매뉴얼 교체 완료 (캐시 {invalidated}개 무효화)")
+
+@app.get("/upload_jobs/{job_id}")
+def get_upload_job(job_id: str):
+    """업로드 색인 생성 작업 상태 (queued | building | ready | failed | superseded)"""
+    job = manual_registry.get_job(job_id) if manual_registry else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="업로드 작업을 찾을 수 없습니다.")
+    return job
 
 # 질문 응답 엔드포인트
-@app.post("/ask", response_model=QuestionResponse)
-async def ask_question(item: Question):
-    """키워드 기반 질문 응답"""
+async def resolve_search_service(item: Question):
+    """질문의 차량(변형)에 해당하는 (변형 id, 검색 서비스, 캐시 세대, 매뉴얼 체크섬) 반환 (없으면 HTTPException)
+
+    변형 id는 질의/답변 캐시 키로도 쓰여 같은 차종의 변형끼리 캐시가 섞이지 않는다.
+    캐시 세대는 서비스를 받기 전에 읽으므로, 교체 전 서비스로 만든 답변은 교체 후 캐시에 저장되지 않는다.
+    매뉴얼 체크섬은 서비스를 만든 원본 JSON의 해시로, 워커 간 공유 답변 캐시 키에 매뉴얼 버전으로 들어간다
+    (다른 워커가 아직 이전 매뉴얼로 만든 답변은 새 매뉴얼의 키와 겹치지 않음).
+    """
     
     if not item.vehicle:
         raise HTTPException(status_code=400, detail="차량을 선택해주세요.")
@@ -325,55 +447,103 @@ async def ask_question(item: Question):
     
     logger.info(f"🔍 {item.vehicle} ({backend_vehicle}) 매뉴얼에서 키워드 검색 시작: '{item.q}'")
     
-    if backend_vehicle not in vehicle_search_services:
+    if not answer_generator or not manual_registry:
+        raise HTTPException(status_code=503, detail="답변 생성기가 초기화되지 않았습니다.")
+    
+    # 아직 로드되지 않은 매뉴얼이면 로드가 끝날 때까지 대기
+    manual_key = manual_registry.resolve(backend_vehicle, item.powertrain, item.year)
+    generation = query_cache.generation(manual_key.id) if manual_key else 0
+    try:
+        manual = await manual_registry.get_manual(manual_key) if manual_key else None
+    except RuntimeError as e:
+        logger.error(f"❌ {e}")
+        raise HTTPException(status_code=503, detail=f"'{item.vehicle}' 매뉴얼을 불러오지 못했습니다.")
+    
+    if manual is None:
         available_vehicles_frontend = [
             map_vehicle_to_frontend(vehicle) 
-            for vehicle in vehicle_search_services.keys()
+            for vehicle in available_backend_vehicles()
         ]
         raise HTTPException(
             status_code=404, 
             detail=f"'{item.vehicle}' 매뉴얼을 찾을 수 없습니다. 사용 가능한 차량: {available_vehicles_frontend}"
         )
     
-    if not answer_generator:
-        raise HTTPException(status_code=503, detail="답변 생성기가 초기화되지 않았습니다.")
+    search_service, manual_checksum = manual
+    return manual_key.id, search_service, generation, manual_checksum
+
+def is_current_manual(variant_id: str, generation: int) -> bool:
+    """요청이 받은 검색 서비스가 그 뒤에 교체되지 않았는지 (교체되면 캐시 세대가 바뀜)"""
+    return query_cache.generation(variant_id) == generation
+
+def build_sources(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """검색 결과로 응답용 소스 정보 구성"""
+    return [
+        {
+            "source": result["source"],
+            "section_title": result["title"],
+            "page_range": result["page_range"],
+            "score": result["score"],
+            "match_details": result["match_details"]
+        }
+        for result in results
+    ]
+
+@app.post("/ask", response_model=QuestionResponse)
+async def ask_question(item: Question):
+    """키워드 기반 질문 응답"""
+    
+    backend_vehicle, search_service, generation, manual_checksum = await resolve_search_service(item)
+    
+    # ⚡ 같은 차량의 같은 질문은 캐시된 답변 재사용
+    cache_key = (backend_vehicle, normalize_query(item.q))
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"⚡ {backend_vehicle} 캐시 적중: '{item.q}'")
+        return QuestionResponse(answer=cached["answer"], vehicle=item.vehicle, variant=backend_vehicle, sources=cached["sources"])
     
     try:
-        # 🚀 키워드 기반 검색
-        search_service = vehicle_search_services[backend_vehicle]
-        results = search_service.search_sections(item.q, k=3)
+        # 🚀 키워드 기반 검색 (스레드에서 실행, 질의 임베딩은 동시 요청과 묶어서 계산)
+        results = await search_service.search_sections_async(item.q, k=3)
         
         if not results:
+            answer = f"'{item.vehicle}' 매뉴얼에서 관련 정보를 찾을 수 없습니다."
+            query_cache.set(cache_key, {"answer": answer, "sources": []}, generation)
             return QuestionResponse(
-                answer=f"'{item.vehicle}' 매뉴얼에서 관련 정보를 찾을 수 없습니다.",
+                answer=answer,
                 vehicle=item.vehicle,
+                variant=backend_vehicle,
                 sources=[]
             )
         
         logger.info(f"📊 {backend_vehicle} 검색 결과: {len(results)}개 섹션 발견")
         
-        # 최고 점수 섹션으로 답변 생성
+        # 최고 점수 섹션으로 답변 생성 (프롬프트에는 상위 섹션들의 관련 문단을 토큰 예산만큼)
         best_section = results[0]
         
         logger.info(f"🤖 답변 생성 중 - 섹션: {best_section['title']}")
         
-        answer = await answer_generator.generate_answer(item.q, best_section)
+        # 💾 워커 간 공유 캐시에 같은 매뉴얼/상위 섹션/질문의 답변이 있으면 LLM 호출 생략 (SQLite 조회/저장은 스레드에서)
+        context_key = answer_context_key(manual_checksum, results)
+        answer = await run_in_threadpool(answer_cache.get, backend_vehicle, context_key, item.q) if answer_cache else None
+        if answer is None:
+            answer = await answer_generator.generate_answer(item.q, best_section, results)
+            if answer_cache and answer != AnswerGenerator.ERROR_ANSWER and is_current_manual(backend_vehicle, generation):
+                await run_in_threadpool(answer_cache.set, backend_vehicle, context_key, item.q, answer)
+        else:
+            logger.info(f"💾 {backend_vehicle} 디스크 답변 캐시 적중: {best_section['title']}")
         
         # 소스 정보 구성
-        sources = [
-            {
-                "source": result["source"],
-                "section_title": result["title"],
-                "page_range": result["page_range"],
-                "score": result["score"],
-                "match_details": result["match_details"]
-            }
-            for result in results
-        ]
+        sources = build_sources(results)
+        
+        # 답변 생성 실패 안내 문구는 캐시하지 않음
+        if answer != AnswerGenerator.ERROR_ANSWER:
+            query_cache.set(cache_key, {"answer": answer, "sources": sources}, generation)
         
         return QuestionResponse(
             answer=answer,
             vehicle=item.vehicle,
+            variant=backend_vehicle,
             sources=sources
         )
         
@@ -381,6 +551,81 @@ async def ask_question(item: Question):
         logger.error(f"❌ {backend_vehicle} 질문 처리 중 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"질문 처리 중 오류: {str(e)}")
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 형식의 이벤트 문자열"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(item: Question):
+    """질문 응답 스트리밍 (SSE)
+    
+    sources 이벤트로 검색 출처를 먼저 보내고, token 이벤트로 답변 조각을 생성되는 대로 보낸 뒤,
+    done 이벤트로 최종 답변 전문(친근한 표현/출처 안내 적용)을 보낸다.
+    """
+    
+    backend_vehicle, search_service, generation, manual_checksum = await resolve_search_service(item)
+    cache_key = (backend_vehicle, normalize_query(item.q))
+    cached = query_cache.get(cache_key)
+    
+    if cached is None:
+        try:
+            results = await search_service.search_sections_async(item.q, k=3)
+        except Exception as e:
+            logger.error(f"❌ {backend_vehicle} 질문 처리 중 오류: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"질문 처리 중 오류: {str(e)}")
+    
+    async def event_stream():
+        # ⚡ 캐시된 답변은 한 번에 전송
+        if cached is not None:
+            logger.info(f"⚡ {backend_vehicle} 캐시 적중: '{item.q}'")
+            yield sse_event("sources", {"vehicle": item.vehicle, "variant": backend_vehicle, "sources": cached["sources"]})
+            yield sse_event("token", {"text": cached["answer"]})
+            yield sse_event("done", {"answer": cached["answer"]})
+            return
+        
+        sources = build_sources(results)
+        yield sse_event("sources", {"vehicle": item.vehicle, "variant": backend_vehicle, "sources": sources})
+        
+        if not results:
+            answer = f"'{item.vehicle}' 매뉴얼에서 관련 정보를 찾을 수 없습니다."
+            query_cache.set(cache_key, {"answer": answer, "sources": []}, generation)
+            yield sse_event("token", {"text": answer})
+            yield sse_event("done", {"answer": answer})
+            return
+        
+        best_section = results[0]
+        context_key = answer_context_key(manual_checksum, results)
+        answer = await run_in_threadpool(answer_cache.get, backend_vehicle, context_key, item.q) if answer_cache else None
+        
+        if answer is not None:
+            logger.info(f"💾 {backend_vehicle} 디스크 답변 캐시 적중: {best_section['title']}")
+            yield sse_event("token", {"text": answer})
+        else:
+            logger.info(f"🤖 답변 스트리밍 중 - 섹션: {best_section['title']}")
+            try:
+                async for event, text in answer_generator.stream_answer(item.q, best_section, results):
+                    if event == "token":
+                        yield sse_event("token", {"text": text})
+                    else:
+                        answer = text
+            except Exception as e:
+                logger.error(f"❌ {backend_vehicle} 답변 스트리밍 중 오류: {str(e)}")
+                answer = AnswerGenerator.ERROR_ANSWER
+            
+            if answer_cache and answer != AnswerGenerator.ERROR_ANSWER and is_current_manual(backend_vehicle, generation):
+                await run_in_threadpool(answer_cache.set, backend_vehicle, context_key, item.q, answer)
+        
+        if answer != AnswerGenerator.ERROR_ANSWER:
+            query_cache.set(cache_key, {"answer": answer, "sources": sources}, generation)
+        
+        yield sse_event("done", {"answer": answer})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # 메인 실행 부분
 if __name__ == "__main__":
     import uvicorn
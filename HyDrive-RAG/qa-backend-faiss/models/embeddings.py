@@ -1,13 +1,29 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from typing import List
 import os
 
+from models.query_batcher import QueryBatcher
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
 class EmbeddingModel:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME,
+                 max_batch_size: int = None, max_wait_ms: float = None):
+        # PyTorch 스택은 이 백엔드를 쓸 때만 로드 (ONNX 백엔드는 임포트하지 않음)
+        from sentence_transformers import SentenceTransformer
+        
         self.model_name = model_name
         self.model = SentenceTransformer(model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
+        self._init_query_batcher(max_batch_size, max_wait_ms)
+    
+    def _init_query_batcher(self, max_batch_size: int = None, max_wait_ms: float = None):
+        # 비동기 질의 임베딩 마이크로 배칭 (최대 배치 크기, 첫 질의 후 최대 대기 시간)
+        self.query_batcher = QueryBatcher(
+            self.encode_texts,
+            max_batch_size=max_batch_size or int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32")),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+        )
     
     def encode_texts(self, texts: List[str]) -> np.ndarray:
         """텍스트 리스트를 벡터로 변환"""
@@ -15,4 +31,23 @@ class EmbeddingModel:
     
     def encode_query(self, query: str) -> np.ndarray:
         """단일 쿼리를 벡터로 변환"""
-        return self.model.encode([query], convert_to_numpy=True)
\ No newline at end of file
+        return self.encode_texts([query])
+    
+    async def encode_query_async(self, query: str) -> np.ndarray:
+        """단일 쿼리를 벡터로 변환 (동시에 들어온 쿼리와 묶어 스레드풀에서 한 번에 인코딩)"""
+        return await self.query_batcher.encode(query)
+    
+    async def aclose(self):
+        """질의 배처의 배치 작업과 인코딩 스레드 정리 (앱 종료 시)"""
+        await self.query_batcher.close()
+
+
+def create_embedding_model(model_name: str = DEFAULT_MODEL_NAME, backend: str = None, **kwargs) -> EmbeddingModel:
+    """EMBEDDING_BACKEND(torch | onnx)에 맞는 임베딩 모델 생성 (두 백엔드의 API는 같음)"""
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+    if backend == "onnx":
+        from models.onnx_embeddings import ONNXEmbeddingModel
+        return ONNXEmbeddingModel(model_name, **kwargs)
+    if backend != "torch":
+        raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend}")
+    return EmbeddingModel(model_name, **kwargs)
@@ -0,0 +1,163 @@
+"""ONNX Runtime 임베딩 백엔드
+
+sentence-transformers 모델(Transformer + mean pooling + Normalize)을 한 번 ONNX로 내보내고
+동적 int8 양자화한 뒤, 서버에서는 onnxruntime + tokenizers만으로 EmbeddingModel과 같은 API로 임베딩한다.
+내보내기에만 torch/transformers/sentence-transformers가 필요하다.
+
+내보내기 (qa-backend-faiss 디렉토리에서, 로컬 1회):
+    python -m models.onnx_embeddings [--model-name sentence-transformers/all-MiniLM-L6-v2] [--output-dir ...]
+"""
+import argparse
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from models.embeddings import DEFAULT_MODEL_NAME, EmbeddingModel
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+
+
+def default_model_dir(model_name: str) -> Path:
+    """내보낸 모델 디렉토리 (EMBEDDING_ONNX_DIR가 없으면 ./data/models/{모델 이름})"""
+    return Path(os.getenv("EMBEDDING_ONNX_DIR", "./data/models")) / model_name.replace("/", "__")
+
+
+class ONNXEmbeddingModel(EmbeddingModel):
+    """ONNX Runtime(CPU)으로 실행하는 임베딩 모델 (encode_texts/encode_query/encode_query_async는 EmbeddingModel과 같음)"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, model_dir: str = None, quantized: bool = None,
+                 num_threads: int = None, max_batch_size: int = None, max_wait_ms: float = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.model_dir = Path(model_dir) if model_dir else default_model_dir(model_name)
+        if quantized is None:
+            quantized = os.getenv("EMBEDDING_ONNX_QUANTIZED", "true").lower() == "true"
+        model_path = self.model_dir / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX 모델이 없습니다: {model_path} (python -m models.onnx_embeddings로 내보내기)")
+
+        config = json.loads((self.model_dir / CONFIG_FILE).read_text(encoding="utf-8"))
+        if config["model_name"] != model_name:
+            raise ValueError(f"내보낸 모델({config['model_name']})이 요청한 모델({model_name})과 다릅니다.")
+        self.dimension = config["dimension"]
+        self.normalize = config["normalize"]
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+
+        self._init_query_batcher(max_batch_size, max_wait_ms)
+
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """텍스트 리스트를 벡터로 변환 (토큰 임베딩 mean pooling, 원본 모델에 Normalize가 있으면 L2 정규화)"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(texts))
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": attention_mask
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+def export_onnx_model(model_name: str = DEFAULT_MODEL_NAME, output_dir: str = None, quantize: bool = True,
+                      opset: int = 14) -> Path:
+    """sentence-transformers 모델을 ONNX(+동적 int8 양자화)로 내보내기 (torch/transformers 필요)"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    output_dir = Path(output_dir) if output_dir else default_model_dir(model_name)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling = next((module for module in model if isinstance(module, Pooling)), None)
+    pooling_mode = None
+    if pooling is not None:
+        pooling_mode = pooling.get_pooling_mode_str() if hasattr(pooling, "get_pooling_mode_str") else pooling.pooling_mode
+    if pooling_mode != "mean":
+        raise ValueError(f"mean pooling 모델만 지원합니다: {model_name}")
+
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    sample = tokenizer(["엔진오일 교체 방법", "타이어 공기압"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        """ONNX 그래프 출력: 마지막 은닉 상태 (pooling/정규화는 numpy에서)"""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    # 최신 torch의 dynamo 내보내기 대신 dynamic_axes를 쓰는 TorchScript 내보내기 사용
+    export_options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    model_path = output_dir / MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]},
+            opset_version=opset,
+            **export_options
+        )
+    if quantize:
+        quantize_dynamic(str(model_path), str(output_dir / QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(str(output_dir / TOKENIZER_FILE))
+    (output_dir / CONFIG_FILE).write_text(json.dumps({
+        "model_name": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--no-quantize", action="store_true", help="int8 양자화 모델은 만들지 않음")
+    args = parser.parse_args()
+
+    output_dir = export_onnx_model(args.model_name, args.output_dir, quantize=not args.no_quantize)
+    print(f"✅ ONNX 임베딩 모델 내보내기 완료: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
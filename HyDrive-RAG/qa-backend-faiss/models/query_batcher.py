@@ -0,0 +1,118 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class QueryBatcher:
+    """동시에 들어온 질의를 잠깐 모아 한 번에 임베딩하는 비동기 마이크로 배처
+
+    첫 질의가 들어오면 max_wait_ms 동안(또는 max_batch_size개가 찰 때까지) 뒤이은 질의를 모아
+    encode_batch를 배처 전용 스레드에서 한 번 호출하고, 결과 행을 각 질의의 future로 나눠 준다.
+    인코딩 중에 들어온 질의는 큐에 쌓였다가 다음 배치가 되므로, 부하가 클수록 배치가 커진다.
+    앱 종료 시 close()로 배치 작업과 스레드를 정리한다.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], np.ndarray], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch: List[Tuple[str, asyncio.Future]] = []  # 모으는 중이거나 인코딩 중인 배치
+
+        # 통계 (배치 수, 인코딩한 질의 수)
+        self.batches = 0
+        self.queries = 0
+
+    async def encode(self, query: str) -> np.ndarray:
+        """질의 하나의 임베딩 (1, 차원) - 같은 시점의 다른 질의와 한 배치로 계산"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            if self._executor is None:
+                # 배치는 하나씩 인코딩하므로 스레드 하나면 충분
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-batcher")
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        self._queue.put_nowait((query, future))
+        return await future
+
+    async def close(self):
+        """배치 작업과 인코딩 스레드 중지 (모으는 중이거나 인코딩 중인 질의, 큐에 남은 질의는 RuntimeError로 실패)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = self._batch
+        self._batch = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("질의 배처가 종료되었습니다."))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self):
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = batch = [await self._queue.get()]
+            await self._collect(batch, loop.time() + self.max_wait)
+
+            # 기다리는 동안 요청이 취소된 질의는 제외
+            self._batch = batch = [(query, future) for query, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                embeddings = await loop.run_in_executor(self._executor, self.encode_batch, [query for query, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            for row, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(embeddings[row:row + 1])
+            self._batch = []
+
+    async def _collect(self, batch: List[Tuple[str, asyncio.Future]], deadline: float):
+        """마감 시각까지 큐의 질의를 batch에 추가 (max_batch_size가 차면 바로 반환)"""
+        loop = asyncio.get_running_loop()
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return
@@ -2,14 +2,56 @@ import faiss
 import numpy as np
 import pickle
 import os
-from typing import List, Tuple, Dict, Any
+import json
+import struct
+import threading
+import zlib
+from typing import List, Tuple, Dict, Any, Optional
 from pathlib import Path
 
+# 추가 로그 레코드: 매직(4) + 첫 벡터 id(8) + 벡터 수(4) + 메타데이터 길이(4) + CRC32(4), 이어서 float32 벡터 + 메타데이터 pickle
+LOG_MAGIC = b"HDWL"
+_LOG_RECORD = struct.Struct("<4sQIII")
+
+# 범위 검색에 쓰는 메타데이터 열 (차량 이름, 매뉴얼 변형 id)
+PARTITION_FIELDS = ("vehicle", "variant")
+
 class FAISSVectorStore:
-    def __init__(self, dimension: int, store_path: str = "./data/vectors/"):
+    """FAISS 인덱스 + 메타데이터 저장소
+    
+    디스크에는 MANIFEST가 가리키는 스냅샷(faiss.{세대}.index, metadata.{세대}.pkl)과
+    그 뒤에 추가된 배치를 이어 쓰는 추가 로그(vectors.log)를 둔다.
+    add_vectors는 배치만 로그에 덧붙이므로 저장 비용이 배치 크기에 비례하고,
+    로그가 compact_log_bytes를 넘으면 백그라운드에서 새 스냅샷을 쓰고 MANIFEST를 원자적으로 교체(compaction)한다.
+    로드 시에는 스냅샷 뒤의 로그 레코드를 다시 적용하며, 중간에 끊긴 마지막 레코드는 잘라낸다.
+    
+    index_factory로 FAISS 인덱스 종류를 고를 수 있다 ("Flat", "IVF256,Flat", "HNSW32", "IVF256,PQ48" 등).
+    학습이 필요한 인덱스(IVF/PQ)는 벡터가 학습에 충분히(min_train_vectors) 모일 때까지 Flat으로 두었다가
+    모인 벡터로 학습해 교체한다. nprobe(IVF)와 ef_search(HNSW)로 정확도/속도를 조절한다.
+    
+    메타데이터의 vehicle/variant 값별로 벡터 id 구간(파티션)을 기억해 두고, 검색에 vehicle/variant를 주면
+    FAISS ID 선택자로 해당 매뉴얼 벡터만 비교한다. 근사 인덱스가 범위 안 결과를 k개 채우지 못하면
+    범위 안 벡터 전체를 다시 훑어 범위 안의 결과를 정확히 min(k, 범위 크기)개 돌려준다.
+    """
+    
+    def __init__(self, dimension: int, store_path: str = "./data/vectors/",
+                 compact_log_bytes: int = 32 * 1024 * 1024, background_compaction: bool = True, fsync: bool = True,
+                 index_factory: str = "Flat", nprobe: int = 16, ef_search: int = 64,
+                 min_train_vectors: Optional[int] = None):
         self.dimension = dimension
         self.store_path = Path(store_path)
         self.store_path.mkdir(parents=True, exist_ok=True)
+        self.compact_log_bytes = compact_log_bytes
+        self.background_compaction = background_compaction
+        self.fsync = fsync
+        
+        # 인덱스 종류 (index_factory: 목표, active_factory: 현재 인덱스)와 검색 파라미터
+        self.index_factory = index_factory
+        self.active_factory = "Flat"
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.min_train_vectors = min_train_vectors if min_train_vectors is not None else \
+            self._train_threshold(self._create_index(index_factory))
         
         # FAISS 인덱스 초기화 (내적 유사도 사용)
         self.index = faiss.IndexFlatIP(dimension)
@@ -17,64 +59,457 @@ class FAISSVectorStore:
         # 메타데이터 저장용
         self.metadata: List[Dict[str, Any]] = []
         
+        # 파티션 열: 필드 → 값 → 벡터 id 구간 [시작, 끝) 목록 (연속된 id는 한 구간으로 합침)
+        self._partitions: Dict[str, Dict[Any, List[List[int]]]] = {field: {} for field in PARTITION_FIELDS}
+        
+        # 스냅샷 세대와 추가 로그 상태
+        self.generation = 0
+        self._log_path = self.store_path / "vectors.log"
+        self._manifest_path = self.store_path / "MANIFEST"
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        
         # 저장된 인덱스가 있으면 로드
         self.load_index()
+        self._apply_search_params()
+        if self._needs_rebuild():
+            self.rebuild_index()
     
     def add_vectors(self, vectors: np.ndarray, metadata: List[Dict[str, Any]]):
-        """벡터와 메타데이터 추가"""
+        """벡터와 메타데이터 추가 (배치를 추가 로그에 기록)"""
+        if len(vectors) != len(metadata):
+            raise ValueError(f"벡터 수({len(vectors)})와 메타데이터 수({len(metadata)})가 다릅니다.")
+        
         # L2 정규화 (코사인 유사도를 위해)
         vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
         
-        self.index.add(vectors.astype('float32'))
-        self.metadata.extend(metadata)
+        with self._lock:
+            # 로그에 먼저 쓰고 메모리에 반영 (로그 기록이 실패하면 인덱스도 바뀌지 않음)
+            start_id = self.index.ntotal
+            self._append_log(start_id, vectors, metadata)
+            self.index.add(vectors)
+            self.metadata.extend(metadata)
+            self._extend_partitions(start_id, metadata)
+            log_bytes = self._log_path.stat().st_size
         
-        # 자동 저장
-        self.save_index()
+        # 학습용 벡터가 충분히 모이면 목표 인덱스로 교체 (교체 후 스냅샷을 쓰므로 compaction은 생략)
+        if self._needs_rebuild():
+            self._rebuild_if_idle()
+        elif log_bytes >= self.compact_log_bytes:
+            if self.background_compaction:
+                self._start_background_compaction()
+            else:
+                self.compact()
+    
+    def search(self, query_vector: np.ndarray, k: int = 5, vehicle: Optional[str] = None,
+               variant: Optional[str] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """유사도 검색 (vehicle/variant를 주면 해당 매뉴얼 벡터 안에서만)"""
+        return self.search_batch(query_vector, k, vehicle=vehicle, variant=variant)[0]
     
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
-        """유사도 검색"""
-        if self.index.ntotal == 0:
-            return []
+    def search_batch(self, query_vectors: np.ndarray, k: int = 5, vehicle: Optional[str] = None,
+                     variant: Optional[str] = None) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """여러 질의를 한 번의 FAISS 호출로 검색 (질의별 (점수, 메타데이터) 목록)"""
+        query_vectors = np.atleast_2d(query_vectors)
+        runs = self._scope_runs(vehicle, variant)
+        if self.index.ntotal == 0 or runs == []:
+            return [[] for _ in range(len(query_vectors))]
         
         # L2 정규화
-        query_vector = query_vector / np.linalg.norm(query_vector, axis=1, keepdims=True)
+        query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        query_vectors = np.ascontiguousarray(query_vectors, dtype='float32')
         
-        scores, indices = self.index.search(query_vector.astype('float32'), k)
+        index = self.index
+        if runs is None:
+            scores, indices = index.search(query_vectors, k)
+        else:
+            scores, indices = self._search_scope(index, query_vectors, k, runs)
         
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx != -1:  # 유효한 인덱스인 경우
-                results.append((float(score), self.metadata[idx]))
+        for row_scores, row_indices in zip(scores, indices):
+            # 유효한 인덱스인 경우만 (-1은 결과 부족)
+            results.append([
+                (float(score), self.metadata[idx])
+                for score, idx in zip(row_scores, row_indices)
+                if idx != -1
+            ])
         
         return results
     
+    def partition_values(self, field: str = "vehicle") -> List[Any]:
+        """파티션 열의 값 목록 (저장된 차량/변형)"""
+        return list(self._partitions[field])
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """검색 파라미터 변경 (IVF nprobe: 살펴볼 클러스터 수, HNSW efSearch: 탐색 후보 수)"""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        self._apply_search_params()
+    
+    def rebuild_index(self, index_factory: Optional[str] = None):
+        """저장된 벡터로 index_factory 인덱스를 학습/생성해 교체하고 새 스냅샷 저장
+        
+        학습과 벡터 추가는 잠금 밖에서 벡터 사본으로 하므로 그동안에도 추가/검색은 기존 인덱스로 계속되고,
+        교체할 때 학습 중에 추가된 벡터를 새 인덱스에 마저 넣는다.
+        기존 벡터는 현재 인덱스에서 복원하므로, PQ 인덱스에서 다시 만들면 근사값으로 학습된다.
+        """
+        with self._rebuild_lock:
+            self._rebuild(index_factory or self.index_factory)
+    
+    def _rebuild_if_idle(self):
+        """목표 인덱스로 교체 (다른 스레드가 이미 교체 중이면 기다리지 않음, 그동안 추가된 벡터는 그 교체에 반영됨)"""
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            if self._needs_rebuild():
+                self._rebuild(self.index_factory)
+        finally:
+            self._rebuild_lock.release()
+    
+    def _rebuild(self, factory: str):
+        """rebuild_index 본체 (self._rebuild_lock 안에서 호출)"""
+        with self._lock:
+            vectors = self._vectors(0, self.index.ntotal)
+        
+        index = self._create_index(factory)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        del vectors
+        
+        with self._lock:
+            # 학습하는 동안 추가된 배치 반영 (벡터 id는 추가 순서 그대로)
+            if self.index.ntotal > index.ntotal:
+                index.add(self._vectors(index.ntotal, self.index.ntotal))
+            
+            self.index = index
+            self.index_factory = factory
+            self.active_factory = factory
+            self._apply_search_params()
+        
+        print(f"🔧 벡터 인덱스 교체: {factory} ({index.ntotal}개 벡터)")
+        self.compact()
+    
     def save_index(self):
-        """인덱스와 메타데이터 저장"""
-        index_path = self.store_path / "faiss.index"
-        metadata_path = self.store_path / "metadata.pkl"
+        """인덱스와 메타데이터 전체를 새 스냅샷으로 저장 (compact와 같음)"""
+        self.compact()
+    
+    def compact(self):
+        """현재 인덱스를 새 세대 스냅샷으로 쓰고 MANIFEST 교체 후, 스냅샷에 포함된 로그 레코드 제거
         
-        faiss.write_index(self.index, str(index_path))
+        스냅샷 파일을 다 쓴 뒤 MANIFEST를 rename으로 교체하므로, 어느 단계에서 중단되어도
+        이전 스냅샷 + 로그 또는 새 스냅샷 + 로그 중 하나로 복구된다.
+        """
+        with self._compact_lock:
+            # 인덱스 직렬화와 메타데이터 복사만 잠금 안에서 (추가 작업은 그동안만 대기)
+            # 이 시점까지의 로그 레코드는 모두 스냅샷에 포함됨 (추가는 같은 잠금 안에서 로그와 인덱스를 함께 갱신)
+            with self._lock:
+                index_bytes = faiss.serialize_index(self.index)
+                metadata = list(self.metadata)
+                count = self.index.ntotal
+                active_factory = self.active_factory
+                generation = self.generation + 1
+                log_offset = self._log_path.stat().st_size if self._log_path.exists() else 0
+            
+            index_path, metadata_path = self._snapshot_paths(generation)
+            self._write_atomic(index_path, index_bytes.tobytes())
+            self._write_atomic(metadata_path, pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL))
+            self._write_atomic(self._manifest_path, json.dumps({
+                "generation": generation,
+                "count": count,
+                "dimension": self.dimension,
+                "index_factory": active_factory
+            }).encode("utf-8"))
+            
+            # 스냅샷 이후에 추가된 레코드만 남긴 새 로그로 교체
+            with self._lock:
+                self._truncate_log_head(log_offset)
+                previous = self.generation
+                self.generation = generation
+            
+            for path in self._snapshot_paths(previous) + self._legacy_paths():
+                if path.exists():
+                    path.unlink()
         
-        with open(metadata_path, 'wb') as f:
-            pickle.dump(self.metadata, f)
+        print(f"💾 벡터 저장소 compaction 완료: 세대 {generation}, {count}개 벡터")
+    
+    def close(self):
+        """진행 중인 백그라운드 compaction 대기"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
     
     def load_index(self):
-        """저장된 인덱스와 메타데이터 로드"""
-        index_path = self.store_path / "faiss.index"
-        metadata_path = self.store_path / "metadata.pkl"
+        """저장된 스냅샷과 추가 로그 로드"""
+        if self._manifest_path.exists():
+            manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            self.generation = manifest["generation"]
+            self.active_factory = manifest.get("index_factory", "Flat")
+            index_path, metadata_path = self._snapshot_paths(self.generation)
+        else:
+            # MANIFEST 이전 형식 (faiss.index + metadata.pkl)
+            index_path, metadata_path = self._legacy_paths()
         
         if index_path.exists() and metadata_path.exists():
             self.index = faiss.read_index(str(index_path))
             
             with open(metadata_path, 'rb') as f:
                 self.metadata = pickle.load(f)
-            
-            print(f"✅ 기존 인덱스 로드 완료: {self.index.ntotal}개 벡터")
+        
+        replayed = self._replay_log()
+        self._partitions = {field: {} for field in PARTITION_FIELDS}
+        self._extend_partitions(0, self.metadata)
+        if self.index.ntotal or replayed:
+            print(f"✅ 기존 인덱스 로드 완료: {self.index.ntotal}개 벡터 (로그에서 {replayed}개 복구)")
     
     def get_stats(self) -> Dict[str, Any]:
         """인덱스 통계 정보"""
         return {
             "total_vectors": self.index.ntotal,
             "dimension": self.dimension,
-            "metadata_count": len(self.metadata)
-        }
\ No newline at end of file
+            "metadata_count": len(self.metadata),
+            "generation": self.generation,
+            "index_factory": self.active_factory,
+            "target_index_factory": self.index_factory,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "partitions": {field: len(values) for field, values in self._partitions.items()},
+            "log_bytes": self._log_path.stat().st_size if self._log_path.exists() else 0
+        }
+    
+    def _create_index(self, factory: str):
+        if factory == "Flat":
+            return faiss.IndexFlatIP(self.dimension)
+        index = faiss.index_factory(self.dimension, factory, faiss.METRIC_INNER_PRODUCT)
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf = faiss.downcast_index(ivf)
+            if hasattr(ivf, "do_polysemous_training"):
+                # 해밍 거리 필터 검색은 쓰지 않으므로 오래 걸리는 polysemous 학습은 생략
+                ivf.do_polysemous_training = False
+        return index
+    
+    @staticmethod
+    def _train_threshold(index) -> int:
+        """학습에 필요한 최소 벡터 수 (k-means 중심당 39개: IVF는 nlist개, PQ/OPQ 코드북은 ksub개)
+
+        IVFPQ, PQ, HNSW의 PQ 저장소, OPQ 변환처럼 하위 인덱스/변환에 있는 코드북까지 모두 보고 가장 큰 값을 쓴다.
+        """
+        if index.is_trained:
+            return 0
+        
+        needed = 256  # 알 수 없는 학습형 인덱스의 기본값
+        pending = [index]
+        while pending:
+            sub = faiss.downcast_index(pending.pop())
+            if isinstance(sub, faiss.IndexIVF):
+                needed = max(needed, 39 * sub.nlist)
+            pq = getattr(sub, "pq", None)
+            if pq is not None:
+                needed = max(needed, 39 * pq.ksub)
+            if isinstance(sub, faiss.IndexPreTransform):
+                for i in range(sub.chain.size()):
+                    transform = faiss.downcast_VectorTransform(sub.chain.at(i))
+                    if isinstance(transform, faiss.OPQMatrix):
+                        needed = max(needed, 39 * 256)  # OPQ는 8비트 PQ 코드북으로 회전을 학습
+            for name in ("index", "storage"):
+                child = getattr(sub, name, None)
+                if isinstance(child, faiss.Index):
+                    pending.append(child)
+        return needed
+    
+    def _needs_rebuild(self) -> bool:
+        return self.active_factory != self.index_factory and self.index.ntotal >= max(self.min_train_vectors, 1)
+    
+    def _apply_search_params(self):
+        """현재 인덱스에 해당하는 검색 파라미터만 적용"""
+        parameter_space = faiss.ParameterSpace()
+        for name, value in (("nprobe", self.nprobe), ("efSearch", self.ef_search)):
+            try:
+                parameter_space.set_index_parameter(self.index, name, value)
+            except RuntimeError:
+                pass  # 이 인덱스에는 없는 파라미터
+    
+    def _vectors(self, start: int, end: int) -> np.ndarray:
+        """인덱스의 [start, end) 벡터 복원 (IVF는 직접 조회 맵을 만든 뒤 복원, self._lock 안에서 호출)"""
+        if end <= start:
+            return np.zeros((0, self.dimension), dtype='float32')
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.make_direct_map()
+        return self.index.reconstruct_n(start, end - start)
+    
+    def _extend_partitions(self, start_id: int, metadata: List[Dict[str, Any]]):
+        """start_id부터 추가된 메타데이터의 파티션 값을 id 구간에 반영 (self._lock 안에서 호출)"""
+        for field, runs_by_value in self._partitions.items():
+            for offset, item in enumerate(metadata):
+                value = item.get(field)
+                if value is None:
+                    continue
+                vector_id = start_id + offset
+                runs = runs_by_value.setdefault(value, [])
+                if runs and runs[-1][1] == vector_id:
+                    runs[-1][1] = vector_id + 1
+                else:
+                    runs.append([vector_id, vector_id + 1])
+    
+    def _scope_runs(self, vehicle: Optional[str], variant: Optional[str]) -> Optional[List[Tuple[int, int]]]:
+        """검색 범위의 id 구간 목록 (필터가 없으면 None, 해당 벡터가 없으면 빈 목록)"""
+        runs = None
+        for field, value in (("vehicle", vehicle), ("variant", variant)):
+            if value is None:
+                continue
+            field_runs = [tuple(run) for run in self._partitions[field].get(value, [])]
+            runs = field_runs if runs is None else _intersect_runs(runs, field_runs)
+        return runs
+    
+    def _search_scope(self, index, query_vectors: np.ndarray, k: int, runs: List[Tuple[int, int]]):
+        """id 구간 안의 벡터만 검색
+        
+        구간이 하나면 IDSelectorRange, 여러 개면 IDSelectorBatch로 범위 밖 벡터는 거리 계산을 건너뛴다.
+        IVF(nprobe)나 HNSW(efSearch)가 범위 안 결과를 다 채우지 못한 질의는 범위 전체를 정확히 다시 검색한다.
+        """
+        if len(runs) == 1:
+            selector = faiss.IDSelectorRange(runs[0][0], runs[0][1])
+        else:
+            selector = faiss.IDSelectorBatch(np.concatenate([np.arange(start, end, dtype='int64') for start, end in runs]))
+        
+        scores, indices = index.search(query_vectors, k, params=self._selector_params(index, selector))
+        
+        expected = min(k, sum(end - start for start, end in runs))
+        short = np.flatnonzero((indices != -1).sum(axis=1) < expected)
+        if len(short):
+            exact_index, exact_params = self._exhaustive_search(index, selector)
+            scores[short], indices[short] = exact_index.search(query_vectors[short], k, params=exact_params)
+        return scores, indices
+    
+    def _selector_params(self, index, selector):
+        """현재 검색 파라미터(nprobe/efSearch)에 ID 선택자를 더한 SearchParameters"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
+    
+    @staticmethod
+    def _exhaustive_search(index, selector):
+        """선택된 벡터를 빠짐없이 비교하는 (인덱스, 파라미터) (IVF는 모든 리스트, HNSW는 저장된 원본 벡터)"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            return index, faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nlist)
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.downcast_index(index.storage), faiss.SearchParameters(sel=selector)
+        return index, faiss.SearchParameters(sel=selector)
+    
+    def _snapshot_paths(self, generation: int) -> List[Path]:
+        return [self.store_path / f"faiss.{generation}.index", self.store_path / f"metadata.{generation}.pkl"]
+    
+    def _legacy_paths(self) -> List[Path]:
+        return [self.store_path / "faiss.index", self.store_path / "metadata.pkl"]
+    
+    def _write_atomic(self, path: Path, data: bytes):
+        """임시 파일에 쓰고 fsync 후 rename (중단되어도 이전 파일 유지)"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _encode_record(self, start_id: int, vectors: np.ndarray, metadata: List[Dict[str, Any]]) -> bytes:
+        metadata_bytes = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+        payload = vectors.tobytes() + metadata_bytes
+        return _LOG_RECORD.pack(LOG_MAGIC, start_id, len(vectors), len(metadata_bytes), zlib.crc32(payload)) + payload
+    
+    def _append_log(self, start_id: int, vectors: np.ndarray, metadata: List[Dict[str, Any]]):
+        """배치 하나를 로그 끝에 추가 (self._lock 안에서 호출)"""
+        with open(self._log_path, 'ab') as f:
+            f.write(self._encode_record(start_id, vectors, metadata))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+    
+    def _read_log(self):
+        """로그 레코드 순회: (레코드 끝 위치, 첫 벡터 id, 벡터, 메타데이터), 손상/잘린 레코드에서 멈춤"""
+        if not self._log_path.exists():
+            return
+        
+        vector_bytes = self.dimension * 4
+        with open(self._log_path, 'rb') as f:
+            offset = 0
+            while True:
+                header = f.read(_LOG_RECORD.size)
+                if len(header) < _LOG_RECORD.size:
+                    return
+                magic, start_id, count, metadata_length, crc = _LOG_RECORD.unpack(header)
+                if magic != LOG_MAGIC:
+                    return
+                payload = f.read(count * vector_bytes + metadata_length)
+                if len(payload) < count * vector_bytes + metadata_length or zlib.crc32(payload) != crc:
+                    return
+                
+                offset += _LOG_RECORD.size + len(payload)
+                vectors = np.frombuffer(payload, dtype='float32', count=count * self.dimension).reshape(count, self.dimension)
+                yield offset, start_id, vectors, pickle.loads(payload[count * vector_bytes:])
+    
+    def _replay_log(self) -> int:
+        """스냅샷 이후의 로그 레코드를 인덱스에 적용하고, 쓰다 끊긴 끝부분은 잘라냄"""
+        replayed = 0
+        valid_end = 0
+        for offset, start_id, vectors, metadata in self._read_log():
+            if start_id + len(vectors) <= self.index.ntotal:
+                valid_end = offset  # 이미 스냅샷에 포함된 배치
+                continue
+            if start_id != self.index.ntotal:
+                # 스냅샷과 로그가 맞지 않으면 로그를 지우지 않고 그대로 둠
+                print(f"⚠️ 벡터 로그가 스냅샷과 이어지지 않습니다 (기대 id {self.index.ntotal}, 레코드 id {start_id})")
+                return replayed
+            self.index.add(vectors)
+            self.metadata.extend(metadata)
+            replayed += len(vectors)
+            valid_end = offset
+        
+        if self._log_path.exists() and self._log_path.stat().st_size > valid_end:
+            print(f"⚠️ 벡터 로그 끝의 불완전한 레코드 제거 ({self._log_path.stat().st_size - valid_end} bytes)")
+            with open(self._log_path, 'r+b') as f:
+                f.truncate(valid_end)
+        return replayed
+    
+    def _truncate_log_head(self, offset: int):
+        """로그에서 offset 이후(스냅샷에 포함되지 않은 레코드)만 남김 (self._lock 안에서 호출)"""
+        tail = b""
+        if self._log_path.exists():
+            with open(self._log_path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+        self._write_atomic(self._log_path, tail)
+    
+    def _start_background_compaction(self):
+        """실행 중인 compaction이 없으면 백그라운드 스레드에서 시작"""
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, name="vector-store-compaction", daemon=True)
+            self._compaction_thread.start()
+
+
+def _intersect_runs(left: List[Tuple[int, int]], right: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """정렬된 두 id 구간 목록의 교집합"""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start < end:
+            result.append((start, end))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
@@ -0,0 +1,159 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.cache import normalize_query
+
+
+def question_hash(question: str) -> str:
+    """정규화된 질문의 해시 (캐시 키용)"""
+    return hashlib.sha256(normalize_query(question).encode('utf-8')).hexdigest()
+
+
+def answer_context_key(manual_checksum: str, sections: List[Dict[str, Any]]) -> str:
+    """답변 문맥 키: 원본 매뉴얼 JSON 체크섬 + 프롬프트에 들어가는 상위 섹션들 (순위 순)
+
+    체크섬은 모든 워커가 같은 파일에서 같은 값을 얻으므로, 매뉴얼이 교체된 뒤 아직 이전 매뉴얼을 쓰는 워커가
+    저장한 답변은 새 매뉴얼의 키와 겹치지 않는다. 프롬프트는 상위 섹션들의 문단으로 만들므로 섹션 목록 전체를 넣는다.
+    """
+    digest = hashlib.sha256(manual_checksum.encode('utf-8'))
+    for section in sections:
+        digest.update(f"\0{section.get('section_number', '')}\x1f{section.get('title', '')}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AnswerCache(ABC):
+    """(차량, 답변 문맥 키, 질문 해시) -> 생성된 답변 캐시 인터페이스"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, vehicle: str, context_key: str, question: str) -> Optional[str]:
+        """캐시된 답변 조회 (context_key는 answer_context_key)"""
+
+    @abstractmethod
+    def set(self, vehicle: str, context_key: str, question: str, answer: str):
+        """답변 저장"""
+
+    @abstractmethod
+    def invalidate(self, vehicle: str) -> int:
+        """차량의 답변 모두 제거 (매뉴얼 교체 시)"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 정보"""
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class NullAnswerCache(AnswerCache):
+    """캐시를 쓰지 않는 구현 (ANSWER_CACHE_BACKEND=none)"""
+
+    def get(self, vehicle: str, context_key: str, question: str) -> Optional[str]:
+        self.misses += 1
+        return None
+
+    def set(self, vehicle: str, context_key: str, question: str, answer: str):
+        pass
+
+    def invalidate(self, vehicle: str) -> int:
+        return 0
+
+
+class SQLiteAnswerCache(AnswerCache):
+    """로컬 디스크 SQLite 답변 캐시
+
+    WAL 모드로 열어 같은 머신의 uvicorn 워커들이 하나의 파일을 공유하고,
+    data 볼륨에 두면 재시작 후에도 유지된다. ttl_seconds가 0이면 만료하지 않는다.
+    """
+
+    def __init__(self, path: str = "./data/cache/answers.sqlite3", ttl_seconds: float = 0, max_entries: int = 50000):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        # 섹션 번호로 키를 만들던 이전 형식의 테이블은 새 키와 맞지 않으므로 비우고 다시 만듦
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(answers)")]
+        if columns and "context_key" not in columns:
+            self._conn.execute("DROP TABLE answers")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                vehicle TEXT NOT NULL,
+                context_key TEXT NOT NULL,
+                question_hash TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (vehicle, context_key, question_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_created_at ON answers (created_at)")
+
+    def get(self, vehicle: str, context_key: str, question: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM answers WHERE vehicle = ? AND context_key = ? AND question_hash = ?",
+                (vehicle, context_key, question_hash(question))
+            ).fetchone()
+
+        if row is None or (self.ttl_seconds and row[1] + self.ttl_seconds < time.time()):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    def set(self, vehicle: str, context_key: str, question: str, answer: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                (vehicle, context_key, question_hash(question), answer, time.time())
+            )
+            self._writes += 1
+            if self._writes % 100:
+                return
+
+            # 100번 저장마다 최대 개수를 넘은 오래된 답변 정리
+            self._conn.execute(
+                "DELETE FROM answers WHERE rowid IN ("
+                "SELECT rowid FROM answers ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, vehicle: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM answers WHERE vehicle = ?", (vehicle,))
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        with self._lock:
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        stats["path"] = str(self.path)
+        return stats
+
+
+def create_answer_cache(backend: str = "sqlite", path: str = "./data/cache/answers.sqlite3", ttl_seconds: float = 0) -> AnswerCache:
+    """설정에 맞는 답변 캐시 생성"""
+    if backend == "sqlite":
+        return SQLiteAnswerCache(path, ttl_seconds=ttl_seconds)
+    if backend == "none":
+        return NullAnswerCache()
+    raise ValueError(f"지원하지 않는 답변 캐시 백엔드입니다: {backend}")
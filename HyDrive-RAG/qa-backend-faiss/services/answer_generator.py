@@ -1,32 +1,179 @@
+import asyncio
 import os
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Tuple
+
+import httpx
+
+from services.context_packer import pack_context
+from utils.answer_rewriter import FriendlyRewriter, make_answer_friendly, truncate_answer
 
 class AnswerGenerator:
+    ERROR_ANSWER = "앗, 답변을 생성하는 중에 문제가 생겼어요. 다시 한 번 질문해주시면 도와드릴게요! 😊"
+
     def __init__(self):
         self.openai_available = bool(os.getenv("OPENAI_API_KEY"))
 
-    async def generate_answer(self, question: str, section_data: Dict[str, Any]) -> str:
-        cleaned_content = self._clean_content(section_data['content'])
+        # OpenAI 호출 설정 (워커당 클라이언트 하나를 공유하고 동시 호출 수를 제한)
+        self.request_timeout = float(os.getenv("OPENAI_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+        self.max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+        self.max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+        # 프롬프트에 넣을 매뉴얼 문단의 토큰 예산 (상위 섹션들의 관련 문단을 이 안에서 고름)
+        self.context_token_budget = int(os.getenv("PROMPT_CONTEXT_TOKENS", "600"))
+
+        self._client = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _get_client(self):
+        """keep-alive 연결 풀을 쓰는 AsyncOpenAI 클라이언트 (첫 호출 시 생성 후 재사용)"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60
+                ),
+                timeout=httpx.Timeout(self.request_timeout, connect=self.connect_timeout)
+            )
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                timeout=httpx.Timeout(self.request_timeout, connect=self.connect_timeout),
+                max_retries=self.max_retries
+            )
+        return self._client
+
+    async def aclose(self):
+        """공유 클라이언트의 연결 풀 정리 (앱 종료 시)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def generate_answer(self, question: str, section_data: Dict[str, Any],
+                              context_sections: List[Dict[str, Any]] = None) -> str:
         question_intent = self._analyze_question_intent(question)
 
         if self.openai_available:
-            raw_answer = await self._generate_openai_answer(question, cleaned_content, question_intent, section_data)
+            context = self._build_context(section_data, context_sections)
+            raw_answer = await self._generate_openai_answer(question, context, question_intent, section_data)
         else:
+            cleaned_content = self._clean_content(section_data['content'])
             keywords = self._extract_question_keywords(question)
             relevant = self._extract_relevant_sentences(cleaned_content, keywords)
             raw_answer = self._fallback_answer(question_intent, relevant, section_data)
 
         return raw_answer
 
-    async def _generate_openai_answer(self, question: str, cleaned_content: str, question_intent: str, section_data: Dict[str, Any]) -> str:
-        prompt = f"""
+    async def stream_answer(self, question: str, section_data: Dict[str, Any],
+                            context_sections: List[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, str]]:
+        """답변을 생성되는 대로 ("token", 조각) 이벤트로 보내고, 마지막에 ("done", 최종 답변) 전달"""
+        question_intent = self._analyze_question_intent(question)
+
+        if self.openai_available:
+            context = self._build_context(section_data, context_sections)
+            async for event in self._stream_openai_answer(question, context, section_data):
+                yield event
+            return
+
+        cleaned_content = self._clean_content(section_data['content'])
+        keywords = self._extract_question_keywords(question)
+        relevant = self._extract_relevant_sentences(cleaned_content, keywords)
+        answer = self._fallback_answer(question_intent, relevant, section_data)
+
+        # 키워드 기반 답변은 이미 완성되어 있으므로 줄 단위로 나눠 전송
+        for line in re.findall(r'[^\n]*\n|[^\n]+', answer):
+            yield "token", line
+        yield "done", answer
+
+    async def _stream_openai_answer(self, question: str, context: str, section_data: Dict[str, Any]) -> AsyncIterator[Tuple[str, str]]:
+        prompt = self._build_prompt(question, context)
+        rewriter = FriendlyRewriter()
+        parts = []
+
+        try:
+            client = self._get_client()
+
+            async with self._semaphore:
+                stream = await client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=1200,
+                    temperature=0.3,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+
+                    # 앞쪽 공백은 배치 답변의 strip()과 맞추기 위해 버림
+                    if not parts:
+                        delta = delta.lstrip()
+                        if not delta:
+                            continue
+                    text = rewriter.feed(delta)
+                    parts.append(text)
+                    if text:
+                        yield "token", text
+
+                    # 앞 12문장만 남는 것이 확정되면 나머지는 받지 않음
+                    if rewriter.will_truncate():
+                        await stream.close()
+                        break
+
+            if not rewriter.will_truncate():
+                tail = rewriter.flush()
+                parts.append(tail)
+                if tail:
+                    yield "token", tail
+
+            answer = truncate_answer("".join(parts).rstrip())
+            yield "done", self._add_source_info(answer, section_data)
+
+        except Exception as e:
+            print(f"❌ OpenAI 스트리밍 에러: {e}")
+            yield "done", self.ERROR_ANSWER
+
+    async def _generate_openai_answer(self, question: str, context: str, question_intent: str, section_data: Dict[str, Any]) -> str:
+        prompt = self._build_prompt(question, context)
+
+        try:
+            client = self._get_client()
+
+            # 🚀 이벤트 루프를 막지 않는 비동기 호출 (동시 호출 수는 세마포어로 제한)
+            async with self._semaphore:
+                response = await client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=1200,
+                    temperature=0.3,
+                )
+            answer = self._make_answer_friendly(response.choices[0].message.content.strip())
+            return self._add_source_info(answer, section_data)
+
+        except Exception as e:
+            print(f"❌ OpenAI 호출 에러: {e}")
+            return self.ERROR_ANSWER
+
+    def _build_context(self, section_data: Dict[str, Any], context_sections: List[Dict[str, Any]] = None) -> str:
+        """검색 상위 섹션들의 관련 문단을 토큰 예산 안에서 골라 프롬프트 문맥 구성 (없으면 답변 섹션만)"""
+        context, stats = pack_context(context_sections or [section_data], self.context_token_budget, clean=self._clean_content)
+        print(f"🧩 프롬프트 문맥: 섹션 {stats['sections']}개, 문단 {stats['passages']}개, 약 {stats['tokens']}토큰")
+        return context
+
+    def _build_prompt(self, question: str, context: str) -> str:
+        return f"""
 당신은 현대자동차 매뉴얼을 친근하게 안내하는 AI 도우미입니다.
 
 질문: "{question}"
 
 매뉴얼 내용:
-{cleaned_content[:1200]}
+{context}
 
 ---
 
@@ -47,23 +194,6 @@ class AnswerGenerator:
 답변:
 """
 
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1200,
-                temperature=0.3,
-            )
-            answer = self._make_answer_friendly(response.choices[0].message.content.strip())
-            return self._add_source_info(answer, section_data)
-
-        except Exception as e:
-            print(f"❌ OpenAI 호출 에러: {e}")
-            return f"앗, 답변을 생성하는 중에 문제가 생겼어요. 다시 한 번 질문해주시면 도와드릴게요! 😊"
-
     def _analyze_question_intent(self, question: str) -> str:
         intent_keywords = {
             "점검하고 싶으신가요?": ["점검", "확인", "체크"],
@@ -167,66 +297,7 @@ class AnswerGenerator:
         return self._add_source_info(result, section_data)
 
     def _make_answer_friendly(self, text: str) -> str:
-        friendly_replacements = {
-            r'해야 합니다': '해주세요',
-            r'하십시오': '해보세요',
-            r'하시기 바랍니다': '하시면 됩니다',
-            r'주의하십시오': '주의해주세요',
-            r'확인하십시오': '확인해보세요',
-            r'반드시': '꼭',
-            r'필수적으로': '꼭'
-        }
-        
-        result = text
-        for pattern, replacement in friendly_replacements.items():
-            result = re.sub(pattern, replacement, result)
-        
-        # 주의사항 강조 패턴 - 이미 강조된 것은 제외하고 처리
-        warning_patterns = [
-            (r'(?<!⚠️ \*\*)(주의[^.]*\.)', r'⚠️ **주의:** \1'),
-            (r'(?<!⚠️ \*\*)(위험[^.]*\.)', r'⚠️ **위험:** \1'),
-            (r'(?<!⚠️ \*\*)(경고[^.]*\.)', r'⚠️ **경고:** \1'),
-            (r'(?<!🛡️ \*\*)(안전[^.]*\.)', r'🛡️ **안전:** \1'),
-            (r'(?<!🚫 \*\*)(금지[^.]*\.)', r'🚫 **금지:** \1')
-        ]
-        
-        for pattern, replacement in warning_patterns:
-            result = re.sub(pattern, replacement, result)
-        
-        # 중복된 경고 표시 정리
-        cleanup_patterns = [
-            (r'⚠️ \*\*주의:\*\* ⚠️ \*\*주의:\*\*', r'⚠️ **주의:**'),
-            (r'⚠️ \*\*위험:\*\* ⚠️ \*\*위험:\*\*', r'⚠️ **위험:**'),
-            (r'⚠️ \*\*경고:\*\* ⚠️ \*\*경고:\*\*', r'⚠️ **경고:**'),
-            (r'🛡️ \*\*안전:\*\* 🛡️ \*\*안전:\*\*', r'🛡️ **안전:**'),
-            (r'🚫 \*\*금지:\*\* 🚫 \*\*금지:\*\*', r'🚫 **금지:**'),
-            # 추가 중복 패턴들
-            (r'⚠️ \*\*⚠️ \*\*주의: 주의:\*\*', r'⚠️ **주의:**'),
-            (r'⚠️ \*\*⚠️ \*\*경고: 경고:\*\*', r'⚠️ **경고:**'),
-            (r'⚠️ \*\*⚠️ \*\*위험: 위험:\*\*', r'⚠️ **위험:**')
-        ]
-        
-        for pattern, replacement in cleanup_patterns:
-            result = re.sub(pattern, replacement, result)
-        
-        important_keywords = [
-            r'(적정\s*공기압)', r'(엔진\s*오일)', r'(브레이크\s*패드)', 
-            r'(배터리)', r'(타이어)', r'(냉각수)', r'(필터)',
-            r'(점검\s*주기)', r'(교체\s*시기)', r'(정기\s*점검)',
-            r'(준비물)', r'(도구)', r'(작업)', r'(절차)',
-            r'(드레인\s*볼트)', r'(오일\s*팬)', r'(토크)', r'(규정량)',
-            r'(오일\s*레벨)', r'(딥스틱)', r'(점성도)', r'(등급)'
-        ]
-        
-        for keyword in important_keywords:
-            result = re.sub(keyword, r'**\1**', result, flags=re.IGNORECASE)
-        
-        if len(result) > 1500:
-            sentences = result.split('.')
-            if len(sentences) > 12:
-                result = '. '.join(sentences[:12]) + '.'
-        
-        return result
+        return make_answer_friendly(text)
 
     def _add_source_info(self, answer: str, section_data: Dict[str, Any]) -> str:
         # 기존 문구 제거
@@ -0,0 +1,115 @@
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.passage_index import split_passages
+
+_HANGUL_PATTERN = re.compile(r'[가-힣]')
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """gpt-4o 계열 토크나이저 (tiktoken이 없거나 인코딩 파일을 받을 수 없으면 None)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def load_token_encoding() -> bool:
+    """토크나이저를 미리 로드 (첫 사용 때 인코딩 파일을 내려받을 수 있으므로 앱 시작 시 스레드에서 호출)
+
+    반환값은 tiktoken 토크나이저를 쓸 수 있는지 (False면 근사 추정).
+    """
+    return _token_encoding() is not None
+
+
+def estimate_tokens(text: str) -> int:
+    """프롬프트 토큰 수 추정 (tiktoken이 없으면 한글 음절 0.8토큰, 그 밖의 문자 3자당 1토큰으로 근사)"""
+    encoding = _token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    hangul = len(_HANGUL_PATTERN.findall(text))
+    others = len(text) - hangul - text.count(" ")
+    return math.ceil(hangul * 0.8 + others / 3)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """estimate_tokens 기준 max_tokens 이하가 되는 가장 긴 앞부분 (문자 단위 이분 탐색)"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip()
+
+
+def _section_passages(section: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """검색 결과의 문단 목록 (문단 색인이 없는 백엔드의 결과는 본문을 바로 나누고 점수는 0)"""
+    if section.get("passages") is not None:
+        return section["passages"]
+    content = section.get("content", "")
+    return [{"text": content[start:end], "score": 0.0} for start, end in split_passages(content)]
+
+
+def pack_context(sections: List[Dict[str, Any]], token_budget: int,
+                 clean: Optional[Callable[[str], str]] = None) -> Tuple[str, Dict[str, int]]:
+    """상위 섹션들의 문단 중 질의 관련도가 높은 것부터 token_budget 안에 골라 프롬프트 문맥 구성
+
+    문단 점수는 섹션 점수(1위 섹션 대비)로 가중하고, 고른 문단은 섹션 순위 → 본문 순서로 배치한다.
+    관련 문단이 하나도 없으면 1위 섹션의 앞 문단부터 채운다. 가장 관련도 높은 문단이 머리글과 함께 예산을 넘으면
+    예산에 맞게 앞부분만 잘라 넣으므로 문맥이 비지 않는다 (예산이 머리글보다 작아도 한 토큰은 넣음). 반환값은 (문맥, 통계).
+    """
+    top_score = max((section.get("score", 0) for section in sections), default=0)
+    candidates = []  # (가중 점수, 섹션 순위, 본문 내 문단 순서, 문단)
+    for rank, section in enumerate(sections):
+        weight = section.get("score", 0) / top_score if top_score > 0 else 0
+        for position, passage in enumerate(_section_passages(section)):
+            text = clean(passage["text"]) if clean else passage["text"].strip()
+            if text:
+                candidates.append((passage["score"] * weight, rank, position, text))
+
+    order = sorted((item for item in candidates if item[0] > 0), key=lambda item: (-item[0], item[1], item[2]))
+    if not order:
+        order = [item for item in candidates if item[1] == 0]
+
+    selected: Dict[int, List[Tuple[int, str]]] = {}
+    seen = set()
+    used = 0
+    for _, rank, position, text in order:
+        normalized = re.sub(r'\s+', ' ', text)
+        if normalized in seen:
+            continue
+        header_cost = 0 if rank in selected else estimate_tokens(_header(sections[rank]))
+        cost = estimate_tokens(text) + header_cost
+        if used + cost > token_budget:
+            if selected:
+                continue
+            # 가장 관련도 높은 문단은 예산에 맞게 잘라서라도 넣음
+            text = _truncate_to_tokens(text, max(token_budget - header_cost, 1))
+            if not text:
+                continue
+            cost = estimate_tokens(text) + header_cost
+        seen.add(normalized)
+        used += cost
+        selected.setdefault(rank, []).append((position, text))
+
+    blocks = []
+    for rank in sorted(selected):
+        passages = sorted(selected[rank])
+        body = passages[0][1]
+        for (previous, _), (position, text) in zip(passages, passages[1:]):
+            # 이어지지 않는 문단 사이는 생략 표시
+            body += (" " if position == previous + 1 else " … ") + text
+        blocks.append(f"{_header(sections[rank])}\n{body}")
+
+    stats = {"tokens": used, "passages": sum(len(passages) for passages in selected.values()), "sections": len(selected)}
+    return "\n\n".join(blocks), stats
+
+
+def _header(section: Dict[str, Any]) -> str:
+    return f"■ {section.get('title', '')}"
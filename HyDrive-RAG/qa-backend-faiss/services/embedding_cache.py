@@ -0,0 +1,188 @@
+import hashlib
+import json
+import pickle
+import re
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 섹션 임베딩 캐시: {이름}.meta (섹션 지문 등 메타데이터 JSON) + 행렬 파일 (float32/float16 .npy)
+# 사이드카를 .json으로 두면 매뉴얼 JSON 목록(data/processed/*.json)에 섞이므로 .meta를 쓴다
+# 행렬은 내용 해시 이름(embedding_blobs/{sha256}.npy)으로 저장해 같은 행렬을 쓰는 캐시끼리 파일 하나를 공유한다
+CACHE_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "float16")
+BLOB_DIR = "embedding_blobs"
+
+# 프로세스 안에서 이미 연 행렬 파일 (같은 파일은 메모리 맵 하나를 공유)
+_open_matrices: "weakref.WeakValueDictionary[str, np.ndarray]" = weakref.WeakValueDictionary()
+_open_lock = threading.Lock()
+
+
+class EmbeddingCacheError(Exception):
+    """캐시가 손상되었거나 현재 매뉴얼 섹션과 맞지 않는 경우"""
+
+
+def sections_fingerprint(sections_data: List[Dict[str, Any]]) -> str:
+    """임베딩을 만든 섹션 목록의 지문 (섹션이 바뀌면 캐시를 다시 만들어야 함)"""
+    digest = hashlib.sha256()
+    for section in sections_data:
+        # 본문은 그대로, 나머지 필드는 JSON으로 해시 (큰 본문을 JSON 직렬화하지 않음)
+        meta = {key: value for key, value in section.items() if key != "content"}
+        digest.update(json.dumps(meta, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(section.get("content", "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def manual_cache_name(file_name: str) -> str:
+    """매뉴얼(원본 PDF 파일명)별 캐시 이름 - create_embeddings.py가 만들고 JSONSearchService가 가장 먼저 찾음"""
+    return f"{Path(file_name).stem}_embeddings"
+
+
+def embedding_cache_names(file_name: str, vehicle_name: str) -> List[str]:
+    """찾아볼 임베딩 캐시 이름 (매뉴얼별 캐시 -> 파일명의 영문 단어별 변형 캐시 -> 차량 공통 캐시 순)"""
+    variants = re.findall(r'[a-z]+', Path(file_name).stem.lower())
+    manual_names = [manual_cache_name(file_name)] if file_name else []
+    return manual_names + [f"{vehicle_name}_{variant}_embeddings" for variant in variants] + [f"{vehicle_name}_embeddings"]
+
+
+def section_text_hash(text: str) -> str:
+    """임베딩한 섹션 텍스트의 해시 (같은 모델이면 해시가 같은 섹션의 임베딩은 재사용 가능)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sidecar_path_for(cache_stem: Path) -> Path:
+    cache_stem = Path(cache_stem)
+    return cache_stem.with_name(cache_stem.name + ".meta")
+
+
+def _open_matrix(matrix_path: Path) -> np.ndarray:
+    """행렬 파일을 mmap_mode='r'로 열기 (이미 열려 있으면 재사용)"""
+    key = str(matrix_path.resolve())
+    with _open_lock:
+        matrix = _open_matrices.get(key)
+        if matrix is None:
+            matrix = np.load(matrix_path, mmap_mode="r")
+            _open_matrices[key] = matrix
+        return matrix
+
+
+def save_embedding_cache(cache_stem: Path, embeddings: np.ndarray, sections_data: List[Dict[str, Any]],
+                         dtype: str = "float32", model_name: Optional[str] = None,
+                         section_hashes: Optional[List[str]] = None):
+    """정규화된 섹션 임베딩을 내용 주소 .npy로, 섹션 지문을 사이드카 JSON으로 저장
+
+    section_hashes(섹션별 임베딩 텍스트 해시)를 주면 사이드카에 함께 저장해 증분 빌드에서 재사용한다.
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"지원하지 않는 임베딩 dtype입니다: {dtype}")
+    if len(embeddings) != len(sections_data):
+        raise EmbeddingCacheError(f"임베딩 수({len(embeddings)})와 섹션 수({len(sections_data)})가 다릅니다.")
+
+    sidecar_path = sidecar_path_for(cache_stem)
+    matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+    digest = hashlib.sha256(f"{matrix.dtype.str}{matrix.shape}".encode("utf-8") + matrix.tobytes()).hexdigest()
+    matrix_file = f"{BLOB_DIR}/{digest}.npy"
+    matrix_path = sidecar_path.parent / matrix_file
+    matrix_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 같은 행렬이 이미 있으면 다시 쓰지 않음 (임시 파일에 쓴 뒤 교체해 읽는 중인 워커를 방해하지 않음)
+    if not matrix_path.exists():
+        tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix)
+        tmp_matrix.replace(matrix_path)
+
+    sidecar = {
+        "version": CACHE_VERSION,
+        "matrix_file": matrix_file,
+        "count": len(sections_data),
+        "dimension": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "dtype": dtype,
+        "model_name": model_name,
+        "sections_sha256": sections_fingerprint(sections_data)
+    }
+    if section_hashes is not None:
+        if len(section_hashes) != len(sections_data):
+            raise EmbeddingCacheError(f"섹션 해시 수({len(section_hashes)})와 섹션 수({len(sections_data)})가 다릅니다.")
+        sidecar["section_hashes"] = list(section_hashes)
+    tmp_sidecar = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    tmp_sidecar.write_text(json.dumps(sidecar, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_sidecar.replace(sidecar_path)
+
+
+def load_embedding_cache(cache_stem: Path, sections_data: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """캐시된 임베딩을 mmap_mode='r'로 열기 (없으면 None, 섹션과 맞지 않으면 EmbeddingCacheError)
+
+    읽기 전용 메모리 맵이라 같은 머신의 워커들이 페이지 캐시를 공유한다.
+    """
+    sidecar_path = sidecar_path_for(cache_stem)
+    if not sidecar_path.exists():
+        return None
+
+    sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+    matrix_path = sidecar_path.parent / sidecar.get("matrix_file", Path(cache_stem).name + ".npy")
+    if not matrix_path.exists():
+        return None
+
+    if sidecar.get("version") != CACHE_VERSION:
+        raise EmbeddingCacheError(f"캐시 버전이 다릅니다: {sidecar.get('version')}")
+    if sidecar["sections_sha256"] != sections_fingerprint(sections_data):
+        raise EmbeddingCacheError("임베딩 캐시가 현재 매뉴얼 섹션과 맞지 않습니다.")
+
+    embeddings = _open_matrix(matrix_path)
+    if embeddings.shape[0] != sidecar["count"]:
+        raise EmbeddingCacheError(f"임베딩 행 수({embeddings.shape[0]})가 사이드카({sidecar['count']})와 다릅니다.")
+    return embeddings
+
+
+def open_embedding_cache(cache_stem: Path) -> Optional[Tuple[Dict[str, Any], np.ndarray]]:
+    """사이드카와 행렬을 섹션 지문 확인 없이 열기 (증분 빌드에서 이전 임베딩을 재사용할 때, 없으면 None)"""
+    sidecar_path = sidecar_path_for(cache_stem)
+    if not sidecar_path.exists():
+        return None
+
+    sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+    matrix_path = sidecar_path.parent / sidecar.get("matrix_file", Path(cache_stem).name + ".npy")
+    if sidecar.get("version") != CACHE_VERSION or not matrix_path.exists():
+        return None
+    return sidecar, _open_matrix(matrix_path)
+
+
+def migrate_pickle_cache(pickle_path: Path, cache_stem: Path, dtype: str = "float32") -> bool:
+    """기존 {차량}_embeddings.pkl 캐시를 .npy + 사이드카로 변환 (변환했으면 True)"""
+    if not Path(pickle_path).exists():
+        return False
+
+    with open(pickle_path, "rb") as f:
+        cache_data = pickle.load(f)
+
+    save_embedding_cache(cache_stem, np.asarray(cache_data["embeddings"]), cache_data["sections_data"], dtype=dtype)
+    return True
+
+
+def find_embedding_cache(data_path: Path, cache_names: List[str], sections_data: List[Dict[str, Any]],
+                         dtype: str = "float32") -> Optional[Tuple[str, np.ndarray]]:
+    """cache_names 순서로 섹션 지문이 맞는 캐시를 찾아 (캐시 이름, 임베딩) 반환 (없으면 None)
+
+    .meta 캐시가 없고 같은 이름의 pickle 캐시가 있으면 한 번 .npy로 변환해서 사용한다.
+    """
+    data_path = Path(data_path)
+    for cache_name in cache_names:
+        cache_stem = data_path / cache_name
+        try:
+            embeddings = load_embedding_cache(cache_stem, sections_data)
+            if embeddings is None and migrate_pickle_cache(data_path / f"{cache_name}.pkl", cache_stem, dtype):
+                print(f"🔄 {cache_name}.pkl 캐시를 .npy로 변환 ({dtype})")
+                embeddings = load_embedding_cache(cache_stem, sections_data)
+        except (EmbeddingCacheError, OSError, ValueError, KeyError) as e:
+            print(f"⚠️ {cache_name} 캐시 사용 불가: {e}")
+            continue
+
+        if embeddings is not None:
+            return cache_name, embeddings
+    return None
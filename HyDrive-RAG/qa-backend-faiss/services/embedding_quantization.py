@@ -0,0 +1,45 @@
+from typing import Sequence
+
+import numpy as np
+
+# 양자화/근사 점수 계산을 나눠 처리할 행 수 (float32 변환 임시 배열 크기를 블록 하나로 제한)
+DEFAULT_BLOCK_ROWS = 1024
+
+
+class Int8Embeddings:
+    """정규화된 섹션 임베딩의 int8 스칼라 양자화 (행마다 scale = max|x| / 127)
+
+    상주 메모리는 int8 코드(float32의 1/4)와 행별 scale뿐이고, 원본 행렬(캐시 .npy mmap)은 참조만 한다.
+    approximate_scores로 모든 섹션의 유사도를 근사 계산한 뒤, 상위 후보만 exact_scores로 원본에서 다시 계산한다.
+    """
+
+    def __init__(self, embeddings: np.ndarray, block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.source = embeddings
+        self.block_rows = block_rows
+        self.codes = np.empty(embeddings.shape, dtype=np.int8)
+        self.scales = np.empty(len(embeddings), dtype=np.float32)
+
+        for start in range(0, len(embeddings), block_rows):
+            block = np.asarray(embeddings[start:start + block_rows], dtype=np.float32)
+            scales = np.abs(block).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self.codes[start:start + len(block)] = np.rint(block / scales[:, None])
+            self.scales[start:start + len(block)] = scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    def approximate_scores(self, query_vector: np.ndarray) -> np.ndarray:
+        """모든 행과 질의 벡터의 근사 내적 (int8 코드 블록 단위 계산)"""
+        query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_rows):
+            block = self.codes[start:start + self.block_rows]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query_vector
+        return scores * self.scales
+
+    def exact_scores(self, query_vector: np.ndarray, rows: Sequence[int]) -> np.ndarray:
+        """지정한 행만 원본 임베딩으로 정확한 내적 계산 (mmap에서는 해당 행 페이지만 읽음)"""
+        query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        return np.asarray(self.source[np.asarray(rows, dtype=np.intp)], dtype=np.float32) @ query_vector
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from services.embedding_cache import embedding_cache_names, find_embedding_cache
+from services.vectorized_search import VectorizedSearchService
+from utils.memory import estimate_memory
+
+
+class HybridSearchService(VectorizedSearchService):
+    """2단계 하이브리드 검색 (어휘 색인 후보 → 캐시된 섹션 임베딩으로 재순위)
+
+    1단계는 VectorizedSearchService의 희소 행렬 곱으로 어휘 점수를 계산해 상위 candidate_count개를 고르고,
+    질의와 단어가 겹치지 않는 섹션도 놓치지 않도록 임베딩 내적 상위 semantic_candidate_count개를 합친다
+    (섹션이 ann_min_sections개 이상이면 전체 내적 대신 FAISS HNSW 인덱스로 찾음).
+    2단계는 그 후보에 대해서만 lexical_weight × 어휘 점수 + semantic_weight × 코사인 유사도를 계산해 정렬한다.
+    섹션마다 파이썬으로 점수를 계산하지 않으므로 매뉴얼이 커져도 질의당 비용이 거의 늘지 않는다.
+    임베딩 캐시가 없으면 어휘 점수만으로 검색한다.
+    API에서는 search_sections_async로 질의 임베딩을 모델의 마이크로 배처에서 계산한 뒤 점수 계산을 스레드에서 하므로
+    모델 추론이 이벤트 루프(다른 요청과 SSE 스트림)를 막지 않는다.
+    """
+
+    def __init__(self, embedding_model, data_path: str = "./data/processed/", content_scoring: str = "legacy",
+                 candidate_count: int = None, semantic_candidate_count: int = None, lexical_weight: float = None,
+                 semantic_weight: float = None, embedding_dtype: str = None, ann_min_sections: int = None):
+        super().__init__(data_path, content_scoring=content_scoring)
+        self.embedding_model = embedding_model
+        self.candidate_count = candidate_count or int(os.getenv("HYBRID_CANDIDATES", "50"))
+        self.semantic_candidate_count = int(os.getenv("HYBRID_SEMANTIC_CANDIDATES", "10")) if semantic_candidate_count is None else semantic_candidate_count
+        self.lexical_weight = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.6")) if lexical_weight is None else lexical_weight
+        self.semantic_weight = float(os.getenv("HYBRID_SEMANTIC_WEIGHT", "0.4")) if semantic_weight is None else semantic_weight
+        self.embedding_dtype = embedding_dtype or os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+        self.ann_min_sections = int(os.getenv("HYBRID_ANN_MIN_SECTIONS", "5000")) if ann_min_sections is None else ann_min_sections
+        if self.candidate_count <= 0 or self.semantic_candidate_count < 0:
+            raise ValueError(f"후보 수가 올바르지 않습니다: {self.candidate_count}, {self.semantic_candidate_count}")
+        if self.lexical_weight < 0 or self.semantic_weight < 0:
+            raise ValueError(f"가중치는 0 이상이어야 합니다: {self.lexical_weight}, {self.semantic_weight}")
+
+        self.section_embeddings = None  # 캐시 행렬 (mmap, 섹션 순서와 같음)
+        self.embedding_cache_name = None
+        self.ann_index = None  # 임베딩 후보용 HNSW 인덱스 (큰 매뉴얼만)
+        self._ann_bytes = 0
+
+    def _prepare_sections_data(self, json_data: Dict[str, Any]):
+        """섹션 데이터와 희소 행렬 준비 후 섹션 임베딩 캐시 로드"""
+        super()._prepare_sections_data(json_data)
+        self._load_section_embeddings()
+
+    def load_snapshot(self, snapshot):
+        """스냅샷 로드 후 섹션 임베딩 캐시 로드"""
+        super().load_snapshot(snapshot)
+        self._load_section_embeddings()
+
+    def _load_section_embeddings(self):
+        """섹션 지문이 맞는 임베딩 캐시 열기 (JSONSearchService와 같은 캐시를 같은 순서로 찾음)"""
+        self.section_embeddings = None
+        self.embedding_cache_name = None
+        self.ann_index = None
+        self._ann_bytes = 0
+        if self.embedding_model is None or self.semantic_weight == 0:
+            return
+
+        vehicle_name = self._extract_vehicle_name_from_data(self.documents[0])
+        cache_names = embedding_cache_names(self.documents[0].get("file_name", ""), vehicle_name)
+        found = find_embedding_cache(self.data_path, cache_names, self.sections_data, self.embedding_dtype)
+        if found is None:
+            print(f"⚠️ {vehicle_name} 임베딩 캐시가 없어 어휘 점수만으로 검색합니다: {self.data_path / cache_names[0]}.meta")
+            return
+
+        self.embedding_cache_name, self.section_embeddings = found
+        if self.semantic_candidate_count > 0 and len(self.sections_data) >= self.ann_min_sections:
+            self._build_ann_index()
+        ann = ", HNSW" if self.ann_index is not None else ""
+        print(f"✅ {vehicle_name} 하이브리드 검색 임베딩 로드 ({len(self.sections_data)}개 섹션, {self.embedding_cache_name}.npy mmap{ann})")
+
+    def _build_ann_index(self, neighbors: int = 32):
+        """임베딩 후보 검색용 HNSW 인덱스 생성 (내적 = 코사인 유사도, faiss가 없으면 전체 내적 유지)"""
+        try:
+            import faiss
+        except ImportError:
+            print("⚠️ faiss가 설치되지 않아 임베딩 후보를 전체 내적으로 찾습니다")
+            return
+
+        embeddings = np.ascontiguousarray(self.section_embeddings, dtype=np.float32)
+        index = faiss.IndexHNSWFlat(embeddings.shape[1], neighbors, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = max(64, 2 * self.semantic_candidate_count)
+        index.add(embeddings)
+        self.ann_index = index
+        # 원본 벡터 사본 + 이웃 링크 (층 0은 2 × neighbors개)
+        self._ann_bytes = embeddings.nbytes + len(embeddings) * 2 * neighbors * 4
+
+    async def search_sections_async(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """질의 임베딩은 모델의 마이크로 배처로 (동시 요청과 한 배치로) 계산하고, 점수 계산은 스레드에서 실행"""
+        if self.section_embeddings is None:
+            return await super().search_sections_async(query, k)
+        query_embedding = await self.embedding_model.encode_query_async(query)
+        return await asyncio.to_thread(self.search_sections, query, k, query_embedding)
+
+    def _rank_sections(self, query: str, k: int, query_embedding: np.ndarray = None) -> Tuple[int, List[Tuple[int, float, Dict[str, float]]]]:
+        """어휘 점수 상위 후보만 임베딩 유사도와 합쳐 다시 정렬 (query_embedding이 없으면 여기서 인코딩)"""
+        if self.section_embeddings is None:
+            return super()._rank_sections(query, k)
+
+        fields = self._calculate_field_vectors(query)
+        lexical = self._calculate_total_score(fields)
+
+        if query_embedding is None:
+            query_embedding = self.embedding_model.encode_query(query)
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)[0]
+        query_vector = query_embedding / max(float(np.linalg.norm(query_embedding)), 1e-12)
+
+        candidates = self._select_candidates(lexical, query_vector, k)
+
+        # 후보 행만 (파일 순서대로) 읽어 코사인 유사도 계산 (캐시 임베딩은 정규화되어 있음)
+        semantic = np.asarray(self.section_embeddings[candidates], dtype=np.float32) @ query_vector
+        combined = self.lexical_weight * lexical[candidates] + self.semantic_weight * np.maximum(semantic, 0.0)
+
+        matched = np.flatnonzero(combined > self.SCORE_THRESHOLD)
+        order = matched[np.lexsort((candidates[matched], -combined[matched]))][:k]
+        ranked = []
+        for position in order:
+            doc_id = int(candidates[position])
+            scores = {field: float(values[doc_id]) for field, values in fields.items()}
+            scores["semantic"] = float(semantic[position])
+            ranked.append((doc_id, float(combined[position]), scores))
+        return int(matched.size), ranked
+
+    def _select_candidates(self, lexical: np.ndarray, query_vector: np.ndarray, k: int) -> np.ndarray:
+        """재순위할 후보 섹션 번호 (정렬됨): 어휘 상위 후보 + 임베딩 상위 후보 (합쳐서 k개가 안 되면 임베딩 후보로 채움)"""
+        candidates = self._lexical_candidates(lexical)
+        semantic_count = max(self.semantic_candidate_count, k - candidates.size)
+        if semantic_count > 0:
+            return np.union1d(candidates, self._semantic_candidates(query_vector, semantic_count))
+        return np.sort(candidates)
+
+    def _lexical_candidates(self, lexical: np.ndarray) -> np.ndarray:
+        """어휘 점수가 0보다 큰 섹션 중 상위 candidate_count개"""
+        matched = np.flatnonzero(lexical > 0)
+        if matched.size > self.candidate_count:
+            top = np.argpartition(-lexical[matched], self.candidate_count - 1)[:self.candidate_count]
+            matched = matched[top]
+        return matched
+
+    def _semantic_candidates(self, query_vector: np.ndarray, count: int) -> np.ndarray:
+        """임베딩 내적 상위 count개 (HNSW 인덱스가 있으면 근사 검색, 없으면 행렬-벡터 곱 한 번)"""
+        if self.ann_index is not None:
+            _, ids = self.ann_index.search(query_vector[None, :].astype(np.float32), count)
+            return ids[0][ids[0] >= 0]
+
+        similarities = self.section_embeddings @ query_vector
+        if similarities.size > count:
+            return np.argpartition(-similarities, count - 1)[:count]
+        return np.arange(similarities.size)
+
+    def _build_result(self, doc_id: int, total_score: float, scores: Dict[str, float]) -> Dict[str, Any]:
+        """검색 결과 딕셔너리 생성 (임베딩 유사도 포함)"""
+        result = super()._build_result(doc_id, total_score, scores)
+        if "semantic" in scores:
+            result["match_details"]["semantic_score"] = round(scores["semantic"], 3)
+        return result
+
+    def memory_usage(self) -> Dict[str, int]:
+        """이 서비스가 잡고 있는 메모리 추정 (공유 SectionStore와 임베딩 모델은 제외)"""
+        heap_bytes, mapped_bytes = estimate_memory(self, exclude=[self.section_store, self.embedding_model])
+        return {"heap_bytes": heap_bytes + self._ann_bytes, "mapped_bytes": mapped_bytes}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """통계 정보 반환"""
+        stats = super().get_stats()
+        stats["search_method"] = f"hybrid (keyword_matching_vectorized {self.content_scoring} + embedding rerank)"
+        stats["hybrid"] = {
+            "candidate_count": self.candidate_count,
+            "semantic_candidate_count": self.semantic_candidate_count,
+            "lexical_weight": self.lexical_weight,
+            "semantic_weight": self.semantic_weight,
+            "embeddings_loaded": self.section_embeddings is not None,
+            "ann_index": self.ann_index is not None,
+            "embedding_cache": self.embedding_cache_name
+        }
+        return stats
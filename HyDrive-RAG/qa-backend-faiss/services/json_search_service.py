@@ -1,18 +1,33 @@
+import asyncio
 import json
 import numpy as np
 import os
-import pickle
 from typing import List, Dict, Any
 from pathlib import Path
 
+from services.embedding_cache import embedding_cache_names, find_embedding_cache
+from services.embedding_quantization import Int8Embeddings
+from services.section_table import SectionTable
+
 class JSONSearchService:
-    def __init__(self, embedding_model, auto_load: bool = False, data_path: str = "./data/processed/"):
+    def __init__(self, embedding_model, auto_load: bool = False, data_path: str = "./data/processed/",
+                 embedding_dtype: str = None, embedding_quantization: str = None, rerank_candidates: int = None):
         self.embedding_model = embedding_model
         self.data_path = Path(data_path)
         self.documents = []
         
+        # 기존 pickle 캐시를 .npy로 변환할 때의 저장 형식 (float32 | float16)
+        self.embedding_dtype = embedding_dtype or os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+        
+        # 1차 유사도 계산용 양자화 (none | int8)와 원본 임베딩으로 다시 계산할 상위 후보 수
+        self.embedding_quantization = embedding_quantization or os.getenv("EMBEDDING_QUANTIZATION", "none")
+        if self.embedding_quantization not in ("none", "int8"):
+            raise ValueError(f"지원하지 않는 임베딩 양자화입니다: {self.embedding_quantization}")
+        self.rerank_candidates = rerank_candidates or int(os.getenv("EMBEDDING_RERANK_CANDIDATES", "50"))
+        
         # 🚀 임베딩 캐시 관련
         self.section_embeddings = None  # numpy array of embeddings
+        self.quantized_embeddings = None  # Int8Embeddings (양자화 사용 시)
         self.sections_data = []  # list of section metadata
         self.embeddings_cached = False  # 🔥 중요: 이 플래그가 핵심!
         
@@ -25,7 +40,8 @@ class JSONSearchService:
             print("❌ sections 필드가 없습니다.")
             return
             
-        self.documents = [json_data]
+        # 섹션은 sections_data(SectionTable)가 보관하므로 문서 정보에는 sections를 두지 않음
+        self.documents = [{key: value for key, value in json_data.items() if key != "sections"}]
         vehicle_name = self._extract_vehicle_name_from_data(json_data)
         sections_count = len(json_data.get("sections", []))
         
@@ -36,29 +52,38 @@ class JSONSearchService:
     
     def _precompute_embeddings(self, json_data: Dict[str, Any], vehicle_name: str):
         """섹션별 임베딩을 미리 계산하여 캐싱"""
-        cache_file = self.data_path / f"{vehicle_name}_embeddings.pkl"
-        
-        # 🔍 기존 캐시 확인
-        if cache_file.exists():
-            try:
-                print(f"💾 {vehicle_name} 기존 임베딩 캐시 로드 중...")
-                with open(cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
-                    self.section_embeddings = cache_data['embeddings']
-                    self.sections_data = cache_data['sections_data']
-                    self.embeddings_cached = True  # 🔥 플래그 설정!
-                print(f"✅ {vehicle_name} 캐시된 임베딩 로드 완료 ({len(self.sections_data)}개 섹션)")
-                return
-            except Exception as e:
-                print(f"⚠️ 캐시 로드 실패, 새로 생성: {e}")
+        # 섹션 메타데이터는 이미 읽은 JSON에서 만들어 문자열을 공유 (캐시에 본문 사본을 두지 않음)
+        sections_data = self._build_sections_data(json_data)
+        
+        # 🔍 기존 캐시 확인 (.npy 메모리 맵, 없으면 pickle 캐시를 한 번 변환)
+        # 섹션 지문이 맞는 캐시만 사용하므로 Hybrid/Electric 매뉴얼은 {차량}_{hybrid}_embeddings를 먼저 찾는다
+        print(f"💾 {vehicle_name} 기존 임베딩 캐시 로드 중...")
+        found = find_embedding_cache(self.data_path, self._cache_names(json_data, vehicle_name), sections_data, self.embedding_dtype)
+        if found is not None:
+            cache_name, embeddings = found
+            self.section_embeddings = embeddings
+            self.quantized_embeddings = Int8Embeddings(embeddings) if self.embedding_quantization == "int8" else None
+            self.sections_data = sections_data
+            self.embeddings_cached = True  # 🔥 플래그 설정!
+            quantization = f", int8 {self.quantized_embeddings.nbytes / 1024:.0f}KB" if self.quantized_embeddings is not None else ""
+            print(f"✅ {vehicle_name} 캐시된 임베딩 로드 완료 ({len(self.sections_data)}개 섹션, {cache_name}.npy mmap {embeddings.dtype}{quantization})")
+            return
         
         # 🚫 캐시가 없으면 에러 (배포 환경에서는 생성하지 않음)
-        print(f"❌ {vehicle_name} 임베딩 캐시 파일이 없습니다: {cache_file}")
+        print(f"❌ {vehicle_name} 임베딩 캐시 파일이 없습니다: {self.data_path / self._cache_names(json_data, vehicle_name)[0]}.meta")
         print("💡 로컬에서 create_embeddings.py를 실행하여 캐시를 생성해주세요.")
         return
-        
-    def search_sections(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """🚀 최적화된 검색: 캐시된 임베딩 사용"""
+    
+    def _cache_names(self, json_data: Dict[str, Any], vehicle_name: str) -> List[str]:
+        """찾아볼 임베딩 캐시 이름 (매뉴얼별 캐시 -> 파일명의 영문 단어별 변형 캐시 -> 차량 공통 캐시 순)"""
+        return embedding_cache_names(json_data.get("file_name", ""), vehicle_name)
+    
+    def _build_sections_data(self, json_data: Dict[str, Any]) -> SectionTable:
+        """임베딩 캐시와 같은 형식의 섹션 메타데이터 (열 단위 테이블, 항목은 섹션 딕셔너리처럼 읽힘)"""
+        return SectionTable(json_data.get("file_name", "unknown"), json_data.get("sections", []))
+    
+    def search_sections(self, query: str, k: int = 5, query_embedding: np.ndarray = None) -> List[Dict[str, Any]]:
+        """🚀 최적화된 검색: 캐시된 임베딩 사용 (query_embedding이 있으면 질의를 다시 인코딩하지 않음)"""
         
         # 🔍 디버깅 로그
         print(f"🔍 [DEBUG] 검색 시작")
@@ -75,45 +100,75 @@ class JSONSearchService:
         print(f"🔍 {vehicle_name} 매뉴얼 검색 시작: '{query}'")
         
         # 🚀 쿼리만 임베딩 계산 (섹션 임베딩은 재사용)
-        query_embedding = self.embedding_model.encode_query(query)
+        if query_embedding is None:
+            query_embedding = self.embedding_model.encode_query(query)
         query_norm = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
         
-        # 🚀 벡터화된 유사도 계산
-        similarities = np.dot(query_norm, self.section_embeddings.T)[0]
+        # 🚀 벡터화된 유사도 계산 (양자화 사용 시 int8 근사값, 상위 후보는 아래에서 정확히 재계산)
+        if self.quantized_embeddings is not None:
+            similarities = self.quantized_embeddings.approximate_scores(query_norm[0])
+        else:
+            similarities = np.dot(query_norm, self.section_embeddings.T)[0]
         
-        search_results = []
+        ranked = []
         
-        # 각 섹션에 대해 점수 계산
+        # 각 섹션에 대해 점수 계산 (결과 딕셔너리는 상위 k개만 생성)
         for i, section_data in enumerate(self.sections_data):
             scores = self._calculate_all_scores_optimized(query, section_data, similarities[i])
             total_score = self._calculate_total_score(scores)
-            
-            if total_score > 0.05:  # 임계값
-                search_results.append({
-                    "score": total_score,
-                    "source": section_data["source"],
-                    "section_number": section_data["section_number"],
-                    "title": section_data["title"],
-                    "page_range": section_data["page_range"],
-                    "content": section_data["content"],
-                    "keywords": section_data["keywords"],
-                    "subsections": section_data["subsections"],
-                    "match_details": {
-                        "title_score": round(scores["title"], 3),
-                        "keyword_score": round(scores["keyword"], 3),
-                        "content_score": round(scores["content"], 3),
-                        "bonus_score": round(scores["bonus"], 3)
-                    }
-                })
+            ranked.append((total_score, i, scores))
         
         # 점수순 정렬
-        search_results.sort(key=lambda x: x["score"], reverse=True)
+        ranked.sort(key=lambda x: x[0], reverse=True)
+        if self.quantized_embeddings is not None:
+            ranked = self._rerank_exact(query_norm[0], ranked, k)
+        ranked = [item for item in ranked if item[0] > 0.05]  # 임계값
+        search_results = [self._build_result(i, total_score, scores) for total_score, i, scores in ranked[:k]]
         
-        print(f"📊 {vehicle_name} 검색 결과: {len(search_results)}개 섹션 (⚡ 캐시 사용)")
+        print(f"📊 {vehicle_name} 검색 결과: {len(ranked)}개 섹션 (⚡ 캐시 사용)")
         for i, result in enumerate(search_results[:3]):
             print(f"  {i+1}. [{result['score']:.3f}] {result['title']} (페이지 {result['page_range']})")
         
-        return search_results[:k]
+        return search_results
+    
+    async def search_sections_async(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """질의 임베딩은 모델의 마이크로 배처로 (동시 요청과 한 배치로) 계산하고, 점수 계산은 스레드에서 실행"""
+        query_embedding = None
+        if self.embeddings_cached:
+            query_embedding = await self.embedding_model.encode_query_async(query)
+        return await asyncio.to_thread(self.search_sections, query, k, query_embedding)
+    
+    def _rerank_exact(self, query_vector: np.ndarray, ranked: List, k: int) -> List:
+        """근사 점수 상위 후보의 콘텐츠 유사도를 원본 임베딩으로 다시 계산해 재정렬 (나머지는 근사 점수 순서 유지)"""
+        candidates = ranked[:max(self.rerank_candidates, k)]
+        exact = self.quantized_embeddings.exact_scores(query_vector, [i for _, i, _ in candidates])
+        
+        reranked = []
+        for (_, i, scores), similarity in zip(candidates, exact):
+            scores = dict(scores, content=float(similarity))
+            reranked.append((self._calculate_total_score(scores), i, scores))
+        reranked.sort(key=lambda x: x[0], reverse=True)
+        return reranked + ranked[len(candidates):]
+    
+    def _build_result(self, i: int, total_score: float, scores: Dict[str, float]) -> Dict[str, Any]:
+        """검색 결과 딕셔너리 생성"""
+        section_data = self.sections_data[i]
+        return {
+            "score": total_score,
+            "source": section_data["source"],
+            "section_number": section_data["section_number"],
+            "title": section_data["title"],
+            "page_range": section_data["page_range"],
+            "content": section_data["content"],
+            "keywords": section_data["keywords"],
+            "subsections": section_data["subsections"],
+            "match_details": {
+                "title_score": round(scores["title"], 3),
+                "keyword_score": round(scores["keyword"], 3),
+                "content_score": round(scores["content"], 3),
+                "bonus_score": round(scores["bonus"], 3)
+            }
+        }
     
     def _calculate_all_scores_optimized(self, query: str, section_data: Dict, content_similarity: float) -> Dict[str, float]:
         """최적화된 점수 계산: 콘텐츠 유사도는 미리 계산된 값 사용"""
@@ -187,7 +242,8 @@ class JSONSearchService:
         """통계 정보 반환"""
         return {
             "documents_count": len(self.documents),
-            "total_sections": sum(len(doc.get("sections", [])) for doc in self.documents),
+            "total_sections": len(self.sections_data),
             "embeddings_cached": self.embeddings_cached,
+            "embedding_quantization": self.embedding_quantization,
             "cached_sections": len(self.sections_data) if self.embeddings_cached else 0
         }
\ No newline at end of file
@@ -0,0 +1,450 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from services.manual_snapshot import load_manual, snapshot_path_for, source_checksum, write_snapshot
+from utils.memory import estimate_memory
+
+# 파일명 토큰 -> 파워트레인 (해당 토큰이 없으면 기본 내연기관 모델)
+DEFAULT_POWERTRAIN = "standard"
+POWERTRAIN_ALIASES = {
+    "hybrid": "hybrid",
+    "하이브리드": "hybrid",
+    "electric": "electric",
+    "일렉트릭": "electric",
+    "ev": "electric"
+}
+_FILENAME_TOKEN = re.compile(r"[\s_\-]+")
+_YEAR_TOKEN = re.compile(r"^(19|20)\d{2}$")
+
+
+class ManualKey(NamedTuple):
+    """매뉴얼 변형 식별자 (차종, 파워트레인, 연식)"""
+    model: str
+    powertrain: str
+    year: int
+
+    @property
+    def id(self) -> str:
+        return f"{self.model}_{self.powertrain}_{self.year}"
+
+
+def normalize_powertrain(value: str) -> Optional[str]:
+    """파워트레인 입력값(별칭 포함)을 정규 이름으로 변환 (알 수 없는 값이면 None)"""
+    value = value.strip().lower()
+    if value == DEFAULT_POWERTRAIN:
+        return value
+    return POWERTRAIN_ALIASES.get(value)
+
+
+def parse_manual_key(stem: str, vehicle_resolver: Callable[[str], Optional[str]]) -> Optional[ManualKey]:
+    """파일명(확장자 제외)에서 매뉴얼 변형 식별자 추출 (차종을 모르면 None)
+
+    예: '코나 Electric_2025_structured' -> ManualKey('코나', 'electric', 2025)
+    """
+    model = vehicle_resolver(stem)
+    if not model:
+        return None
+
+    powertrain, year = DEFAULT_POWERTRAIN, 0
+    for token in _FILENAME_TOKEN.split(stem.lower()):
+        if token in POWERTRAIN_ALIASES:
+            powertrain = POWERTRAIN_ALIASES[token]
+        elif _YEAR_TOKEN.match(token):
+            year = int(token)
+    return ManualKey(model, powertrain, year)
+
+
+class ManualEntry:
+    """매뉴얼 변형 하나의 파일과 로드 상태 (pending -> loading -> ready | failed)"""
+
+    def __init__(self, key: ManualKey, path: Optional[Path]):
+        self.key = key
+        self.path = path
+        self.status = "pending"
+        self.service = None
+        self.sections_count = 0
+        self.load_seconds = None
+        self.error = None
+        self.loaded_from = None
+        self.checksum = None  # 서비스를 만든 원본 JSON의 SHA-256 (워커 간 공유 답변 캐시 키)
+        self.future: Optional[Future] = None
+
+        # 메모리 예산 관리용 (로드 후 측정, 마지막 사용 시각 기준 LRU 내림)
+        self.heap_bytes = 0
+        self.mapped_bytes = 0
+        self.last_used = 0.0
+        self.evictions = 0
+
+        # 매니페스트 메타데이터 (파일을 열지 않고 stat만 사용)
+        stat = path.stat() if path and path.exists() else None
+        self.file_bytes = stat.st_size if stat else 0
+        self.modified_at = stat.st_mtime if stat else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.key.model,
+            "powertrain": self.key.powertrain,
+            "year": self.key.year,
+            "status": self.status,
+            "file": self.path.name if self.path else None,
+            "file_bytes": self.file_bytes,
+            "sections_count": self.sections_count,
+            "load_seconds": self.load_seconds,
+            "loaded_from": self.loaded_from,
+            "heap_bytes": self.heap_bytes,
+            "mapped_bytes": self.mapped_bytes,
+            "evictions": self.evictions,
+            "error": self.error
+        }
+
+
+class ManualBuildJob:
+    """업로드된 매뉴얼의 색인 생성 작업 (queued -> building -> ready | failed | superseded)"""
+
+    def __init__(self, key: ManualKey, upload_path: Path, target_path: Path):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.upload_path = upload_path
+        self.target_path = target_path
+        self.status = "queued"
+        self.sections_count = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "variant": self.key.id,
+            "status": self.status,
+            "file": self.target_path.name,
+            "sections_count": self.sections_count,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class ManualRegistry:
+    """매뉴얼 변형별 검색 서비스 레지스트리
+
+    시작 시에는 파일 목록만 훑어 (차종, 파워트레인, 연식) -> 매뉴얼 파일 매니페스트를 만들고,
+    JSON 파싱과 색인 생성은 스레드 풀에서 백그라운드로(preload) 하거나 변형의 첫 요청 때 한다.
+    그랜저 / 그랜저 Hybrid처럼 같은 차종의 매뉴얼도 서로 덮어쓰지 않고 각각 선택할 수 있다.
+    아직 로드 중인 변형의 요청은 그 변형의 로드만 기다린다.
+    snapshot_dir가 있으면 최신 스냅샷을 메모리 맵으로 열고, 없거나 오래되었으면 JSON에서 만든 뒤 스냅샷을 컴파일한다.
+    memory_budget_bytes가 있으면 로드된 서비스의 힙 합계가 예산을 넘을 때 가장 오래 쓰지 않은 변형부터 내리고,
+    내린 변형은 다음 요청 때 (스냅샷에서) 다시 로드한다.
+    업로드된 매뉴얼은 submit_build로 스레드 풀에서 색인을 만든 뒤 한 번에 교체하므로, 그 전까지 질의는 기존 색인을 쓴다.
+    """
+
+    MAX_JOBS = 100
+
+    def __init__(self, service_factory: Callable[[], Any], vehicle_resolver: Callable[[str], Optional[str]],
+                 max_workers: int = 4, snapshot_dir: Optional[Path] = None, memory_budget_bytes: int = 0):
+        self.service_factory = service_factory
+        self.vehicle_resolver = vehicle_resolver
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.memory_budget_bytes = max(memory_budget_bytes, 0)
+        self.evictions = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="manual-loader")
+        self._entries: Dict[ManualKey, ManualEntry] = {}
+        self._jobs: "OrderedDict[str, ManualBuildJob]" = OrderedDict()
+        self._latest_jobs: Dict[ManualKey, str] = {}
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    def scan(self, data_dir: Path, supported_vehicles: List[str]) -> int:
+        """매뉴얼 JSON 파일 목록만 훑어 변형별 매니페스트 구성 (같은 변형이면 최근 수정된 파일 사용)"""
+        found: Dict[ManualKey, ManualEntry] = {}
+        for json_file in sorted(data_dir.glob("*.json")):
+            key = parse_manual_key(json_file.stem, self.vehicle_resolver)
+            if not key or key.model not in supported_vehicles:
+                print(f"⚠️ 인식되지 않은 차량: {json_file.name}")
+                continue
+
+            entry = ManualEntry(key, json_file)
+            previous = found.get(key)
+            if previous is not None:
+                if previous.modified_at > entry.modified_at:
+                    previous, entry = entry, previous
+                print(f"⚠️ {key.id} 매뉴얼 중복: {previous.path.name} 대신 {entry.path.name} 사용")
+            found[key] = entry
+
+        with self._lock:
+            self._entries.update(found)
+
+        return len(found)
+
+    def preload(self):
+        """등록된 모든 매뉴얼을 스레드 풀에서 백그라운드 로드"""
+        with self._lock:
+            for entry in self._entries.values():
+                self._submit(entry)
+
+    def resolve(self, vehicle: str, powertrain: Optional[str] = None, year: Optional[int] = None) -> Optional[ManualKey]:
+        """차종(또는 변형 id)과 선택 조건으로 매뉴얼 변형 선택
+
+        파워트레인을 지정하지 않으면 기본 모델을 우선하고, 연식을 지정하지 않으면 최신 연식을 고른다.
+        """
+        if powertrain:
+            powertrain = normalize_powertrain(powertrain) or powertrain.lower()
+
+        with self._lock:
+            keys = list(self._entries)
+
+        for key in keys:
+            if key.id == vehicle:
+                return key
+
+        candidates = [
+            key for key in keys
+            if key.model == vehicle
+            and (not powertrain or key.powertrain == powertrain)
+            and (not year or key.year == year)
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda key: (key.powertrain == DEFAULT_POWERTRAIN, key.year))
+
+    async def get_manual(self, key: ManualKey) -> Optional[Tuple[Any, str]]:
+        """변형의 (검색 서비스, 원본 JSON 체크섬) 반환 (로드 전이거나 내려간 상태면 로드를 기다림, 등록되지 않은 변형이면 None)
+
+        체크섬은 서비스를 만든 파일의 내용 해시라 워커마다 같으므로, 워커 간 공유 캐시 키에 매뉴얼 버전으로 쓸 수 있다.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    return None
+                if entry.status == "ready":
+                    entry.last_used = time.monotonic()
+                    return entry.service, entry.checksum
+                if entry.status == "failed":
+                    raise RuntimeError(f"{key.id} 매뉴얼 로드 실패: {entry.error}")
+                future = self._submit(entry)
+
+            # 로드가 끝난 직후 다른 로드 때문에 다시 내려갔으면 한 번 더 로드
+            await asyncio.wrap_future(future)
+
+    def register(self, key: ManualKey, service: Any, path: Path, sections_count: int, checksum: str):
+        """이미 만든 검색 서비스 등록 (업로드로 매뉴얼 교체 시, checksum은 path의 source_checksum)"""
+        entry = ManualEntry(key, path)
+        entry.status = "ready"
+        entry.service = service
+        entry.checksum = checksum
+        entry.sections_count = sections_count
+        entry.load_seconds = 0.0
+        entry.loaded_from = "upload"
+        entry.heap_bytes, entry.mapped_bytes = self._measure(service)
+        entry.last_used = time.monotonic()
+
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = entry
+
+        if previous is not None and hasattr(previous.service, "release"):
+            previous.service.release()
+        self._enforce_budget(keep=entry)
+
+    def submit_build(self, key: ManualKey, upload_path: Path, target_path: Path,
+                     on_ready: Optional[Callable[[ManualKey], None]] = None) -> ManualBuildJob:
+        """디스크에 받아 둔 업로드 파일로 색인 생성 작업 제출 (작업 상태는 get_job으로 조회)
+
+        같은 변형에 업로드가 겹치면 마지막으로 제출된 작업만 교체에 반영된다.
+        """
+        job = ManualBuildJob(key, Path(upload_path), Path(target_path))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._latest_jobs[key] = job.id
+            while len(self._jobs) > self.MAX_JOBS:
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._build, job, on_ready)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def vehicles(self) -> List[str]:
+        """사용 가능한 차종 목록 (모든 변형이 로드 실패한 차종 제외)"""
+        with self._lock:
+            models = [key.model for key, entry in self._entries.items() if entry.status != "failed"]
+        return list(dict.fromkeys(models))
+
+    def variants(self) -> List[Dict[str, Any]]:
+        """사용 가능한 매뉴얼 변형 목록 (id, 차종, 파워트레인, 연식, 상태)"""
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry.status != "failed"]
+        return [
+            {
+                "id": entry.key.id,
+                "model": entry.key.model,
+                "powertrain": entry.key.powertrain,
+                "year": entry.key.year,
+                "status": entry.status
+            }
+            for entry in sorted(entries, key=lambda entry: entry.key)
+        ]
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """변형별 로드 상태"""
+        with self._lock:
+            return {key.id: entry.to_dict() for key, entry in self._entries.items()}
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """로드된 서비스의 메모리 합계와 예산"""
+        with self._lock:
+            resident = [entry for entry in self._entries.values() if entry.status == "ready"]
+        return {
+            "budget_bytes": self.memory_budget_bytes,
+            "heap_bytes": sum(entry.heap_bytes for entry in resident),
+            "mapped_bytes": sum(entry.mapped_bytes for entry in resident),
+            "resident_manuals": len(resident),
+            "evictions": self.evictions
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, entry: ManualEntry) -> Optional[Future]:
+        """아직 로드를 시작하지 않은 항목이면 로드 작업 제출 (self._lock 안에서 호출)"""
+        if entry.status == "pending":
+            entry.status = "loading"
+            entry.future = self._executor.submit(self._load, entry)
+        return entry.future
+
+    def _load(self, entry: ManualEntry):
+        """스냅샷 또는 JSON에서 검색 서비스 생성 (스레드 풀에서 실행)"""
+        start = time.perf_counter()
+        try:
+            service = self.service_factory()
+            checksum = source_checksum(entry.path)
+            if self.snapshot_dir:
+                loaded_from = load_manual(service, entry.path, self.snapshot_dir, checksum)
+            else:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    service.add_document(json.load(f))
+                loaded_from = "json"
+        except Exception as e:
+            with self._lock:
+                entry.error = str(e)
+                entry.status = "failed"
+            print(f"❌ {entry.path} 로드 실패: {e}")
+            return
+
+        heap_bytes, mapped_bytes = self._measure(service)
+        with self._lock:
+            entry.service = service
+            entry.loaded_from = loaded_from
+            entry.checksum = checksum
+            entry.sections_count = len(service.sections_data)
+            entry.load_seconds = round(time.perf_counter() - start, 3)
+            entry.heap_bytes, entry.mapped_bytes = heap_bytes, mapped_bytes
+            entry.last_used = time.monotonic()
+            entry.status = "ready"
+        print(f"✅ {entry.key.id} 매뉴얼 로드 완료: {entry.path.name} ({entry.sections_count}개 섹션, {entry.load_seconds}초, {heap_bytes / 1024 / 1024:.1f}MB)")
+
+        self._enforce_budget(keep=entry)
+
+    def _build(self, job: ManualBuildJob, on_ready: Optional[Callable[[ManualKey], None]]):
+        """업로드 파일 검증 -> 색인 생성 -> 파일/스냅샷 교체 -> 서비스 교체 (스레드 풀에서 실행)"""
+        job.status = "building"
+        try:
+            raw = job.upload_path.read_bytes()
+            checksum = hashlib.sha256(raw).hexdigest()
+            json_data = json.loads(raw)
+            del raw
+            if not isinstance(json_data, dict) or "sections" not in json_data:
+                raise ValueError("올바른 JSON 구조가 아닙니다. 'sections' 필드가 필요합니다.")
+
+            service = self.service_factory()
+            service.add_document(json_data)
+            sections_count = len(service.sections_data)
+            del json_data
+
+            # 늦게 끝난 이전 업로드가 새 업로드를 덮어쓰지 않도록 확인과 교체를 묶어서 처리
+            with self._swap_lock:
+                with self._lock:
+                    superseded = self._latest_jobs.get(job.key) != job.id
+                if not superseded:
+                    # 파일은 원자적으로 교체하고, 다음 시작 때 바로 열 수 있도록 스냅샷도 컴파일
+                    os.replace(job.upload_path, job.target_path)
+                    if self.snapshot_dir:
+                        try:
+                            write_snapshot(snapshot_path_for(job.target_path, self.snapshot_dir), service, checksum)
+                        except Exception as e:
+                            print(f"⚠️ {job.key.id} 스냅샷 저장 실패: {e}")
+                    self.register(job.key, service, job.target_path, sections_count, checksum)
+
+            if superseded:
+                job.upload_path.unlink(missing_ok=True)
+                if hasattr(service, "release"):
+                    service.release()
+                job.status = "superseded"
+                job.finished_at = time.time()
+                return
+
+            if on_ready:
+                on_ready(job.key)
+        except Exception as e:
+            job.upload_path.unlink(missing_ok=True)
+            job.error = str(e)
+            job.status = "failed"
+            job.finished_at = time.time()
+            print(f"❌ {job.key.id} 업로드 색인 생성 실패: {e}")
+            return
+
+        job.sections_count = sections_count
+        job.status = "ready"
+        job.finished_at = time.time()
+        print(f"✅ {job.key.id} 업로드 매뉴얼 교체 완료: {job.target_path.name} ({sections_count}개 섹션)")
+
+    @staticmethod
+    def _measure(service: Any) -> Tuple[int, int]:
+        """서비스의 (힙 바이트, 메모리 맵 바이트)"""
+        if hasattr(service, "memory_usage"):
+            usage = service.memory_usage()
+            return usage["heap_bytes"], usage["mapped_bytes"]
+        return estimate_memory(service)
+
+    def _enforce_budget(self, keep: ManualEntry):
+        """힙 합계가 예산 안에 들 때까지 가장 오래 쓰지 않은 변형부터 내림 (keep은 제외)"""
+        if not self.memory_budget_bytes:
+            return
+
+        evicted = []
+        with self._lock:
+            resident = [entry for entry in self._entries.values() if entry.status == "ready"]
+            total = sum(entry.heap_bytes for entry in resident)
+            for entry in sorted(resident, key=lambda entry: entry.last_used):
+                if total <= self.memory_budget_bytes:
+                    break
+                if entry is keep:
+                    continue
+                total -= entry.heap_bytes
+                evicted.append((entry, entry.service))
+                entry.service = None
+                entry.future = None
+                entry.heap_bytes = entry.mapped_bytes = 0
+                entry.status = "pending"
+                entry.evictions += 1
+                self.evictions += 1
+
+        # 진행 중인 검색은 기존 서비스 참조로 계속되고, 참조가 사라지면 메모리가 회수됨
+        for entry, service in evicted:
+            if hasattr(service, "release"):
+                service.release()
+            print(f"📤 {entry.key.id} 매뉴얼 메모리에서 내림 (예산 {self.memory_budget_bytes / 1024 / 1024:.0f}MB)")
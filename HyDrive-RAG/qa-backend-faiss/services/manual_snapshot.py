@@ -0,0 +1,338 @@
+import hashlib
+import json
+import mmap
+import struct
+import zlib
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.passage_index import PassageIndex
+from services.search_index import PostingsView, SectionIndex
+
+# 스냅샷 파일 구조: 매직(8) + 버전(4) + 헤더 길이(4) + 헤더 CRC32(4) + JSON 헤더 + 8바이트 정렬된 배열들
+SNAPSHOT_MAGIC = b"HDSNAP\x00\x00"
+SNAPSHOT_VERSION = 4
+SNAPSHOT_SUFFIX = ".snap"
+_PREAMBLE = struct.Struct("<8sIII")
+_ALIGNMENT = 8
+
+# 섹션마다 문자열 테이블에 저장하는 필드 (meta는 나머지 필드의 JSON)
+_SECTION_FIELDS = ("title", "content", "meta")
+_POSTING_FIELDS = ("title", "keyword", "content")
+
+
+class SnapshotError(Exception):
+    """스냅샷이 없거나, 버전이 다르거나, 원본 JSON과 맞지 않거나, 손상된 경우"""
+
+
+def source_checksum(path: Path) -> str:
+    """원본 매뉴얼 JSON의 SHA-256 (스냅샷이 최신인지 확인용)"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def snapshot_path_for(json_path: Path, snapshot_dir: Path) -> Path:
+    return Path(snapshot_dir) / (Path(json_path).stem + SNAPSHOT_SUFFIX)
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """문자열 테이블: UTF-8 바이트를 이어 붙인 blob과 바이트 시작 위치 배열"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _encode_terms(terms: List[str]) -> np.ndarray:
+    """어휘 목록을 '\\0'으로 이어 붙인 blob으로 변환"""
+    if any("\0" in term for term in terms):
+        raise SnapshotError("어휘에 NUL 문자가 있어 스냅샷으로 저장할 수 없습니다.")
+    return np.frombuffer("\0".join(terms).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_terms(blob: np.ndarray) -> List[str]:
+    text = blob.tobytes().decode("utf-8")
+    return text.split("\0") if text else []
+
+
+def _encode_postings(postings: Dict[str, Dict[int, int]]) -> Dict[str, np.ndarray]:
+    """포스팅을 CSR 배열로 변환 (어휘는 '\\0'으로 이어 붙인 blob)"""
+    terms = list(postings)
+
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    doc_ids, counts = [], []
+    for col, doc_tf in enumerate(postings.values()):
+        doc_ids.extend(doc_tf.keys())
+        counts.extend(doc_tf.values())
+        indptr[col + 1] = len(doc_ids)
+
+    return {
+        "terms": _encode_terms(terms),
+        "indptr": indptr,
+        "doc_ids": np.asarray(doc_ids, dtype=np.int32),
+        "counts": np.asarray(counts, dtype=np.int32)
+    }
+
+
+def write_snapshot(path: Path, service, checksum: str):
+    """색인이 준비된 SimpleSearchService를 스냅샷 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+    sections = service.sections_data
+    index = service.index
+    count = len(sections)
+
+    strings = []
+    for section in sections:
+        meta = {key: section[key] for key in ("section_number", "page_range", "keywords", "subsections")}
+        strings.extend([section["title"], section["content"], json.dumps(meta, ensure_ascii=False)])
+    section_blob, section_offsets = _encode_strings(strings)
+
+    arrays = {
+        "section_blob": section_blob,
+        "section_offsets": section_offsets,
+        "has_title": np.asarray(index.has_title, dtype=np.uint8),
+        "keyword_counts": np.asarray(index.keyword_counts, dtype=np.int32),
+        "content_lengths": np.asarray(index.content_lengths, dtype=np.int32)
+    }
+    for name, doc_ids in (
+        ("procedure_flags", service._procedure_sections),
+        ("repair_flags", service._repair_sections),
+        ("important_title_flags", service._important_title_sections)
+    ):
+        flags = np.zeros(count, dtype=np.uint8)
+        flags[list(doc_ids)] = 1
+        arrays[name] = flags
+
+    for field in _POSTING_FIELDS:
+        for part, array in _encode_postings(getattr(index, f"{field}_postings")).items():
+            arrays[f"{field}_postings_{part}"] = array
+
+    # 문단 색인 (문단 위치 + 문단별 어휘 포스팅, 어휘 번호는 본문 포스팅과 같음)
+    for name, array in service.passage_index.arrays().items():
+        arrays[f"passage_{name}"] = array
+
+    # 배열 배치 (각 배열 시작을 8바이트로 정렬)
+    layout, payload = {}, bytearray()
+    for name, array in arrays.items():
+        payload.extend(b"\0" * (-len(payload) % _ALIGNMENT))
+        layout[name] = [array.dtype.str, len(payload), len(array)]
+        payload.extend(array.tobytes())
+
+    header = json.dumps({
+        "file_name": service.documents[0].get("file_name", "unknown") if service.documents else "unknown",
+        "section_count": count,
+        "source_sha256": checksum,
+        "payload_crc32": zlib.crc32(payload),
+        "arrays": layout
+    }, ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % _ALIGNMENT)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header), zlib.crc32(header)))
+        f.write(header)
+        f.write(payload)
+    tmp_path.replace(path)
+
+
+class SnapshotSections(Sequence):
+    """스냅샷 문자열 테이블 위의 sections_data (요청된 섹션만 디코딩)"""
+
+    def __init__(self, source: str, blob: np.ndarray, offsets: np.ndarray):
+        self.source = source
+        self._blob = blob
+        self._offsets = offsets
+        self._count = (len(offsets) - 1) // len(_SECTION_FIELDS)
+
+    def _string(self, i: int) -> str:
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __getitem__(self, doc_id: int) -> Dict[str, Any]:
+        if doc_id < 0:
+            doc_id += self._count
+        if not 0 <= doc_id < self._count:
+            raise IndexError(doc_id)
+
+        base = doc_id * len(_SECTION_FIELDS)
+        meta = json.loads(self._string(base + 2))
+        return {
+            "source": self.source,
+            "section_number": meta["section_number"],
+            "title": self._string(base),
+            "page_range": meta["page_range"],
+            "content": self._string(base + 1),
+            "keywords": meta["keywords"],
+            "subsections": meta["subsections"]
+        }
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class ManualSnapshot:
+    """메모리 맵으로 연 매뉴얼 스냅샷 (배열은 파일 페이지를 복사 없이 참조)
+
+    헤더나 배열 배치가 손상되었으면 메모리 맵을 닫고 SnapshotError를 낸다.
+    """
+
+    def __init__(self, path: Path, expected_checksum: Optional[str] = None):
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"스냅샷을 열 수 없습니다: {e}")
+
+        try:
+            payload_start = self._read_header(expected_checksum)
+            self.arrays = self._map_arrays(payload_start)
+            self.file_name = self.header["file_name"]
+            self.section_count = self.header["section_count"]
+            self.sections = SnapshotSections(self.file_name, self.arrays["section_blob"], self.arrays["section_offsets"])
+        except SnapshotError:
+            self.close()
+            raise
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            # JSON/UTF-8 디코딩 오류, 필드 누락, 잘못된 dtype 등
+            self.close()
+            raise SnapshotError(f"스냅샷 헤더가 올바르지 않습니다: {type(e).__name__}: {e}")
+
+    def _read_header(self, expected_checksum: Optional[str]) -> int:
+        """프리앰블과 JSON 헤더를 검증해 self.header에 저장하고 배열 영역 시작 위치 반환"""
+        if len(self._mmap) < _PREAMBLE.size:
+            raise SnapshotError("스냅샷 파일이 너무 짧습니다.")
+        magic, version, header_length, header_crc32 = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"스냅샷 형식/버전이 다릅니다 (version={version})")
+
+        payload_start = _PREAMBLE.size + header_length
+        if payload_start > len(self._mmap):
+            raise SnapshotError("스냅샷 헤더 길이가 파일 크기를 넘습니다.")
+        header = self._mmap[_PREAMBLE.size:payload_start]
+        if zlib.crc32(header) != header_crc32:
+            raise SnapshotError("스냅샷 헤더 체크섬이 맞지 않습니다.")
+
+        self.header = json.loads(header)
+        if not isinstance(self.header, dict):
+            raise SnapshotError("스냅샷 헤더가 JSON 객체가 아닙니다.")
+        if expected_checksum and self.header["source_sha256"] != expected_checksum:
+            raise SnapshotError("원본 매뉴얼이 바뀌어 스냅샷이 오래되었습니다.")
+        if zlib.crc32(memoryview(self._mmap)[payload_start:]) != self.header["payload_crc32"]:
+            raise SnapshotError("스냅샷 체크섬이 맞지 않습니다.")
+        return payload_start
+
+    def _map_arrays(self, payload_start: int) -> Dict[str, np.ndarray]:
+        """헤더의 배열 배치를 모두 검증한 뒤 메모리 맵 위의 배열로 연결 (검증 중에는 맵을 참조하지 않음)"""
+        layout = []
+        for name, (dtype, offset, length) in self.header["arrays"].items():
+            dtype = np.dtype(dtype)
+            start = payload_start + int(offset)
+            if offset < 0 or length < 0 or start + int(length) * dtype.itemsize > len(self._mmap):
+                raise SnapshotError(f"스냅샷 배열 배치가 파일 범위를 벗어납니다: {name}")
+            layout.append((name, dtype, start, int(length)))
+
+        return {
+            name: np.frombuffer(self._mmap, dtype=dtype, count=length, offset=start)
+            for name, dtype, start, length in layout
+        }
+
+    def close(self):
+        """배열 참조를 놓고 메모리 맵 닫기 (밖에서 아직 배열을 쓰고 있으면 참조가 사라질 때 해제됨)"""
+        self.arrays = {}
+        self.sections = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def build_index(self) -> SectionIndex:
+        """스냅샷 배열 위에 SectionIndex 구성 (포스팅은 복사하지 않음)"""
+        postings = {}
+        for field in _POSTING_FIELDS:
+            postings[field] = PostingsView(
+                _decode_terms(self.arrays[f"{field}_postings_terms"]),
+                self.arrays[f"{field}_postings_indptr"],
+                self.arrays[f"{field}_postings_doc_ids"],
+                self.arrays[f"{field}_postings_counts"]
+            )
+
+        index = SectionIndex()
+        index.load(
+            postings["title"], postings["keyword"], postings["content"],
+            has_title=self.arrays["has_title"].astype(bool).tolist(),
+            keyword_counts=self.arrays["keyword_counts"].tolist(),
+            content_lengths=self.arrays["content_lengths"].tolist()
+        )
+        return index
+
+    def build_passage_index(self) -> PassageIndex:
+        """스냅샷 배열 위에 PassageIndex 구성 (배열은 복사하지 않음)"""
+        passage_index = PassageIndex()
+        names = ("section_indptr", "passage_starts", "passage_ends", "indptr", "passage_ids", "counts")
+        passage_index.load({name: self.arrays[f"passage_{name}"] for name in names})
+        return passage_index
+
+    def bonus_flags(self) -> Tuple[set, set, set]:
+        """(절차, 정비, 중요 제목) 보너스 섹션 번호 집합"""
+        return tuple(
+            set(np.flatnonzero(self.arrays[name]).tolist())
+            for name in ("procedure_flags", "repair_flags", "important_title_flags")
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "bytes": len(self._mmap),
+            "sections": self.section_count
+        }
+
+
+def open_snapshot(path: Path, expected_checksum: Optional[str] = None) -> ManualSnapshot:
+    """스냅샷 열기 (없거나 오래되었거나 손상되면 SnapshotError)"""
+    if not Path(path).exists():
+        raise SnapshotError(f"스냅샷이 없습니다: {path}")
+    return ManualSnapshot(path, expected_checksum)
+
+
+def load_manual(service, json_path: Path, snapshot_dir: Path, checksum: Optional[str] = None) -> str:
+    """스냅샷이 최신이면 스냅샷으로, 아니면 JSON을 파싱해 서비스에 로드하고 스냅샷을 다시 컴파일
+
+    checksum은 이미 계산한 source_checksum(json_path) (없으면 여기서 계산).
+    반환값은 사용한 경로 ("snapshot" 또는 "json").
+    """
+    checksum = checksum or source_checksum(json_path)
+    snapshot_path = snapshot_path_for(json_path, snapshot_dir)
+
+    try:
+        service.load_snapshot(open_snapshot(snapshot_path, checksum))
+        return "snapshot"
+    except SnapshotError as e:
+        print(f"🗂️ 스냅샷 사용 불가, JSON에서 로드: {snapshot_path.name} ({e})")
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        service.add_document(json.load(f))
+
+    try:
+        write_snapshot(snapshot_path, service, checksum)
+        print(f"💾 스냅샷 컴파일 완료: {snapshot_path}")
+    except (OSError, SnapshotError) as e:
+        print(f"⚠️ 스냅샷 저장 실패: {e}")
+    return "json"
+
+
+if __name__ == "__main__":
+    # 배포 전 매뉴얼 스냅샷 일괄 컴파일: python -m services.manual_snapshot [data_dir] [snapshot_dir]
+    import sys
+    from services.simple_search import SimpleSearchService
+
+    data_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "./data/processed")
+    snapshot_dir = Path(sys.argv[2] if len(sys.argv) > 2 else "./data/snapshots")
+    for json_file in sorted(data_dir.glob("*.json")):
+        service = SimpleSearchService()
+        with open(json_file, 'r', encoding='utf-8') as f:
+            service.add_document(json.load(f))
+        write_snapshot(snapshot_path_for(json_file, snapshot_dir), service, source_checksum(json_file))
+        print(f"💾 {json_file.name} -> {snapshot_path_for(json_file, snapshot_dir)}")
@@ -0,0 +1,175 @@
+import re
+from collections import Counter
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from services.search_index import TOKEN_PATTERN
+
+# 문단(문장 묶음) 최대 길이 (이보다 긴 문장 하나는 그대로 한 문단, 두 배를 넘으면 공백에서 자름)
+PASSAGE_MAX_CHARS = 240
+
+# 문장 경계: 마침표/물음표/느낌표 뒤 공백, 또는 연속 공백/줄바꿈 (매뉴얼 JSON은 단락을 두 칸 공백으로 구분)
+_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+|\s{2,}|\n+')
+
+
+def _split_long(content: str, start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """max_chars보다 긴 구간을 공백 위치에서 max_chars 이하로 나눔
+
+    공백이 없으면 max_chars 뒤의 첫 토큰 경계에서 자른다 (문단별 토큰 빈도의 합이 본문 토큰 빈도와 같도록).
+    """
+    spans = []
+    while end - start > max_chars:
+        cut = content.rfind(" ", start + 1, start + max_chars + 1)
+        if cut <= start:
+            token = TOKEN_PATTERN.match(content, start + max_chars - 1)
+            cut = token.end() if token else start + max_chars
+            if cut >= end:
+                break
+        spans.append((start, cut))
+        start = cut
+        while start < end and content[start].isspace():
+            start += 1
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+
+def split_passages(content: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[Tuple[int, int]]:
+    """본문을 문장으로 나눈 뒤 같은 단락의 이웃 문장을 max_chars까지 묶은 문단의 (시작, 끝) 문자 위치"""
+    sentences = []  # (시작, 끝, 앞에 단락 구분이 있는지)
+    start, paragraph_break = 0, False
+    for match in _BREAK_PATTERN.finditer(content):
+        if match.start() > start:
+            sentences.append((start, match.start(), paragraph_break))
+        gap = match.group()
+        start, paragraph_break = match.end(), len(gap) > 1 or "\n" in gap
+    if start < len(content.rstrip()):
+        sentences.append((start, len(content.rstrip()), paragraph_break))
+
+    passages = []
+    for sentence_start, sentence_end, new_paragraph in sentences:
+        if passages and not new_paragraph and sentence_end - passages[-1][0] <= max_chars:
+            passages[-1] = (passages[-1][0], sentence_end)
+        elif sentence_end - sentence_start > 2 * max_chars:
+            passages.extend(_split_long(content, sentence_start, sentence_end, max_chars))
+        else:
+            passages.append((sentence_start, sentence_end))
+    return passages
+
+
+def passage_term_counts(content: str, max_chars: int = PASSAGE_MAX_CHARS) -> List[Tuple[int, int, Counter]]:
+    """본문의 문단별 (시작, 끝, 원시 토큰 빈도)
+
+    문단 사이에는 공백만 있으므로 문단별 빈도의 합이 본문 전체 토큰 빈도와 같다 (본문 포스팅도 이 결과로 만듦).
+    """
+    return [
+        (start, end, Counter(TOKEN_PATTERN.findall(content[start:end].lower())))
+        for start, end in split_passages(content, max_chars)
+    ]
+
+
+class PassageIndex:
+    """섹션 본문의 문단 단위 역색인
+
+    매뉴얼 로드 시 섹션마다 split_passages로 문단을 나누고, 문단별 어휘 빈도를 CSR 배열
+    (어휘별 시작 위치, 문단 번호, 등장 횟수)로 만든다. 어휘 열은 SectionIndex 본문 포스팅의 어휘 번호를
+    그대로 쓰므로 어휘 목록을 따로 두지 않고, 본문 포스팅도 같은 문단별 토큰 빈도를 합쳐 만든다.
+    섹션 i의 문단은 section_indptr[i]부터 section_indptr[i + 1] 전까지이며, 배열 그대로 스냅샷에 저장하고
+    메모리 맵으로 읽는다. 질의 시에는 상위 섹션의 문단만 BM25(어휘 가중치 × IDF)로 점수를 매긴다.
+    """
+
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self):
+        self.section_indptr = np.zeros(1, dtype=np.int64)
+        self.passage_starts = np.zeros(0, dtype=np.int32)
+        self.passage_ends = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.passage_ids = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self._prepare_weights()
+
+    def build(self, section_passages: Sequence[List[Tuple[int, int, Counter]]], term_ids: Mapping[str, int]):
+        """섹션별 passage_term_counts 결과로 문단 위치와 문단별 어휘 포스팅 생성 (term_ids는 본문 포스팅의 어휘 번호)"""
+        section_indptr = [0]
+        starts, ends = [], []
+        posting_terms, posting_passages, posting_counts = [], [], []
+
+        for passages in section_passages:
+            for start, end, term_counts in passages:
+                passage_id = len(starts)
+                starts.append(start)
+                ends.append(end)
+                posting_terms.extend(map(term_ids.__getitem__, term_counts))
+                posting_passages.extend([passage_id] * len(term_counts))
+                posting_counts.extend(term_counts.values())
+            section_indptr.append(len(starts))
+
+        self.section_indptr = np.asarray(section_indptr, dtype=np.int64)
+        self.passage_starts = np.asarray(starts, dtype=np.int32)
+        self.passage_ends = np.asarray(ends, dtype=np.int32)
+
+        # 어휘 번호 → 문단 번호 순으로 정렬 (어휘 열마다 문단 번호가 오름차순)
+        posting_terms = np.asarray(posting_terms, dtype=np.int64)
+        posting_passages = np.asarray(posting_passages, dtype=np.int32)
+        order = np.lexsort((posting_passages, posting_terms))
+        self.indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(term_ids)), out=self.indptr[1:])
+        self.passage_ids = posting_passages[order]
+        self.counts = np.asarray(posting_counts, dtype=np.int32)[order]
+        self._prepare_weights()
+
+    def load(self, arrays: Dict[str, np.ndarray]):
+        """스냅샷 배열로 색인 구성 (배열은 복사하지 않음)"""
+        for name in ("section_indptr", "passage_starts", "passage_ends", "indptr", "passage_ids", "counts"):
+            setattr(self, name, arrays[name])
+        self._prepare_weights()
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """스냅샷에 저장할 배열 (어휘 번호는 본문 포스팅과 같으므로 어휘 목록은 저장하지 않음)"""
+        return {
+            "section_indptr": self.section_indptr,
+            "passage_starts": self.passage_starts,
+            "passage_ends": self.passage_ends,
+            "indptr": self.indptr,
+            "passage_ids": self.passage_ids,
+            "counts": self.counts
+        }
+
+    def _prepare_weights(self):
+        """BM25용 어휘 IDF와 문단 길이"""
+        passage_count = len(self.passage_starts)
+        document_frequency = np.diff(self.indptr)
+        self._idf = np.log1p((passage_count - document_frequency + 0.5) / (document_frequency + 0.5))
+        self._lengths = (np.asarray(self.passage_ends) - np.asarray(self.passage_starts)).astype(np.float64)
+        self._average_length = max(self._lengths.mean(), 1.0) if passage_count else 1.0
+
+    def section_passages(self, doc_id: int, content: str, term_weights: Dict[int, float]) -> List[Dict[str, object]]:
+        """섹션의 문단 목록 (본문 순서, 어휘 번호별 질의 가중치로 매긴 점수 포함)"""
+        first, last = int(self.section_indptr[doc_id]), int(self.section_indptr[doc_id + 1])
+        scores = np.zeros(last - first)
+
+        for col, weight in term_weights.items():
+            lo, hi = int(self.indptr[col]), int(self.indptr[col + 1])
+            column = self.passage_ids[lo:hi]
+            begin, stop = np.searchsorted(column, first), np.searchsorted(column, last)
+            if begin == stop:
+                continue
+
+            passages = np.asarray(column[begin:stop], dtype=np.int64)
+            tf = self.counts[lo + begin:lo + stop].astype(np.float64)
+            length_norm = 1 - self.BM25_B + self.BM25_B * self._lengths[passages] / self._average_length
+            scores[passages - first] += weight * self._idf[col] * tf * (self.BM25_K1 + 1) / (tf + self.BM25_K1 * length_norm)
+
+        return [
+            {"text": content[int(self.passage_starts[passage]):int(self.passage_ends[passage])], "score": float(score)}
+            for passage, score in zip(range(first, last), scores)
+        ]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "passages": len(self.passage_starts),
+            "postings": len(self.passage_ids)
+        }
@@ -0,0 +1,297 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Mapping
+from typing import List, Dict, Any, Set, Iterable, Optional
+
+# 한글, 영문, 숫자 연속 구간을 하나의 토큰으로 취급
+TOKEN_PATTERN = re.compile(r'[가-힣a-zA-Z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """텍스트를 검색 토큰으로 분리 (길이 1인 토큰은 숫자만 유지)"""
+    if not text:
+        return []
+
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    return [token for token in tokens if len(token) > 1 or token.isdigit()]
+
+
+class NgramIndex:
+    """어휘 문자 n-gram 색인 (부분 일치 탐색용)
+
+    "엔진오일", "브레이크패드" 같은 한글 복합어의 부분 일치를 어휘 전체 순회 대신
+    1~max_n 글자 n-gram 포스팅의 교집합으로 찾는다.
+    """
+
+    def __init__(self, max_n: int = 3):
+        self.max_n = max_n
+        self.terms: Set[str] = set()
+        self.grams: Dict[str, Set[str]] = {}
+        self.term_lengths: List[int] = []
+
+    def build(self, terms: Iterable[str]):
+        """어휘 목록으로 n-gram 색인 생성"""
+        self.terms = set(terms)
+        self.grams = {}
+
+        for term in self.terms:
+            for n in range(1, self.max_n + 1):
+                for i in range(len(term) - n + 1):
+                    self.grams.setdefault(term[i:i + n], set()).add(term)
+
+        self.term_lengths = sorted({len(term) for term in self.terms})
+
+    def terms_containing(self, word: str) -> Set[str]:
+        """word를 부분 문자열로 포함하는 어휘"""
+        if not word:
+            return set(self.terms)
+
+        n = min(len(word), self.max_n)
+        postings = []
+        for i in range(len(word) - n + 1):
+            terms = self.grams.get(word[i:i + n])
+            if not terms:
+                return set()
+            postings.append(terms)
+
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        if len(word) <= self.max_n:
+            return candidates
+        return {term for term in candidates if word in term}
+
+    def terms_within(self, text: str) -> Set[str]:
+        """text의 부분 문자열인 어휘"""
+        found = set()
+        for length in self.term_lengths:
+            if length > len(text):
+                break
+            for i in range(len(text) - length + 1):
+                substring = text[i:i + length]
+                if substring in self.terms:
+                    found.add(substring)
+        return found
+
+
+class PostingsView(Mapping):
+    """CSR 배열(어휘별 시작 위치, 섹션 번호, 등장 횟수)을 term -> {섹션 번호: 등장 횟수}처럼 읽는 뷰
+
+    스냅샷의 메모리 맵 배열을 그대로 쓰며, 조회한 어휘의 포스팅만 딕셔너리로 만든다.
+    """
+
+    def __init__(self, terms: List[str], indptr, doc_ids, counts):
+        self.terms = terms
+        self.columns = {term: col for col, term in enumerate(terms)}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.counts = counts
+
+    def __getitem__(self, term: str) -> Dict[int, int]:
+        col = self.columns[term]
+        start, end = int(self.indptr[col]), int(self.indptr[col + 1])
+        return dict(zip(self.doc_ids[start:end].tolist(), self.counts[start:end].tolist()))
+
+    def __contains__(self, term) -> bool:
+        return term in self.columns
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+class SectionIndex:
+    """섹션 필드(제목/키워드/본문)별 역색인
+
+    매뉴얼 로드 시 한 번만 만들고, 질의 시에는 질의 토큰이 등장하는 섹션만 점수를 계산한다.
+    본문 점수는 기존처럼 부분 문자열 등장 횟수 기반이므로, 본문 포스팅은 길이 필터 없이
+    모든 원시 토큰을 담는다 (질의 토큰은 토큰 문자만으로 이루어져 있어 원시 토큰 경계를 넘지 않음).
+    """
+
+    def __init__(self):
+        self.section_count = 0
+
+        # 필드별 포스팅: term -> {섹션 번호: 등장 횟수}
+        self.title_postings: Dict[str, Dict[int, int]] = {}
+        self.keyword_postings: Dict[str, Dict[int, int]] = {}
+        self.content_postings: Dict[str, Dict[int, int]] = {}
+
+        # 점수 정규화용 섹션별 정보
+        self.has_title: List[bool] = []
+        self.keyword_counts: List[int] = []
+        self.content_lengths: List[int] = []
+
+        # 제목/키워드 부분 일치용 n-gram 색인
+        self.title_ngrams = NgramIndex()
+        self.keyword_ngrams = NgramIndex()
+
+        # 본문 어휘 부분 문자열 탐색용 ('\n'으로 이어 붙인 어휘와 각 어휘 시작 위치)
+        self._content_terms: List[str] = []
+        self._content_blob = ""
+        self._content_offsets: List[int] = []
+
+    def build(self, sections: List[Dict[str, Any]], content_term_counts: Optional[List[Mapping]] = None):
+        """sections_data 목록으로 역색인 생성 (본문 어휘 빈도는 포스팅에만 남김)
+
+        content_term_counts가 있으면 섹션별 본문 어휘 빈도를 다시 토큰화하지 않고 사용한다
+        (SimpleSearchService가 문단 색인용으로 센 문단별 빈도의 합, 빌드 중에만 존재).
+        """
+        self.__init__()
+
+        for doc_id, section in enumerate(sections):
+            title = section.get("title", "")
+            keywords = section.get("keywords", []) or []
+            content = section.get("content", "")
+
+            self.has_title.append(bool(title))
+            for term in set(tokenize(title)):
+                self.title_postings.setdefault(term, {})[doc_id] = 1
+
+            self.keyword_counts.append(len(keywords))
+            for keyword, tf in Counter(k.lower() for k in keywords).items():
+                self.keyword_postings.setdefault(keyword, {})[doc_id] = tf
+
+            self.content_lengths.append(len(content))
+            if content:
+                if content_term_counts is not None:
+                    term_counts = content_term_counts[doc_id]
+                else:
+                    term_counts = Counter(TOKEN_PATTERN.findall(content.lower()))
+                for term, tf in term_counts.items():
+                    self.content_postings.setdefault(term, {})[doc_id] = tf
+
+        self.section_count = len(sections)
+        self._build_lookups()
+
+    def load(self, title_postings: Mapping, keyword_postings: Mapping, content_postings: Mapping,
+             has_title: List[bool], keyword_counts: List[int], content_lengths: List[int]):
+        """미리 만든 포스팅(스냅샷의 PostingsView 등)으로 색인 구성"""
+        self.__init__()
+
+        self.title_postings = title_postings
+        self.keyword_postings = keyword_postings
+        self.content_postings = content_postings
+        self.has_title = has_title
+        self.keyword_counts = keyword_counts
+        self.content_lengths = content_lengths
+        self.section_count = len(has_title)
+        self._build_lookups()
+
+    def _build_lookups(self):
+        """포스팅으로 부분 일치용 n-gram 색인과 본문 어휘 문자열 생성"""
+        self.title_ngrams.build(self.title_postings)
+        self.keyword_ngrams.build(self.keyword_postings)
+
+        self._content_terms = list(self.content_postings)
+        self._content_offsets = []
+        offset = 0
+        for term in self._content_terms:
+            self._content_offsets.append(offset)
+            offset += len(term) + 1
+        self._content_blob = "\n".join(self._content_terms)
+
+    def title_scores(self, query_words: Set[str]) -> Dict[int, float]:
+        """제목 점수: 완전 일치 1점 + 부분 일치(포함 관계) 0.5점, 질의 토큰 수로 정규화"""
+        matches: Dict[int, float] = {}
+
+        for q_word in query_words:
+            for doc_id in self.title_postings.get(q_word, ()):
+                matches[doc_id] = matches.get(doc_id, 0) + 1
+
+            partial_docs = set()
+            for term in self.related_title_terms(q_word):
+                partial_docs.update(self.title_postings[term])
+            for doc_id in partial_docs:
+                matches[doc_id] = matches.get(doc_id, 0) + 0.5
+
+        denominator = max(len(query_words), 1)
+        return {
+            doc_id: min(total / denominator, 1.0)
+            for doc_id, total in matches.items()
+            if self.has_title[doc_id]
+        }
+
+    def keyword_scores(self, query_lower: str, query_tokens: List[str]) -> Dict[int, float]:
+        """키워드 점수: 질의에 키워드 포함 1점, 키워드에 질의 토큰 포함 0.5점"""
+        matches: Dict[int, float] = {}
+        for keyword, weight in self.keyword_weights(query_lower, query_tokens).items():
+            for doc_id, tf in self.keyword_postings[keyword].items():
+                matches[doc_id] = matches.get(doc_id, 0) + weight * tf
+
+        return {
+            doc_id: min(total / max(self.keyword_counts[doc_id], 1), 1.0)
+            for doc_id, total in matches.items()
+        }
+
+    def content_scores(self, query_words: List[str]) -> Dict[int, float]:
+        """본문 점수: 질의 토큰 등장 횟수(3글자 이상은 1.5배)를 본문 길이 100자당으로 정규화"""
+        matches: Dict[int, float] = {}
+        for term, weight in self.content_term_weights(query_words).items():
+            for doc_id, tf in self.content_postings[term].items():
+                matches[doc_id] = matches.get(doc_id, 0) + tf * weight
+
+        return {
+            doc_id: min(total / (self.content_lengths[doc_id] / 100), 1.0)
+            for doc_id, total in matches.items()
+            if self.content_lengths[doc_id] > 0
+        }
+
+    def related_title_terms(self, word: str) -> Set[str]:
+        """word를 포함하거나 word에 포함되는 제목 어휘"""
+        return self.title_ngrams.terms_containing(word) | self.title_ngrams.terms_within(word)
+
+    def keyword_weights(self, query_lower: str, query_tokens: List[str]) -> Dict[str, float]:
+        """질의와 일치하는 키워드별 가중치 (1 또는 0.5)"""
+        weights = dict.fromkeys(self.keyword_ngrams.terms_within(query_lower), 1)
+        for word in query_tokens:
+            for keyword in self.keyword_ngrams.terms_containing(word):
+                weights.setdefault(keyword, 0.5)
+        return weights
+
+    def content_term_weights(self, query_words: List[str]) -> Dict[str, float]:
+        """본문 어휘별 가중치: 어휘 안의 질의 토큰 등장 횟수 × 토큰 가중치"""
+        return {self._content_terms[term_id]: weight for term_id, weight in self.content_term_id_weights(query_words).items()}
+
+    def content_term_id_weights(self, query_words: List[str]) -> Dict[int, float]:
+        """content_term_weights와 같은 가중치를 본문 어휘 번호(본문 포스팅 순서)로 반환 (문단 색인용)"""
+        weights: Dict[int, float] = {}
+        for word in query_words:
+            weight = 1.5 if len(word) >= 3 else 1
+            for term_id, occurrences in self._terms_containing(word):
+                weights[term_id] = weights.get(term_id, 0) + occurrences * weight
+        return weights
+
+    def content_term_ids(self) -> Dict[str, int]:
+        """본문 어휘 -> 어휘 번호 (문단 색인 생성 때만 잠깐 쓰는 사본)"""
+        return {term: term_id for term_id, term in enumerate(self._content_terms)}
+
+    def _terms_containing(self, word: str) -> List[tuple]:
+        """word를 부분 문자열로 포함하는 본문 어휘 번호와 어휘 내 등장 횟수"""
+        if not word:
+            return []
+
+        results = []
+        blob = self._content_blob
+        position = blob.find(word)
+        while position != -1:
+            term_id = bisect_right(self._content_offsets, position) - 1
+            term = self._content_terms[term_id]
+            results.append((term_id, term.count(word)))
+
+            # 같은 어휘 안의 나머지 등장은 count로 이미 반영됨
+            position = blob.find(word, self._content_offsets[term_id] + len(term) + 1)
+
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """색인 통계 정보"""
+        return {
+            "sections": self.section_count,
+            "title_terms": len(self.title_postings),
+            "keyword_terms": len(self.keyword_postings),
+            "content_terms": len(self.content_postings),
+            "title_ngrams": len(self.title_ngrams.grams),
+            "keyword_ngrams": len(self.keyword_ngrams.grams)
+        }
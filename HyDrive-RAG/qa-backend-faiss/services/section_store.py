@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from typing import Any, Dict, Iterable
+
+
+class StoredSection:
+    """본문 하나의 공유 데이터 (원문, 본문 기반 보너스 플래그)
+
+    본문 어휘 빈도는 보관하지 않는다. 매뉴얼 역색인이 같은 빈도를 포스팅으로 들고 있어 두 벌이 되기 때문.
+    """
+
+    __slots__ = ("content", "is_procedure", "is_repair", "refs")
+
+    def __init__(self, content: str):
+        self.content = content
+
+        content_lower = content.lower()
+        self.is_procedure = any(word in content_lower for word in ["방법", "절차", "단계", "하십시오", "순서"])
+        self.is_repair = any(word in content_lower for word in ["점검", "확인", "교체", "정비", "수리"])
+        self.refs = 0
+
+
+class SectionStore:
+    """섹션 본문의 내용 주소(SHA-256) 저장소
+
+    그랜저 / 그랜저 Hybrid처럼 비슷한 매뉴얼이나 한 매뉴얼 안에서 반복되는 본문을
+    한 번만 보관하고, 보너스 플래그 같은 본문 분석도 고유 본문마다 한 번만 한다.
+    매뉴얼(검색 서비스)은 본문 키 목록만 들고 있으며, 참조가 모두 해제된 본문은 제거된다.
+    역색인 포스팅은 매뉴얼마다 따로 둔다: 어휘 -> (매뉴얼 안의 섹션 번호, 빈도) 목록이라
+    섹션 단위로 나눠 공유할 수 없고, 섹션별 어휘 빈도를 따로 공유하면 같은 빈도가 두 벌이 된다.
+    """
+
+    def __init__(self):
+        self._sections: Dict[str, StoredSection] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def add(self, content: str) -> str:
+        """본문 등록 (이미 있으면 참조 수만 증가) 후 키 반환"""
+        key = self.content_key(content)
+        with self._lock:
+            stored = self._sections.get(key)
+            if stored is not None:
+                self.hits += 1
+                stored.refs += 1
+                return key
+
+        # 본문 분석은 잠금 밖에서 (같은 본문이 동시에 들어오면 먼저 등록된 것을 사용)
+        created = StoredSection(content)
+        with self._lock:
+            stored = self._sections.setdefault(key, created)
+            if stored is created:
+                self.misses += 1
+            else:
+                self.hits += 1
+            stored.refs += 1
+        return key
+
+    def get(self, key: str) -> StoredSection:
+        return self._sections[key]
+
+    def release(self, keys: Iterable[str]):
+        """매뉴얼이 내려갈 때 본문 참조 해제"""
+        with self._lock:
+            for key in keys:
+                stored = self._sections.get(key)
+                if stored is None:
+                    continue
+                stored.refs -= 1
+                if stored.refs <= 0:
+                    del self._sections[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """저장소 통계 (references는 모든 매뉴얼의 섹션 수 합)"""
+        with self._lock:
+            sections = list(self._sections.values())
+        return {
+            "unique_sections": len(sections),
+            "references": sum(stored.refs for stored in sections),
+            "content_chars": sum(len(stored.content) for stored in sections),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# 프로세스 전체에서 공유하는 기본 저장소
+default_section_store = SectionStore()
@@ -0,0 +1,107 @@
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# sections_data 항목의 필드 (기존 섹션 딕셔너리와 같은 키/순서)
+SECTION_FIELDS = ("source", "section_number", "title", "page_range", "content", "keywords", "subsections")
+_RAGGED_FIELDS = ("page_range", "keywords", "subsections")
+
+
+def _pack_ragged(rows: List[List[Any]]) -> Tuple[Any, array]:
+    """섹션별 목록을 평평한 값 배열 + 시작 위치 배열로 (값이 모두 정수면 array('q'), 문자열은 intern)"""
+    flat = [value for row in rows for value in row]
+    offsets = array("I", [0])
+    for row in rows:
+        offsets.append(offsets[-1] + len(row))
+
+    if all(type(value) is int for value in flat):
+        return array("q", flat), offsets
+    return [sys.intern(value) if type(value) is str else value for value in flat], offsets
+
+
+class SectionView(Mapping):
+    """SectionTable의 섹션 하나를 섹션 딕셔너리처럼 읽는 뷰 (필드는 읽을 때 꺼냄)"""
+
+    __slots__ = ("_table", "doc_id")
+
+    def __init__(self, table: "SectionTable", doc_id: int):
+        self._table = table
+        self.doc_id = doc_id
+
+    def __getitem__(self, field: str) -> Any:
+        return self._table.field(self.doc_id, field)
+
+    def __iter__(self):
+        return iter(SECTION_FIELDS)
+
+    def __len__(self) -> int:
+        return len(SECTION_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"SectionView({self.doc_id}, {self['title']!r})"
+
+
+class SectionTable(Sequence):
+    """매뉴얼 섹션 목록의 열 단위 저장소 (sections_data)
+
+    섹션마다 7개 키 딕셔너리와 목록 객체를 두는 대신, 제목은 텍스트 버퍼 하나와 시작 위치 배열,
+    페이지 범위/키워드 같은 목록 필드는 평평한 배열과 시작 위치 배열로 보관하고,
+    본문은 넘겨받은 문자열(SectionStore가 공유하는 원문)을 참조만 한다.
+    인덱싱하면 SectionView를 돌려주므로 기존 section["title"] 형태의 코드가 그대로 동작하며,
+    결과 딕셔너리는 상위 k개만 만든다.
+    """
+
+    def __init__(self, source: str, sections: Iterable[Dict[str, Any]], contents: Optional[List[str]] = None):
+        sections = list(sections)
+        self.source = sys.intern(source)
+        self.section_numbers = [section.get("section_number", "") for section in sections]
+        self.contents = contents if contents is not None else [section.get("content", "") for section in sections]
+
+        titles = [section.get("title", "") for section in sections]
+        self._title_offsets = array("I", [0])
+        for title in titles:
+            self._title_offsets.append(self._title_offsets[-1] + len(title))
+        self._title_buffer = "".join(titles)
+
+        # 목록이 아닌 값(필드가 없을 때의 "" 등)은 원래 값 그대로 예외 목록에 보관
+        self._irregular: Dict[Tuple[str, int], Any] = {}
+        self._ragged: Dict[str, Tuple[Any, array]] = {}
+        defaults = {"page_range": "", "keywords": [], "subsections": []}
+        for field in _RAGGED_FIELDS:
+            rows = []
+            for doc_id, section in enumerate(sections):
+                value = section.get(field, defaults[field])
+                if isinstance(value, list):
+                    rows.append(value)
+                else:
+                    rows.append([])
+                    self._irregular[(field, doc_id)] = value
+            self._ragged[field] = _pack_ragged(rows)
+
+    def field(self, doc_id: int, field: str) -> Any:
+        """섹션 하나의 필드 값 (목록 필드는 새 list로 반환)"""
+        if field == "content":
+            return self.contents[doc_id]
+        if field == "title":
+            return self._title_buffer[self._title_offsets[doc_id]:self._title_offsets[doc_id + 1]]
+        if field == "section_number":
+            return self.section_numbers[doc_id]
+        if field == "source":
+            return self.source
+        if field in self._ragged:
+            if (field, doc_id) in self._irregular:
+                return self._irregular[(field, doc_id)]
+            values, offsets = self._ragged[field]
+            return list(values[offsets[doc_id]:offsets[doc_id + 1]])
+        raise KeyError(field)
+
+    def __getitem__(self, doc_id: int) -> SectionView:
+        if doc_id < 0:
+            doc_id += len(self)
+        if not 0 <= doc_id < len(self):
+            raise IndexError(doc_id)
+        return SectionView(self, doc_id)
+
+    def __len__(self) -> int:
+        return len(self.section_numbers)
@@ -1,13 +1,29 @@
-import json
-import re
-from typing import List, Dict, Any
+import asyncio
+from collections import Counter
+from itertools import chain
+from typing import List, Dict, Any, Tuple
 from pathlib import Path
 
+from services.passage_index import PassageIndex, passage_term_counts
+from services.search_index import SectionIndex, tokenize
+from services.section_store import SectionStore, default_section_store
+from services.section_table import SectionTable
+from utils.memory import estimate_memory
+
 class SimpleSearchService:
-    def __init__(self, data_path: str = "./data/processed/"):
+    SCORE_THRESHOLD = 0.05
+    
+    def __init__(self, data_path: str = "./data/processed/", section_store: SectionStore = None):
         self.data_path = Path(data_path)
         self.documents = []
         self.sections_data = []
+        self.section_store = section_store or default_section_store
+        self.section_keys = []  # 섹션별 본문 키 (SectionStore)
+        self.index = SectionIndex()
+        self.passage_index = PassageIndex()  # 프롬프트 문맥용 문단 단위 색인
+        self._procedure_sections = set()
+        self._repair_sections = set()
+        self._important_title_sections = set()
         
     def add_document(self, json_data: Dict[str, Any]):
         """새 JSON 문서 추가"""
@@ -15,7 +31,8 @@ class SimpleSearchService:
             print("❌ sections 필드가 없습니다.")
             return
             
-        self.documents = [json_data]
+        # 섹션 본문은 SectionStore가 보관하므로 문서 정보에는 sections를 두지 않음
+        self.documents = [{key: value for key, value in json_data.items() if key != "sections"}]
         vehicle_name = self._extract_vehicle_name_from_data(json_data)
         sections_count = len(json_data.get("sections", []))
         
@@ -24,26 +41,51 @@ class SimpleSearchService:
         # 섹션 데이터 준비
         self._prepare_sections_data(json_data)
     
+    def load_snapshot(self, snapshot):
+        """컴파일된 매뉴얼 스냅샷 로드 (JSON 파싱과 색인 생성 없이 메모리 맵 배열을 그대로 사용)"""
+        # 검색 시에는 file_name만 쓰므로 원본 JSON 대신 요약 정보만 보관
+        self.release()
+        self.documents = [{"file_name": snapshot.file_name}]
+        self.sections_data = snapshot.sections
+        self.index = snapshot.build_index()
+        self.passage_index = snapshot.build_passage_index()
+        self._procedure_sections, self._repair_sections, self._important_title_sections = snapshot.bonus_flags()
+        
+        print(f"🗂️ {self._extract_vehicle_name_from_data(self.documents[0])} 스냅샷 로드: {len(self.sections_data)}개 섹션 ({snapshot.path.name})")
+    
     def _prepare_sections_data(self, json_data: Dict[str, Any]):
         """섹션 데이터를 검색 가능한 형태로 준비"""
-        self.sections_data = []
-        
-        for section in json_data.get("sections", []):
-            section_data = {
-                "source": json_data.get("file_name", "unknown"),
-                "section_number": section.get("section_number", ""),
-                "title": section.get("title", ""),
-                "page_range": section.get("page_range", ""),
-                "content": section.get("content", ""),
-                "keywords": section.get("keywords", []),
-                "subsections": section.get("subsections", [])
-            }
-            self.sections_data.append(section_data)
-        
-        print(f"✅ {len(self.sections_data)}개 섹션 데이터 준비 완료")
+        previous_keys = self.section_keys
+        sections = json_data.get("sections", [])
+        
+        # 같은 본문은 매뉴얼이 달라도 SectionStore의 원문/분석 결과 하나를 공유
+        self.section_keys = [self.section_store.add(section.get("content", "")) for section in sections]
+        contents = [self.section_store.get(key).content for key in self.section_keys]
+        
+        # 섹션별 딕셔너리 대신 열 단위 테이블 (검색 결과 딕셔너리는 상위 k개만 생성)
+        self.sections_data = SectionTable(json_data.get("file_name", "unknown"), sections, contents)
+        
+        self.section_store.release(previous_keys)
+        
+        # 🚀 질의마다 전체 섹션을 훑지 않도록 역색인과 보너스 플래그를 한 번만 생성
+        # 본문은 문단 단위로 한 번만 토큰화해 문단 색인과 본문 포스팅(문단 빈도의 합, 같은 어휘 번호 사용)에 함께 씀
+        section_passages = [passage_term_counts(content) for content in contents]
+        content_term_counts = [
+            Counter(chain.from_iterable(term_counts.elements() for _, _, term_counts in passages))
+            for passages in section_passages
+        ]
+        self.index.build(self.sections_data, content_term_counts)
+        self.passage_index.build(section_passages, self.index.content_term_ids())
+        self._prepare_bonus_flags()
+        
+        print(f"✅ {len(self.sections_data)}개 섹션 데이터 준비 완료 (색인 어휘 {len(self.index.content_postings)}개, 문단 {len(self.passage_index.passage_starts)}개)")
     
-    def search_sections(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """키워드 기반 섹션 검색"""
+    def search_sections(self, query: str, k: int = 5, query_embedding: Any = None) -> List[Dict[str, Any]]:
+        """키워드 기반 섹션 검색 (역색인으로 질의 토큰이 등장하는 섹션만 점수 계산)
+
+        query_embedding은 임베딩으로 재순위하는 백엔드(HybridSearchService)가 미리 계산한 질의 임베딩이며
+        어휘 점수만 쓰는 검색에서는 무시된다.
+        """
         
         if not self.documents or not self.sections_data:
             print("⚠️ 로드된 문서나 섹션 데이터가 없습니다")
@@ -52,47 +94,71 @@ class SimpleSearchService:
         vehicle_name = self._extract_vehicle_name_from_data(self.documents[0])
         print(f"🔍 {vehicle_name} 매뉴얼 키워드 검색 시작: '{query}'")
         
-        search_results = []
+        matched_count, ranked = self._rank_sections(query, k, query_embedding)
+        search_results = [self._build_result(doc_id, total_score, scores) for doc_id, total_score, scores in ranked]
+        self._attach_passages(query, ranked, search_results)
+        
+        print(f"📊 {vehicle_name} 검색 결과: {matched_count}개 섹션 (키워드 매칭)")
+        for i, result in enumerate(search_results[:3]):
+            print(f"  {i+1}. [{result['score']:.3f}] {result['title']} (페이지 {result['page_range']})")
         
-        # 각 섹션에 대해 점수 계산
-        for section_data in self.sections_data:
-            scores = self._calculate_all_scores(query, section_data)
+        return search_results
+    
+    async def search_sections_async(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """search_sections를 스레드에서 실행 (API 이벤트 루프를 막지 않음)"""
+        return await asyncio.to_thread(self.search_sections, query, k)
+    
+    def _rank_sections(self, query: str, k: int, query_embedding: Any = None) -> Tuple[int, List[Tuple[int, float, Dict[str, float]]]]:
+        """임계값을 넘은 섹션 수와 상위 k개 (섹션 번호, 종합 점수, 필드별 점수)"""
+        field_scores = self._calculate_field_scores(query)
+        ranked = []
+        
+        # 후보 섹션만 원래 순서대로 점수 계산 (동점 시 순서 유지)
+        for doc_id in sorted(set().union(*field_scores.values())):
+            scores = {field: matches.get(doc_id, 0) for field, matches in field_scores.items()}
             total_score = self._calculate_total_score(scores)
             
-            if total_score > 0.05:  # 임계값
-                search_results.append({
-                    "score": total_score,
-                    "source": section_data["source"],
-                    "section_number": section_data["section_number"],
-                    "title": section_data["title"],
-                    "page_range": section_data["page_range"],
-                    "content": section_data["content"],
-                    "keywords": section_data["keywords"],
-                    "subsections": section_data["subsections"],
-                    "match_details": {
-                        "title_score": round(scores["title"], 3),
-                        "keyword_score": round(scores["keyword"], 3),
-                        "content_score": round(scores["content"], 3),
-                        "bonus_score": round(scores["bonus"], 3)
-                    }
-                })
+            if total_score > self.SCORE_THRESHOLD:
+                ranked.append((doc_id, total_score, scores))
         
         # 점수순 정렬
-        search_results.sort(key=lambda x: x["score"], reverse=True)
-        
-        print(f"📊 {vehicle_name} 검색 결과: {len(search_results)}개 섹션 (키워드 매칭)")
-        for i, result in enumerate(search_results[:3]):
-            print(f"  {i+1}. [{result['score']:.3f}] {result['title']} (페이지 {result['page_range']})")
-        
-        return search_results[:k]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return len(ranked), ranked[:k]
+    
+    def _attach_passages(self, query: str, ranked: List[Tuple[int, float, Dict[str, float]]], search_results: List[Dict[str, Any]]):
+        """결과 섹션마다 본문 문단 목록과 문단별 질의 관련도 추가 (답변 프롬프트 문맥 구성용)"""
+        term_weights = self.index.content_term_id_weights(self._tokenize(query))
+        for (doc_id, _, _), result in zip(ranked, search_results):
+            result["passages"] = self.passage_index.section_passages(doc_id, result["content"], term_weights)
+    
+    def _build_result(self, doc_id: int, total_score: float, scores: Dict[str, float]) -> Dict[str, Any]:
+        """검색 결과 딕셔너리 생성"""
+        section_data = self.sections_data[doc_id]
+        return {
+            "score": total_score,
+            "source": section_data["source"],
+            "section_number": section_data["section_number"],
+            "title": section_data["title"],
+            "page_range": section_data["page_range"],
+            "content": section_data["content"],
+            "keywords": section_data["keywords"],
+            "subsections": section_data["subsections"],
+            "match_details": {
+                "title_score": round(scores["title"], 3),
+                "keyword_score": round(scores["keyword"], 3),
+                "content_score": round(scores["content"], 3),
+                "bonus_score": round(scores["bonus"], 3)
+            }
+        }
     
-    def _calculate_all_scores(self, query: str, section_data: Dict) -> Dict[str, float]:
-        """모든 점수 계산"""
+    def _calculate_field_scores(self, query: str) -> Dict[str, Dict[int, float]]:
+        """필드별 점수 계산 (섹션 번호 -> 점수, 0점 섹션은 제외)"""
+        query_words = self._tokenize(query)
         return {
-            "title": self._calculate_title_score(query, section_data["title"]),
-            "keyword": self._calculate_keyword_score(query, section_data["keywords"]),
-            "content": self._calculate_content_score(query, section_data["content"]),
-            "bonus": self._calculate_bonus_score(query, section_data)
+            "title": self.index.title_scores(set(query_words)),
+            "keyword": self.index.keyword_scores(query.lower(), query_words),
+            "content": self.index.content_scores(query_words),
+            "bonus": self._calculate_bonus_scores(query)
         }
     
     def _calculate_total_score(self, scores: Dict[str, float]) -> float:
@@ -100,107 +166,65 @@ class SimpleSearchService:
         return (scores["title"] * 0.4) + (scores["keyword"] * 0.3) + \
                (scores["content"] * 0.2) + (scores["bonus"] * 0.1)
     
-    def _calculate_title_score(self, query: str, title: str) -> float:
-        """제목 매칭 점수"""
-        if not title:
-            return 0
-        
-        query_words = set(self._tokenize(query))
-        title_words = set(self._tokenize(title))
-        
-        # 완전 매칭
-        exact_matches = len(query_words.intersection(title_words))
-        
-        # 부분 매칭
-        partial_matches = 0
-        for q_word in query_words:
-            for t_word in title_words:
-                if q_word in t_word or t_word in q_word:
-                    partial_matches += 0.5
-                    break
-        
-        total_matches = exact_matches + partial_matches
-        return min(total_matches / max(len(query_words), 1), 1.0)
-    
-    def _calculate_keyword_score(self, query: str, keywords: List[str]) -> float:
-        """키워드 매칭 점수"""
-        if not keywords:
-            return 0
-        
-        query_lower = query.lower()
-        matches = 0
-        
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            if keyword_lower in query_lower:
-                matches += 1
-            elif any(word in keyword_lower for word in self._tokenize(query)):
-                matches += 0.5
-        
-        return min(matches / max(len(keywords), 1), 1.0)
-    
-    def _calculate_content_score(self, query: str, content: str) -> float:
-        """콘텐츠 매칭 점수"""
-        if not content:
-            return 0
-        
-        content_lower = content.lower()
-        query_words = self._tokenize(query)
-        
-        # 단어별 매칭 횟수 계산
-        total_matches = 0
-        for word in query_words:
-            # 완전 매칭
-            exact_count = content_lower.count(word.lower())
-            total_matches += exact_count
-            
-            # 부분 매칭 (길이 3 이상인 단어만)
-            if len(word) >= 3:
-                partial_count = len(re.findall(rf'{re.escape(word.lower())}', content_lower))
-                total_matches += partial_count * 0.5
-        
-        # 콘텐츠 길이로 정규화
-        content_length = len(content)
-        if content_length > 0:
-            return min(total_matches / (content_length / 100), 1.0)
-        
-        return 0
-    
-    def _calculate_bonus_score(self, query: str, section: Dict) -> float:
-        """보너스 점수"""
-        content = section.get("content", "").lower()
-        title = section.get("title", "").lower()
+    def _calculate_bonus_scores(self, query: str) -> Dict[int, float]:
+        """보너스 점수 (섹션별 플래그는 색인 시 미리 계산)"""
         query_lower = query.lower()
-        bonus = 0
-        
-        # 방법, 절차 관련 보너스
-        if any(word in query_lower for word in ["방법", "절차", "어떻게", "how"]):
-            if any(word in content for word in ["방법", "절차", "단계", "하십시오", "순서"]):
+        wants_procedure = any(word in query_lower for word in ["방법", "절차", "어떻게", "how"])
+        wants_repair = any(word in query_lower for word in ["문제", "오류", "고장", "안됨", "작동"])
+        
+        candidates = set(self._important_title_sections)
+        if wants_procedure:
+            candidates |= self._procedure_sections
+        if wants_repair:
+            candidates |= self._repair_sections
+        
+        bonuses = {}
+        for doc_id in candidates:
+            bonus = 0
+            if wants_procedure and doc_id in self._procedure_sections:
                 bonus += 0.3
-        
-        # 문제 해결 관련 보너스
-        if any(word in query_lower for word in ["문제", "오류", "고장", "안됨", "작동"]):
-            if any(word in content for word in ["점검", "확인", "교체", "정비", "수리"]):
+            if wants_repair and doc_id in self._repair_sections:
                 bonus += 0.2
+            if doc_id in self._important_title_sections:
+                bonus += 0.1
+            bonuses[doc_id] = min(bonus, 1.0)
         
-        # 제목에 중요 키워드가 있는 경우
-        if any(word in title for word in ["안전", "주의", "경고", "중요"]):
-            bonus += 0.1
-        
-        return min(bonus, 1.0)
+        return bonuses
+    
+    def _prepare_bonus_flags(self):
+        """보너스 점수용 섹션 플래그 계산"""
+        self._procedure_sections = set()
+        self._repair_sections = set()
+        self._important_title_sections = set()
+        
+        for doc_id, section in enumerate(self.sections_data):
+            # 본문 기반 플래그는 SectionStore에서 고유 본문마다 한 번만 계산
+            stored = self.section_store.get(self.section_keys[doc_id])
+            title = section["title"].lower()
+            
+            if stored.is_procedure:
+                self._procedure_sections.add(doc_id)
+            if stored.is_repair:
+                self._repair_sections.add(doc_id)
+            if any(word in title for word in ["안전", "주의", "경고", "중요"]):
+                self._important_title_sections.add(doc_id)
+    
+    def release(self):
+        """SectionStore 본문 참조 해제 (매뉴얼을 교체하거나 내릴 때, 진행 중인 검색은 기존 데이터로 계속됨)"""
+        self.section_store.release(self.section_keys)
+        self.section_keys = []
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """이 서비스가 잡고 있는 메모리 추정 (heap_bytes: 파이썬 객체와 배열, mapped_bytes: 스냅샷 메모리 맵)
+
+        공유 SectionStore는 제외하지만, sections_data가 참조하는 본문 문자열은 매뉴얼마다 센다.
+        """
+        heap_bytes, mapped_bytes = estimate_memory(self, exclude=[self.section_store])
+        return {"heap_bytes": heap_bytes, "mapped_bytes": mapped_bytes}
     
     def _tokenize(self, text: str) -> List[str]:
         """텍스트를 토큰으로 분리"""
-        if not text:
-            return []
-        
-        # 한글, 영문, 숫자만 추출
-        tokens = re.findall(r'[가-힣a-zA-Z0-9]+', text.lower())
-        
-        # 길이 1인 토큰 제거 (단, 숫자는 유지)
-        tokens = [token for token in tokens if len(token) > 1 or token.isdigit()]
-        
-        return tokens
+        return tokenize(text)
     
     def _extract_vehicle_name_from_data(self, json_data: Dict[str, Any]) -> str:
         """JSON 데이터에서 차량명 추출"""
@@ -228,5 +252,8 @@ class SimpleSearchService:
         return {
             "documents_count": len(self.documents),
             "total_sections": len(self.sections_data),
-            "search_method": "keyword_matching"
+            "search_method": "keyword_matching",
+            "index": self.index.get_stats(),
+            "passages": self.passage_index.get_stats(),
+            "unique_contents": len(set(self.section_keys))
         }
\ No newline at end of file
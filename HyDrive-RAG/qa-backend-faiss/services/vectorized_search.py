@@ -0,0 +1,200 @@
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from services.search_index import PostingsView
+from services.simple_search import SimpleSearchService
+
+
+class FieldMatrix:
+    """필드별 희소 문서-어휘 행렬 (CSC 형식: 어휘 열마다 섹션 번호/빈도 배열)"""
+
+    def __init__(self, postings: Dict[str, Dict[int, int]], section_count: int):
+        self.section_count = section_count
+
+        # 스냅샷 포스팅은 이미 CSR 배열이므로 그대로 사용
+        if isinstance(postings, PostingsView):
+            self.columns = postings.columns
+            self.indptr = np.asarray(postings.indptr, dtype=np.int64)
+            self.indices = np.asarray(postings.doc_ids, dtype=np.int32)
+            self.data = np.asarray(postings.counts, dtype=np.float64)
+            return
+
+        self.columns = {term: col for col, term in enumerate(postings)}
+
+        self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        rows, values = [], []
+        for col, doc_tf in enumerate(postings.values()):
+            rows.extend(doc_tf.keys())
+            values.extend(doc_tf.values())
+            self.indptr[col + 1] = len(rows)
+
+        self.indices = np.asarray(rows, dtype=np.int32)
+        self.data = np.asarray(values, dtype=np.float64)
+
+    def gather(self, terms: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """질의 어휘 열의 항목만 모아서 (섹션 번호, 빈도, terms 내 어휘 위치) 배열로 반환"""
+        cols = np.fromiter((self.columns[term] for term in terms), dtype=np.int64, count=len(terms))
+        starts = self.indptr[cols]
+        lengths = self.indptr[cols + 1] - starts
+
+        # 각 열 구간을 이어 붙인 위치 배열 (열 시작 위치 + 구간 내 오프셋)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        owners = np.repeat(np.arange(len(terms)), lengths)
+
+        return self.indices[offsets], self.data[offsets], owners
+
+    def dot(self, weights: Dict[str, float]) -> np.ndarray:
+        """행렬 × 희소 질의 벡터 (질의 어휘 열만 읽음)"""
+        rows, values, owners = self.gather(list(weights))
+        term_weights = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        return np.bincount(rows, weights=values * term_weights[owners], minlength=self.section_count)
+
+
+class VectorizedSearchService(SimpleSearchService):
+    """SimpleSearchService와 같은 가중치를 쓰는 벡터화 검색 백엔드
+
+    필드별 희소 행렬과 질의 벡터의 곱으로 모든 섹션 점수를 한 번에 계산하고,
+    np.partition으로 상위 k개 후보만 골라 정렬한다.
+    content_scoring="legacy"면 기존 본문 점수와 동일하고, "bm25"면 본문 필드를 BM25로 계산한다.
+    """
+
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self, data_path: str = "./data/processed/", content_scoring: str = "legacy"):
+        if content_scoring not in ("legacy", "bm25"):
+            raise ValueError(f"지원하지 않는 본문 점수 방식입니다: {content_scoring}")
+
+        super().__init__(data_path)
+        self.content_scoring = content_scoring
+        self.title_matrix = None
+        self.keyword_matrix = None
+        self.content_matrix = None
+
+    def _prepare_sections_data(self, json_data: Dict[str, Any]):
+        """섹션 데이터 준비 후 필드별 희소 행렬 생성"""
+        super()._prepare_sections_data(json_data)
+        self._build_matrices()
+
+    def load_snapshot(self, snapshot):
+        """스냅샷 로드 후 필드별 희소 행렬 생성"""
+        super().load_snapshot(snapshot)
+        self._build_matrices()
+
+    def _build_matrices(self):
+        """색인 포스팅으로 필드별 희소 행렬과 정규화/보너스 벡터 생성"""
+        count = len(self.sections_data)
+        self.title_matrix = FieldMatrix(self.index.title_postings, count)
+        self.keyword_matrix = FieldMatrix(self.index.keyword_postings, count)
+        self.content_matrix = FieldMatrix(self.index.content_postings, count)
+
+        self._has_title = np.asarray(self.index.has_title, dtype=bool)
+        self._keyword_counts = np.maximum(np.asarray(self.index.keyword_counts, dtype=np.float64), 1)
+        self._content_lengths = np.asarray(self.index.content_lengths, dtype=np.float64)
+
+        self._procedure_flags = self._flags_to_array(self._procedure_sections, count)
+        self._repair_flags = self._flags_to_array(self._repair_sections, count)
+        self._important_title_flags = self._flags_to_array(self._important_title_sections, count)
+
+        # BM25용 본문 어휘 IDF와 섹션별 토큰 수
+        document_frequency = np.diff(self.content_matrix.indptr)
+        self._content_idf = np.log1p((count - document_frequency + 0.5) / (document_frequency + 0.5))
+        self._token_counts = np.bincount(self.content_matrix.indices, weights=self.content_matrix.data, minlength=count)
+        self._average_token_count = max(self._token_counts.mean(), 1.0) if count else 1.0
+
+    def _rank_sections(self, query: str, k: int, query_embedding: np.ndarray = None) -> Tuple[int, List[Tuple[int, float, Dict[str, float]]]]:
+        """모든 섹션 점수를 벡터로 계산한 뒤 상위 k개 선택"""
+        fields = self._calculate_field_vectors(query)
+        total = self._calculate_total_score(fields)
+
+        matched = np.flatnonzero(total > self.SCORE_THRESHOLD)
+        if matched.size > k:
+            # k번째 점수와 동점인 섹션까지 포함해 SimpleSearchService와 같은 순서를 보장
+            kth_score = np.partition(total[matched], matched.size - k)[matched.size - k]
+            candidates = matched[total[matched] >= kth_score]
+        else:
+            candidates = matched
+
+        order = candidates[np.lexsort((candidates, -total[candidates]))][:k]
+        ranked = [
+            (int(doc_id), float(total[doc_id]), {field: float(values[doc_id]) for field, values in fields.items()})
+            for doc_id in order
+        ]
+        return int(matched.size), ranked
+
+    def _calculate_field_vectors(self, query: str) -> Dict[str, np.ndarray]:
+        """필드별 점수 벡터 계산"""
+        query_words = self._tokenize(query)
+        query_lower = query.lower()
+        return {
+            "title": self._title_vector(set(query_words)),
+            "keyword": self._keyword_vector(query_lower, query_words),
+            "content": self._content_vector(query_words),
+            "bonus": self._bonus_vector(query_lower)
+        }
+
+    def _title_vector(self, query_words: set) -> np.ndarray:
+        """제목 점수 벡터: 완전 일치 1점 + 부분 일치 0.5점"""
+        matches = np.zeros(len(self.sections_data))
+        for q_word in query_words:
+            if q_word in self.index.title_postings:
+                matches += self.title_matrix.dot({q_word: 1}) > 0
+
+            related = self.index.related_title_terms(q_word)
+            if related:
+                matches += 0.5 * (self.title_matrix.dot(dict.fromkeys(related, 1)) > 0)
+
+        scores = np.minimum(matches / max(len(query_words), 1), 1.0)
+        return np.where(self._has_title, scores, 0.0)
+
+    def _keyword_vector(self, query_lower: str, query_words: List[str]) -> np.ndarray:
+        """키워드 점수 벡터"""
+        weights = self.index.keyword_weights(query_lower, query_words)
+        return np.minimum(self.keyword_matrix.dot(weights) / self._keyword_counts, 1.0)
+
+    def _content_vector(self, query_words: List[str]) -> np.ndarray:
+        """본문 점수 벡터 (legacy: 100자당 등장 횟수, bm25: 최고점 기준 정규화 BM25)"""
+        weights = self.index.content_term_weights(query_words)
+        count = len(self.sections_data)
+
+        if self.content_scoring == "bm25":
+            terms = list(weights)
+            rows, tf, owners = self.content_matrix.gather(terms)
+            cols = np.fromiter((self.content_matrix.columns[term] for term in terms), dtype=np.int64, count=len(terms))
+            term_weights = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+
+            length_norm = 1 - self.BM25_B + self.BM25_B * self._token_counts[rows] / self._average_token_count
+            saturation = tf * (self.BM25_K1 + 1) / (tf + self.BM25_K1 * length_norm)
+            contributions = term_weights[owners] * self._content_idf[cols[owners]] * saturation
+            scores = np.bincount(rows, weights=contributions, minlength=count)
+
+            best = scores.max() if count else 0
+            return scores / best if best > 0 else scores
+
+        raw = self.content_matrix.dot(weights)
+        lengths = self._content_lengths
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.minimum(raw / (lengths / 100), 1.0)
+        return np.where(lengths > 0, scores, 0.0)
+
+    def _bonus_vector(self, query_lower: str) -> np.ndarray:
+        """보너스 점수 벡터"""
+        bonus = np.zeros(len(self.sections_data))
+        if any(word in query_lower for word in ["방법", "절차", "어떻게", "how"]):
+            bonus += 0.3 * self._procedure_flags
+        if any(word in query_lower for word in ["문제", "오류", "고장", "안됨", "작동"]):
+            bonus += 0.2 * self._repair_flags
+        bonus += 0.1 * self._important_title_flags
+        return np.minimum(bonus, 1.0)
+
+    @staticmethod
+    def _flags_to_array(doc_ids: set, count: int) -> np.ndarray:
+        flags = np.zeros(count)
+        flags[list(doc_ids)] = 1.0
+        return flags
+
+    def get_stats(self) -> Dict[str, Any]:
+        """통계 정보 반환"""
+        stats = super().get_stats()
+        stats["search_method"] = f"keyword_matching_vectorized ({self.content_scoring})"
+        return stats
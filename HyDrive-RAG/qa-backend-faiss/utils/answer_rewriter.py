@@ -0,0 +1,166 @@
+import re
+from typing import List, Tuple
+
+# 딱딱한 매뉴얼 어투 -> 친근한 어투 (리터럴 치환, 적용 순서 유지)
+# '주의하십시오', '확인하십시오'는 앞의 '하십시오' 치환에 먼저 걸리므로 따로 두지 않는다
+FRIENDLY_REPLACEMENTS: List[Tuple[str, str]] = [
+    ('해야 합니다', '해주세요'),
+    ('하십시오', '해보세요'),
+    ('하시기 바랍니다', '하시면 됩니다'),
+    ('반드시', '꼭'),
+    ('필수적으로', '꼭')
+]
+
+# 주의사항 강조 (트리거 단어, 패턴, 치환) - 이미 강조된 것은 제외
+WARNING_PATTERNS: List[Tuple[str, "re.Pattern", str]] = [
+    ('주의', re.compile(r'(?<!⚠️ \*\*)(주의[^.]*\.)'), r'⚠️ **주의:** \1'),
+    ('위험', re.compile(r'(?<!⚠️ \*\*)(위험[^.]*\.)'), r'⚠️ **위험:** \1'),
+    ('경고', re.compile(r'(?<!⚠️ \*\*)(경고[^.]*\.)'), r'⚠️ **경고:** \1'),
+    ('안전', re.compile(r'(?<!🛡️ \*\*)(안전[^.]*\.)'), r'🛡️ **안전:** \1'),
+    ('금지', re.compile(r'(?<!🚫 \*\*)(금지[^.]*\.)'), r'🚫 **금지:** \1')
+]
+
+# 중복된 경고 표시 정리 (리터럴 치환)
+CLEANUP_REPLACEMENTS: List[Tuple[str, str]] = [
+    ('⚠️ **주의:** ⚠️ **주의:**', '⚠️ **주의:**'),
+    ('⚠️ **위험:** ⚠️ **위험:**', '⚠️ **위험:**'),
+    ('⚠️ **경고:** ⚠️ **경고:**', '⚠️ **경고:**'),
+    ('🛡️ **안전:** 🛡️ **안전:**', '🛡️ **안전:**'),
+    ('🚫 **금지:** 🚫 **금지:**', '🚫 **금지:**'),
+    ('⚠️ **⚠️ **주의: 주의:**', '⚠️ **주의:**'),
+    ('⚠️ **⚠️ **경고: 경고:**', '⚠️ **경고:**'),
+    ('⚠️ **⚠️ **위험: 위험:**', '⚠️ **위험:**')
+]
+
+# 굵게 표시할 중요 키워드 (첫 단어, 패턴) - 앞 키워드가 감싼 부분은 뒤 키워드가 다시 잡지 않도록 순서 유지
+IMPORTANT_KEYWORDS: List[Tuple[str, "re.Pattern"]] = [
+    (pattern.split('\\')[0], re.compile(f'({pattern})'))
+    for pattern in [
+        r'적정\s*공기압', r'엔진\s*오일', r'브레이크\s*패드',
+        r'배터리', r'타이어', r'냉각수', r'필터',
+        r'점검\s*주기', r'교체\s*시기', r'정기\s*점검',
+        r'준비물', r'도구', r'작업', r'절차',
+        r'드레인\s*볼트', r'오일\s*팬', r'토크', r'규정량',
+        r'오일\s*레벨', r'딥스틱', r'점성도', r'등급'
+    ]
+]
+
+# 위 패턴들이 쓰는 문자 (이 문자가 아닌 곳에서 끊으면 어떤 치환도 경계를 넘지 않음)
+PATTERN_CHARS = frozenset(
+    ''.join(old + new for old, new in FRIENDLY_REPLACEMENTS + CLEANUP_REPLACEMENTS)
+    + ''.join(trigger for trigger, _, _ in WARNING_PATTERNS)
+    + ''.join(pattern.pattern for _, pattern in IMPORTANT_KEYWORDS)
+)
+
+MAX_SENTENCES = 12
+MAX_ANSWER_LENGTH = 1500
+
+
+def rewrite_sentence(text: str) -> str:
+    """'.'을 넘지 않는 구간 하나에 친근한 어투/주의 강조/키워드 강조 적용
+
+    모든 치환이 '.'을 넘어 일치하거나 '.'을 새로 만들지 않으므로,
+    답변 전체에 치환을 차례로 적용한 결과는 문장 구간별로 적용해 이어 붙인 결과와 같다.
+    """
+    for old, new in FRIENDLY_REPLACEMENTS:
+        if old in text:
+            text = text.replace(old, new)
+
+    if text.endswith('.'):
+        for trigger, pattern, replacement in WARNING_PATTERNS:
+            if trigger in text:
+                text = pattern.sub(replacement, text)
+
+    if '**' in text:
+        for old, new in CLEANUP_REPLACEMENTS:
+            if old in text:
+                text = text.replace(old, new)
+
+    for first_word, pattern in IMPORTANT_KEYWORDS:
+        if first_word in text:
+            text = pattern.sub(r'**\1**', text)
+
+    return text
+
+
+def truncate_answer(text: str) -> str:
+    """너무 긴 답변은 앞 12문장만 남김"""
+    if len(text) > MAX_ANSWER_LENGTH:
+        sentences = text.split('.')
+        if len(sentences) > MAX_SENTENCES:
+            text = '. '.join(sentences[:MAX_SENTENCES]) + '.'
+    return text
+
+
+def make_answer_friendly(text: str) -> str:
+    """답변 전체를 한 번에 친근한 어투로 변환"""
+    rewriter = FriendlyRewriter()
+    return truncate_answer(rewriter.feed(text) + rewriter.flush())
+
+
+class FriendlyRewriter:
+    """스트리밍 답변 조각을 받아 변환이 확정된 부분만 내보내는 점진적 변환기
+
+    '.'로 끝나는 문장 구간이 완성될 때마다 rewrite_sentence를 적용해 내보내므로,
+    feed() 결과를 모두 이은 뒤 flush()를 붙이면 make_answer_friendly의 잘라내기 전 결과와 같다.
+    '.' 없이 max_pending자 넘게 쌓이면 주의 단어가 나오기 전의 패턴 문자가 아닌 위치에서 미리 끊어 보낸다.
+    """
+
+    def __init__(self, max_pending: int = 200):
+        self.max_pending = max_pending
+        self._pending = ""
+        self.emitted_length = 0
+        self.emitted_sentences = 0
+
+    def feed(self, chunk: str) -> str:
+        """조각을 추가하고 변환이 확정된 텍스트 반환 (없으면 빈 문자열)"""
+        self._pending += chunk
+
+        end = self._pending.rfind('.') + 1
+        if end:
+            complete, self._pending = self._pending[:end], self._pending[end:]
+            output = ''.join(rewrite_sentence(sentence + '.') for sentence in complete[:-1].split('.'))
+        else:
+            output = ""
+
+        if len(self._pending) > self.max_pending:
+            cut = self._safe_cut(self._pending)
+            if cut:
+                output += rewrite_sentence(self._pending[:cut])
+                self._pending = self._pending[cut:]
+
+        return self._emit(output)
+
+    def flush(self) -> str:
+        """남은 텍스트를 변환해 반환 (스트림 종료 시)"""
+        output = rewrite_sentence(self._pending) if self._pending else ""
+        self._pending = ""
+        return self._emit(output)
+
+    def will_truncate(self) -> bool:
+        """이미 내보낸 부분만으로 truncate_answer가 앞 12문장만 남길 것이 확정되었는지"""
+        return self.emitted_sentences >= MAX_SENTENCES and self.emitted_length > MAX_ANSWER_LENGTH
+
+    def _emit(self, output: str) -> str:
+        self.emitted_length += len(output)
+        self.emitted_sentences += output.count('.')
+        return output
+
+    @staticmethod
+    def _safe_cut(text: str) -> int:
+        """앞부분만 따로 변환해도 결과가 같은 가장 뒤의 끊는 위치 (없으면 0)
+
+        주의 강조는 다음 '.'까지 이어지므로 트리거 단어 앞에서만 끊을 수 있고,
+        패턴 문자/공백이 아닌 문자 바로 뒤에서 끊으면 다른 치환과 lookbehind도 경계를 넘지 않는다.
+        """
+        limit = len(text) - 1
+        for trigger, _, _ in WARNING_PATTERNS:
+            position = text.find(trigger)
+            if position != -1:
+                limit = min(limit, position)
+
+        for cut in range(limit, 0, -1):
+            char = text[cut - 1]
+            if char not in PATTERN_CHARS and not char.isspace():
+                return cut
+        return 0
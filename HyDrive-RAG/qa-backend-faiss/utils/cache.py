@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 질의 정규화 (소문자, 공백 정리, 끝 문장부호 제거)"""
+    normalized = re.sub(r'\s+', ' ', query.strip().lower())
+    return normalized.rstrip('?!.~ ')
+
+
+class TTLCache:
+    """크기 제한(LRU)과 만료 시간(TTL)이 있는 프로세스 내 캐시
+
+    키는 (차량, 정규화된 질의) 같은 튜플이며, 첫 요소(차량) 단위로 무효화할 수 있다.
+    무효화할 때마다 그 차량의 세대 번호가 올라가며, set에 조회 시점의 세대를 넘기면
+    그 사이 무효화된 차량의 (교체 전 매뉴얼로 만든) 값은 저장하지 않는다.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (만료된 항목은 제거 후 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def generation(self, prefix: Hashable) -> int:
+        """prefix의 현재 세대 번호 (invalidate할 때마다 1씩 증가)"""
+        with self._lock:
+            return self._generations.get(prefix, 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """캐시 저장 (크기 초과 시 가장 오래 쓰지 않은 항목 제거)
+
+        generation이 있고 키의 첫 요소가 그 뒤에 무효화되었으면 저장하지 않고 False 반환.
+        """
+        if self.max_size <= 0:
+            return False
+
+        with self._lock:
+            if generation is not None and isinstance(key, tuple) and key and \
+                    self._generations.get(key[0], 0) != generation:
+                return False
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, prefix: Hashable) -> int:
+        """키의 첫 요소가 prefix인 항목 모두 제거하고 세대 번호 증가 (예: 매뉴얼이 교체된 차량)"""
+        with self._lock:
+            self._generations[prefix] = self._generations.get(prefix, 0) + 1
+            stale = [key for key in self._entries if isinstance(key, tuple) and key and key[0] == prefix]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 정보"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,80 @@
+import mmap
+import sys
+import types
+from typing import Any, Iterable, Tuple
+
+import numpy as np
+
+# 내부를 따라가지 않는 객체 (공유되는 코드/타입 객체이거나 크기 추정에 의미가 없음)
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+_SCALAR_TYPES = (str, bytes, bytearray, int, float, bool, type(None))
+
+
+def _array_root(array: np.ndarray) -> Any:
+    """배열 데이터를 실제로 소유한 객체 (뷰의 base를 끝까지 따라감)"""
+    root = array
+    while isinstance(root, np.ndarray) and root.base is not None:
+        root = root.base
+    if isinstance(root, memoryview):
+        root = root.obj
+    return root
+
+
+def estimate_memory(obj: Any, exclude: Iterable[Any] = ()) -> Tuple[int, int]:
+    """객체 그래프가 잡고 있는 메모리 추정 (힙 바이트, 메모리 맵 바이트)
+
+    컨테이너와 인스턴스 속성을 따라가며 sys.getsizeof를 더하고, numpy 배열은 데이터 소유자를 한 번만 센다.
+    mmap 위의 배열(스냅샷, 임베딩 캐시)은 파일 페이지라 회수 가능하므로 힙과 따로 센다.
+    exclude의 객체(공유 SectionStore 등)는 따라가지 않는다.
+    """
+    seen = {id(item) for item in exclude}
+    heap = mapped = 0
+    stack = [obj]
+
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        if isinstance(current, _OPAQUE_TYPES):
+            continue
+        if isinstance(current, _SCALAR_TYPES):
+            heap += sys.getsizeof(current)
+            continue
+
+        if isinstance(current, np.ndarray):
+            # 데이터를 소유한 배열은 getsizeof에 데이터가 포함되고, 뷰는 헤더만 포함됨
+            heap += sys.getsizeof(current)
+            if current.base is None:
+                continue
+            root = _array_root(current)
+            if isinstance(root, mmap.mmap):
+                mapped += current.nbytes
+            elif isinstance(root, np.ndarray):
+                if id(root) not in seen:
+                    seen.add(id(root))
+                    heap += root.nbytes
+            else:
+                stack.append(root)
+            continue
+        if isinstance(current, mmap.mmap):
+            continue
+
+        heap += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+
+        attributes = getattr(current, "__dict__", None)
+        if isinstance(attributes, dict):
+            stack.append(attributes)
+        for cls in type(current).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+
+    return heap, mapped
@@ -67,6 +67,37 @@ function App() {
     window.open('https://ownersmanual.hyundai.com/main?langCode=ko_KR&countryCode=A99', '_blank');
   };
 
+  // SSE 스트림 읽기 (이벤트 단위로 콜백 호출)
+  const readEventStream = async (res, onEvent) => {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = "message";
+        let data = "";
+        for (const line of rawEvent.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  };
+
+  const updateMessage = (id, update) => {
+    setMessages(prev => prev.map(message => message.id === id ? { ...message, ...update(message) } : message));
+  };
+
   const ask = async () => {
     if (!question.trim() || !selectedVehicle) return;
     
@@ -82,11 +113,12 @@ function App() {
     setLoadingStep("매뉴얼 검색 중...");
 
     try {
-      const res = await fetch(`${BASE_URL}/ask`, {
+      // 🚀 스트리밍 응답: 출처를 먼저 받고 답변은 생성되는 대로 표시
+      const res = await fetch(`${BASE_URL}/ask/stream`, {
         method: 'POST',
         headers: { 
           'Content-Type': 'application/json',
-          'Accept': 'application/json'
+          'Accept': 'text/event-stream'
         },
         body: JSON.stringify({ 
           q: question,
@@ -94,22 +126,43 @@ function App() {
         })
       });
       
-      setLoadingStep("답변 생성 중...");
-      
       if (!res.ok) {
         throw new Error(`HTTP error! status: ${res.status}`);
       }
       
-      const data = await res.json();
+      const botMessageId = Date.now();
+      let botMessageAdded = false;
+      let sources = [];
       
-      const botMessage = {
-        type: "bot",
-        content: data.answer,
-        timestamp: new Date(),
-        sources: data.sources || []
+      // 첫 답변 조각이 도착하면 로딩 표시를 말풍선으로 교체
+      const ensureBotMessage = () => {
+        if (botMessageAdded) return;
+        botMessageAdded = true;
+        setLoading(false);
+        setLoadingStep("");
+        setMessages(prev => [...prev, {
+          id: botMessageId,
+          type: "bot",
+          content: "",
+          timestamp: new Date(),
+          sources
+        }]);
       };
       
-      setMessages(prev => [...prev, botMessage]);
+      await readEventStream(res, (event, data) => {
+        if (event === "sources") {
+          sources = data.sources || [];
+          setLoadingStep("답변 생성 중...");
+        } else if (event === "token") {
+          ensureBotMessage();
+          updateMessage(botMessageId, message => ({ content: message.content + data.text }));
+        } else if (event === "done") {
+          // 최종 답변(친근한 표현/출처 안내 적용)으로 교체
+          ensureBotMessage();
+          updateMessage(botMessageId, () => ({ content: data.answer }));
+        }
+      });
+      
       setLoading(false);
       setLoadingStep("");
       